@@ -10,6 +10,9 @@ import redis
 
 from di import DI
 from envs import Envs
+from interface.usecase.ranking_usecase import RankingUsecase
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
 from persistence.model import db
 from router import Router
 
@@ -20,7 +23,7 @@ app = Flask(
     static_folder="bpm-searcher-frontend/build",
     template_folder="bpm-searcher-frontend/build",
 )
-CORS(app)
+CORS(app, expose_headers=["X-Next-Cursor"])
 
 envs = Envs()
 
@@ -33,6 +36,7 @@ redis_conn = redis.from_url(
     url=os.environ.get("REDIS_URL"),
     decode_responses=True,
 )
+binary_redis_conn = redis.from_url(url=os.environ.get("REDIS_URL"))
 
 cred = firebase_admin.credentials.Certificate({
     "type": "service_account",
@@ -53,6 +57,24 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
 db.init_app(app)
 migrate = Migrate(app, db)
 
-injector = Injector([DI(redis_conn, app, app.logger)])
+injector = Injector([DI(redis_conn, binary_redis_conn, app, app.logger)])
 router = injector.get(Router)
 router.add_router()
+
+
+@app.cli.command("refresh-rankings")
+def refresh_rankings() -> None:
+    """Rebuild the rankings of all charts, e.g. from a scheduled job"""
+    charts = injector.get(RankingUsecase).refresh_rankings()
+    app.logger.info(f"refreshed rankings: {', '.join(charts)}")
+
+
+@app.cli.command("index-bpm")
+def index_bpm() -> None:
+    """Index all tracks in the catalog by bpm, e.g. after redis has been flushed"""
+    track_cache = injector.get(TrackCache)
+    num_tracks = 0
+    for tracks in injector.get(TrackCatalog).iter_tracks():
+        track_cache.add_to_bpm_index(tracks)
+        num_tracks += len(tracks)
+    app.logger.info(f"indexed {num_tracks} tracks by bpm")
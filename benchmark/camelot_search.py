@@ -0,0 +1,87 @@
+"""Show that the cost of a compatible track query does not grow with the number of
+indexed tracks, compared with scanning all of them.
+
+Usage:
+    python -m benchmark.camelot_search [--sizes 10000,100000,1000000]
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import List
+from unittest import mock
+
+for name in [
+    "CLIENT_ID", "CLIENT_SECRET", "APP_ENV", "FIREBASE_PROJECT_ID",
+    "FIREBASE_CLIENT_EMAIL", "FIREBASE_PRIVATE_KEY", "MYSQL_ADDR", "MYSQL_USER",
+    "MYSQL_PASSWORD", "MYSQL_DATABASE",
+]:
+    os.environ.setdefault(name, "benchmark")
+
+from benchmark.similar_search import random_track  # noqa: E402
+from domain.model.track import Track  # noqa: E402
+from envs import Envs  # noqa: E402
+from persistence.camelot_index import CamelotIndex  # noqa: E402
+from persistence.track_catalog import TrackCatalog  # noqa: E402
+
+
+def scan(tracks: List[Track], seed: Track, tolerance: float, limit: int) -> List[str]:
+    """Answer the same query by checking every track"""
+    codes = {str(code) for code in seed.camelot.compatible()}
+    targets = [seed.bpm, seed.bpm / 2, seed.bpm * 2]
+    matches = []
+    for track in tracks:
+        camelot = track.camelot
+        if camelot is None or str(camelot) not in codes:
+            continue
+        difference = min(abs(track.bpm - target) / target for target in targets)
+        if difference <= tolerance:
+            matches.append((difference, track.spotify_id))
+    return [spotify_id for _, spotify_id in sorted(matches)[:limit]]
+
+
+def measure(func, seeds: List[Track]) -> float:
+    elapsed = []
+    for seed in seeds:
+        start = time.perf_counter()
+        func(seed)
+        elapsed.append(time.perf_counter() - start)
+    return statistics.median(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=0.06)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    seeds = [random_track(f"seed{idx}") for idx in range(args.repeat)]
+    seeds = [seed for seed in seeds if seed.camelot is not None]
+    for size in map(int, args.sizes.split(",")):
+        track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        track_catalog.iter_tracks.return_value = iter([])
+        camelot_index = CamelotIndex(Envs(), mock.MagicMock(), track_catalog)
+        tracks = [random_track(f"id{idx}") for idx in range(size)]
+        camelot_index.add_many(tracks)
+
+        indexed = measure(
+            lambda seed: camelot_index.get_compatible_ids(
+                seed, args.tolerance, args.limit,
+            ),
+            seeds,
+        )
+        scanned = measure(
+            lambda seed: scan(tracks, seed, args.tolerance, args.limit),
+            seeds[:5],
+        )
+        print(
+            f"{size:>8} tracks: index {indexed * 1000:7.3f} ms, "
+            f"scan {scanned * 1000:8.1f} ms"
+        )
+        camelot_index.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
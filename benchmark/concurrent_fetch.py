@@ -0,0 +1,117 @@
+"""Compare sequential, concurrent (thread pool) and async (event loop) fetch of
+track metadata and audio features.
+
+Usage:
+    python -m benchmark.concurrent_fetch [--latency 0.05] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import time
+from unittest import mock
+
+for name in [
+    "CLIENT_ID", "CLIENT_SECRET", "APP_ENV", "FIREBASE_PROJECT_ID",
+    "FIREBASE_CLIENT_EMAIL", "FIREBASE_PRIVATE_KEY", "MYSQL_ADDR", "MYSQL_USER",
+    "MYSQL_PASSWORD", "MYSQL_DATABASE",
+]:
+    os.environ.setdefault(name, "benchmark")
+
+from benchmark.spotify_stub import SpotifyStub  # noqa: E402
+from envs import Envs  # noqa: E402
+from persistence.async_spotify_client import AsyncSpotifyClient  # noqa: E402
+from persistence.async_track import AsyncTrackRepositoryImpl  # noqa: E402
+from persistence.camelot_index import CamelotIndex  # noqa: E402
+from persistence.feature_cache import FeatureCache  # noqa: E402
+from persistence.feature_index import FeatureIndex  # noqa: E402
+from persistence.rate_limiter import RateLimiter  # noqa: E402
+from persistence.spotify_client import SpotifyClient  # noqa: E402
+from persistence.track import TrackRepositoryImpl  # noqa: E402
+from persistence.track_base import TrackRepositoryBase  # noqa: E402
+from persistence.track_cache import TrackCache  # noqa: E402
+from persistence.track_catalog import TrackCatalog  # noqa: E402
+
+
+def create_track_repository(stub: SpotifyStub, mode: str) -> TrackRepositoryBase:
+    envs = Envs()
+    envs.SPOTIFY_API_URL = stub.api_url
+    envs.SPOTIFY_ACCOUNTS_URL = stub.accounts_url
+    envs.SPOTIFY_CONCURRENT_FETCH = mode == "concurrent"
+    access_token_repository = mock.MagicMock()
+    access_token_repository.get_access_token.return_value = "stub_token"
+    # every lookup misses the caches so that both upstream calls are made
+    feature_cache = mock.create_autospec(FeatureCache, instance=True)
+    feature_cache.get_many.side_effect = lambda ids: [None] * len(ids)
+    track_cache = mock.create_autospec(TrackCache, instance=True)
+    track_cache.get.return_value = None
+    track_cache.get_many.side_effect = lambda ids: [None] * len(ids)
+    track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+    track_catalog.get_many.side_effect = lambda ids: ([None] * len(ids), [])
+    feature_index = mock.create_autospec(FeatureIndex, instance=True)
+    camelot_index = mock.create_autospec(CamelotIndex, instance=True)
+    logger = mock.MagicMock()
+    redis = mock.MagicMock()
+    rate_limiter = RateLimiter(envs, logger, redis)
+    if mode == "async":
+        return AsyncTrackRepositoryImpl(
+            logger,
+            access_token_repository,
+            AsyncSpotifyClient(envs, logger, rate_limiter),
+            feature_cache,
+            track_cache,
+            track_catalog,
+            feature_index,
+            camelot_index,
+        )
+    return TrackRepositoryImpl(
+        logger,
+        access_token_repository,
+        SpotifyClient(envs, logger, redis, rate_limiter),
+        feature_cache,
+        track_cache,
+        track_catalog,
+        feature_index,
+        camelot_index,
+    )
+
+
+def measure(func, repeat: int) -> float:
+    func()  # open connections before measuring
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return statistics.median(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    stub = SpotifyStub(latency=args.latency).start()
+    ids = [f"id{idx}" for idx in range(20)]
+    playlist_ids = [f"id{idx}" for idx in range(1000)]
+    print(f"stub latency: {args.latency * 1000:.0f} ms per request")
+    for mode in ["sequential", "concurrent", "async"]:
+        track_repository = create_track_repository(stub, mode)
+        by_id = measure(lambda: track_repository.get_track_by_id("id0"), args.repeat)
+        by_ids = measure(lambda: track_repository.get_tracks_by_ids(ids), args.repeat)
+        playlist = measure(
+            lambda: track_repository.get_tracks_by_ids(playlist_ids),
+            args.repeat,
+        )
+        print(
+            f"{mode:>10}: get_track_by_id {by_id * 1000:7.1f} ms, "
+            f"get_tracks_by_ids({len(ids)}) {by_ids * 1000:7.1f} ms, "
+            f"get_tracks_by_ids({len(playlist_ids)}) {playlist * 1000:7.1f} ms"
+        )
+        if mode == "async":
+            track_repository.spotify_client.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
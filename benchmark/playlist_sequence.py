@@ -0,0 +1,48 @@
+"""Measure the time to sequence a playlist and how much it smooths the transitions
+of tempo and key.
+
+Usage:
+    python -m benchmark.playlist_sequence [--sizes 100,1000,2000,5000]
+"""
+import argparse
+import os
+import time
+
+for name in [
+    "CLIENT_ID", "CLIENT_SECRET", "APP_ENV", "FIREBASE_PROJECT_ID",
+    "FIREBASE_CLIENT_EMAIL", "FIREBASE_PRIVATE_KEY", "MYSQL_ADDR", "MYSQL_USER",
+    "MYSQL_PASSWORD", "MYSQL_DATABASE",
+]:
+    os.environ.setdefault(name, "benchmark")
+
+from benchmark.similar_search import random_track  # noqa: E402
+from domain.model.sequence import sequence, transition_costs  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,500,1000,2000")
+    args = parser.parse_args()
+
+    for size in map(int, args.sizes.split(",")):
+        tracks = [random_track(f"id{idx}") for idx in range(size)]
+
+        start = time.perf_counter()
+        costs = transition_costs(tracks)
+        costs_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indices = sequence(tracks)
+        elapsed = time.perf_counter() - start
+
+        original = costs.diagonal(1).mean()
+        sequenced = costs[indices[:-1], indices[1:]].mean()
+        print(
+            f"{size} tracks: sequenced in {elapsed * 1000:.0f} ms "
+            f"(cost matrix {costs_elapsed * 1000:.0f} ms), "
+            f"mean transition cost {original:.2f} -> {sequenced:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure the latency of a similar track query against a large feature index.
+
+Usage:
+    python -m benchmark.similar_search [--tracks 1000000] [--repeat 100]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from unittest import mock
+
+for name in [
+    "CLIENT_ID", "CLIENT_SECRET", "APP_ENV", "FIREBASE_PROJECT_ID",
+    "FIREBASE_CLIENT_EMAIL", "FIREBASE_PRIVATE_KEY", "MYSQL_ADDR", "MYSQL_USER",
+    "MYSQL_PASSWORD", "MYSQL_DATABASE",
+]:
+    os.environ.setdefault(name, "benchmark")
+
+from domain.model.track import Track  # noqa: E402
+from envs import Envs  # noqa: E402
+from persistence.feature_index import FeatureIndex  # noqa: E402
+from persistence.track_catalog import TrackCatalog  # noqa: E402
+
+
+def random_track(spotify_id: str) -> Track:
+    return Track(
+        spotify_id=spotify_id,
+        song_name="song_name",
+        artist="artist",
+        album_name="album_name",
+        bpm=random.uniform(60, 200),
+        danceability=random.random(),
+        energy=random.random(),
+        image_url="image_url",
+        key=random.randrange(-1, 12),
+        mode=random.randrange(2),
+        preview_url="preview_url",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracks", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+    track_catalog.iter_tracks.return_value = iter([])
+    feature_index = FeatureIndex(Envs(), mock.MagicMock(), track_catalog)
+
+    start = time.perf_counter()
+    batch_size = 10000
+    for offset in range(0, args.tracks, batch_size):
+        feature_index.add_many([
+            random_track(f"id{idx}")
+            for idx in range(offset, min(offset + batch_size, args.tracks))
+        ])
+    print(f"indexed {args.tracks} tracks in {time.perf_counter() - start:.1f} s")
+
+    seeds = [random_track(f"seed{idx}") for idx in range(args.repeat)]
+    elapsed = []
+    for seed in seeds:
+        start = time.perf_counter()
+        feature_index.get_similar_ids(seed, args.limit)
+        elapsed.append(time.perf_counter() - start)
+    elapsed.sort()
+    print(
+        f"get_similar_ids(limit={args.limit}): "
+        f"median {statistics.median(elapsed) * 1000:.1f} ms, "
+        f"p95 {elapsed[int(len(elapsed) * 0.95) - 1] * 1000:.1f} ms"
+    )
+    feature_index.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Local stand-in for the Spotify Web API used by the benchmarks.
+
+Every request sleeps for the configured latency before answering, so the wall-clock
+time of the code under test is dominated by the number of sequential round trips
+just like it is against api.spotify.com.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_item(spotify_id: str) -> dict:
+    return {
+        "id": spotify_id,
+        "name": f"song {spotify_id}",
+        "album": {
+            "name": f"album {spotify_id}",
+            "images": [{"url": f"https://i.scdn.co/image/{spotify_id}"}],
+        },
+        "artists": [{"name": f"artist {spotify_id}"}],
+        "preview_url": f"https://p.scdn.co/mp3-preview/{spotify_id}",
+    }
+
+
+def fake_feature(spotify_id: str) -> dict:
+    seed = sum(map(ord, spotify_id))
+    return {
+        "id": spotify_id,
+        "tempo": 60 + seed % 120 + (seed % 7) / 10,
+        "key": seed % 12,
+        "mode": seed % 2,
+        "danceability": (seed % 100) / 100,
+        "energy": (seed * 7 % 100) / 100,
+    }
+
+
+class SpotifyStub:
+    def __init__(self, latency: float = 0.05) -> None:
+        self.latency = latency
+        self.num_requests = 0
+        # number of the next GET requests answered with 429
+        self.num_rate_limited = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    @property
+    def accounts_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> "SpotifyStub":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _count(self) -> None:
+        with self._lock:
+            self.num_requests += 1
+
+    def _take_rate_limited(self) -> bool:
+        with self._lock:
+            if self.num_rate_limited == 0:
+                return False
+            self.num_rate_limited -= 1
+            return True
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                stub._count()
+                time.sleep(stub.latency)
+                if stub._take_rate_limited():
+                    self._send({"error": "rate limited"}, 429, {"Retry-After": "0"})
+                    return
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                ids = query.get("ids", [""])[0].split(",")
+                parts = url.path.strip("/").split("/")
+
+                if parts[1:] == ["tracks"]:
+                    self._send({"tracks": [fake_item(id_) for id_ in ids]})
+                elif parts[1] == "tracks":
+                    self._send(fake_item(parts[2]))
+                elif parts[1:] == ["audio-features"]:
+                    self._send({"audio_features": [fake_feature(id_) for id_ in ids]})
+                elif parts[1] == "audio-features":
+                    self._send(fake_feature(parts[2]))
+                elif parts[1] == "search":
+                    q = query.get("q", [""])[0]
+                    items = [fake_item(f"{q}{idx}") for idx in range(20)]
+                    self._send({"tracks": {"items": items}})
+                elif parts[1] == "playlists":
+                    items = [
+                        {"track": fake_item(f"{parts[2]}{idx}")} for idx in range(50)
+                    ]
+                    self._send({"tracks": {"items": items}})
+                else:
+                    self._send({"error": "not found"}, 404)
+
+            def do_POST(self) -> None:
+                stub._count()
+                time.sleep(stub.latency)
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                self._send({"access_token": "stub_token", "expires_in": 3600})
+
+            def _send(
+                self,
+                body: dict,
+                status: int = 200,
+                headers: Optional[dict] = None,
+            ) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
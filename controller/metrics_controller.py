@@ -0,0 +1,17 @@
+from flask import jsonify, Response
+from injector import inject, singleton
+
+from interface.usecase.metrics_usecase import MetricsUsecase
+
+
+@singleton
+class MetricsController:
+    @inject
+    def __init__(self, metrics_usecase: MetricsUsecase) -> None:
+        self.metrics_usecase = metrics_usecase
+
+    def get_metrics(self) -> Response:
+        metrics = self.metrics_usecase.get_metrics()
+        response = jsonify(metrics)
+        response.cache_control.no_store = True
+        return response
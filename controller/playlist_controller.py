@@ -1,11 +1,39 @@
 from dataclasses import asdict
 
+from typing import List
+
 from flask import jsonify, make_response, Response, request
 from injector import inject, singleton
 
+from domain.model.playlist import Playlist
+from domain.model.sequence import TooManyTracksError
+from domain.model.track import PlaylistTrack
+
 from interface.usecase.playlist_usecase import PlaylistUsecase
 from interface.usecase.auth_usecase import AuthUsecase
 
+# number of playlists in a page
+DEFAULT_PLAYLIST_LIMIT = 50
+MAX_PLAYLIST_LIMIT = 100
+PLAYLIST_SORTS = ["updated_at", "name", "num_tracks"]
+
+
+def _playlist_track_dicts(playlist_tracks: List[PlaylistTrack]) -> List[dict]:
+    # rank is only the key to sort tracks in the database and is not responded
+    playlist_track_dicts = []
+    for playlist_track in playlist_tracks:
+        playlist_track_dict = asdict(playlist_track)
+        del playlist_track_dict["rank"]
+        playlist_track_dicts.append(playlist_track_dict)
+    return playlist_track_dicts
+
+
+def _playlist_dict(playlist: Playlist) -> dict:
+    return {
+        "playlist_info": asdict(playlist.playlist_info),
+        "playlist_tracks": _playlist_track_dicts(playlist.playlist_tracks),
+    }
+
 
 @singleton
 class PlaylistController:
@@ -70,7 +98,7 @@ class PlaylistController:
         if playlist is None:
             return make_response("playlist with the specified id does not exist", 404)
 
-        return jsonify(playlist)
+        return jsonify(_playlist_dict(playlist))
 
     def get_playlist_infos(self, uid: str) -> Response:
         headers = request.headers
@@ -90,9 +118,39 @@ class PlaylistController:
         if user["uid"] != uid:
             return make_response("uid in path param is incorrect", 403)
 
-        playlist_infos = self.playlist_usecase.get_playlist_infos(uid)
-        plyalist_infos = [asdict(playlist_info) for playlist_info in playlist_infos]
-        return jsonify(plyalist_infos)
+        sort = request.args.get("sort", "updated_at")
+        order = request.args.get("order", "desc")
+        if sort not in PLAYLIST_SORTS or order not in ["asc", "desc"]:
+            return make_response("invalid sort or order", 400)
+
+        # all playlists are returned to the clients which do not ask for pages
+        limit = None
+        if "limit" in request.args or "cursor" in request.args:
+            try:
+                limit = int(request.args.get("limit", DEFAULT_PLAYLIST_LIMIT))
+            except ValueError:
+                return make_response("invalid limit", 400)
+            if not 0 < limit <= MAX_PLAYLIST_LIMIT:
+                return make_response("invalid limit", 400)
+
+        playlist_info_page = self.playlist_usecase.get_playlist_infos(
+            uid,
+            sort,
+            order == "desc",
+            limit,
+            request.args.get("cursor"),
+        )
+        if playlist_info_page is None:
+            return make_response("invalid cursor", 400)
+
+        plyalist_infos = [
+            asdict(playlist_info)
+            for playlist_info in playlist_info_page.playlist_infos
+        ]
+        response = jsonify(plyalist_infos)
+        if playlist_info_page.next_cursor is not None:
+            response.headers["X-Next-Cursor"] = playlist_info_page.next_cursor
+        return response
 
     def patch_playlist_info(self, uid: str, playlist_id: str) -> Response:
         headers = request.headers
@@ -164,7 +222,7 @@ class PlaylistController:
         if playlist is None:
             return make_response("playlist does not exist", 404)
 
-        return jsonify(asdict(playlist))
+        return jsonify(_playlist_dict(playlist))
 
     def delete_playlist(self, uid: str, playlist_id: str) -> Response:
         headers = request.headers
@@ -213,10 +271,10 @@ class PlaylistController:
         if user["uid"] != uid:
             return make_response("uid in path param is incorrect", 403)
 
-        playlist = self.playlist_usecase.delete_track(
+        playlist_info = self.playlist_usecase.delete_track(
             playlist_id, playlist_track_id, uid
         )
-        if playlist is None:
+        if playlist_info is None:
             return make_response("specified track or playlist does not exist", 404)
 
         return make_response("delete playlist", 204)
@@ -259,4 +317,31 @@ class PlaylistController:
                 404,
             )
 
-        return jsonify(playlist_tracks)
+        return jsonify(_playlist_track_dicts(playlist_tracks))
+
+    def auto_sequence(self, uid: str, playlist_id: str) -> Response:
+        headers = request.headers
+        bearer = headers.get("Authorization")
+        if bearer is None:
+            return make_response("no id token is specified", 401)
+
+        bearer = bearer.split()
+        if len(bearer) != 2:
+            return make_response("beaer header is invalid format", 401)
+
+        id_token = bearer[1]
+        user = self.auth_usecase.verify_user(id_token)
+        if user is None:
+            return make_response("invalid id token", 401)
+
+        if user["uid"] != uid:
+            return make_response("uid in path param is incorrect", 403)
+
+        try:
+            playlist_tracks = self.playlist_usecase.auto_sequence(playlist_id, uid)
+        except TooManyTracksError:
+            return make_response("too many tracks to sequence", 400)
+        if playlist_tracks is None:
+            return make_response("playlist with the specified id does not exist", 404)
+
+        return jsonify(_playlist_track_dicts(playlist_tracks))
@@ -1,4 +1,4 @@
-from flask import jsonify, Response
+from flask import make_response, request, Response
 from injector import inject, singleton
 
 from interface.usecase.ranking_usecase import RankingUsecase
@@ -11,7 +11,23 @@ class RankingController:
         self.ranking_usecase = ranking_usecase
 
     def get_ranking(self) -> Response:
-        ranking = self.ranking_usecase.get_ranking()
-        response = jsonify(ranking)
+        chart = request.args.get("chart")
+        if chart is not None and chart not in self.ranking_usecase.get_charts():
+            return make_response("unknown chart", 404)
+
+        compressed = "gzip" in request.accept_encodings
+        payload = self.ranking_usecase.get_ranking_payload(compressed, chart)
+        if payload is None:
+            return make_response("ranking is not available now", 503)
+
+        if request.if_none_match.contains(payload.etag):
+            response = Response(status=304)
+        else:
+            response = Response(payload.body, mimetype="application/json")
+            if payload.content_encoding is not None:
+                response.content_encoding = payload.content_encoding
+
+        response.set_etag(payload.etag)
+        response.vary.add("Accept-Encoding")
         response.cache_control.max_age = 60 * 60  # 1 hour
         return response
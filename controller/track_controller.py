@@ -1,8 +1,18 @@
+import math
+
 from flask import jsonify, make_response, Response, request
 from injector import inject, singleton
 
 from interface.usecase.track_usecase import TrackUsecase
 
+# number of tracks in a page of bpm search
+DEFAULT_LIMIT = 50
+DEFAULT_SIMILAR_LIMIT = 20
+MAX_LIMIT = 100
+# tolerance of tempo of compatible tracks in percent
+DEFAULT_TOLERANCE = 6.0
+MAX_TOLERANCE = 20.0
+
 
 @singleton
 class TrackController:
@@ -11,6 +21,11 @@ class TrackController:
         self.track_usecase = track_usecase
 
     def get_tracks(self) -> Response:
+        if "search" not in request.args and (
+            "bpm_min" in request.args or "bpm_max" in request.args
+        ):
+            return self.get_tracks_by_bpm()
+
         query = request.args.get("search")
         if query == "":
             return make_response("no search query", 400)
@@ -19,3 +34,52 @@ class TrackController:
         if len(tracks) == 0:
             return make_response("no search result for the specified query", 404)
         return jsonify(tracks)
+
+    def get_tracks_by_bpm(self) -> Response:
+        # request.args.get(type=...) falls back to the default for invalid values
+        try:
+            bpm_min = float(request.args.get("bpm_min", 0))
+            bpm_max = float(request.args.get("bpm_max", math.inf))
+            offset = int(request.args.get("offset", 0))
+            limit = int(request.args.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            return make_response("invalid bpm range", 400)
+
+        if math.isnan(bpm_min) or math.isnan(bpm_max) or bpm_min > bpm_max:
+            return make_response("invalid bpm range", 400)
+        if offset < 0 or not 0 < limit <= MAX_LIMIT:
+            return make_response("invalid bpm range", 400)
+
+        tracks = self.track_usecase.get_tracks_by_bpm(bpm_min, bpm_max, offset, limit)
+        return jsonify(tracks)
+
+    def get_similar_tracks(self, spotify_id: str) -> Response:
+        try:
+            limit = int(request.args.get("limit", DEFAULT_SIMILAR_LIMIT))
+        except ValueError:
+            return make_response("invalid limit", 400)
+        if not 0 < limit <= MAX_LIMIT:
+            return make_response("invalid limit", 400)
+
+        tracks = self.track_usecase.get_similar_tracks(spotify_id, limit)
+        if tracks is None:
+            return make_response("no track for the specified id", 404)
+        return jsonify(tracks)
+
+    def get_compatible_tracks(self, spotify_id: str) -> Response:
+        try:
+            tolerance = float(request.args.get("tolerance", DEFAULT_TOLERANCE))
+            limit = int(request.args.get("limit", DEFAULT_SIMILAR_LIMIT))
+        except ValueError:
+            return make_response("invalid tolerance or limit", 400)
+        if not 0 <= tolerance <= MAX_TOLERANCE or not 0 < limit <= MAX_LIMIT:
+            return make_response("invalid tolerance or limit", 400)
+
+        tracks = self.track_usecase.get_compatible_tracks(
+            spotify_id,
+            tolerance / 100,
+            limit,
+        )
+        if tracks is None:
+            return make_response("no track for the specified id", 404)
+        return jsonify(tracks)
@@ -2,33 +2,52 @@ from logging import Logger
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from injector import Module
+from injector import Module, singleton
 from redis import Redis
 
+from envs import Envs
 from interface.repository.access_token_repository import AccessTokenRepository
 from interface.repository.auth_repository import AuthRepository
+from interface.repository.metrics_repository import MetricsRepository
 from interface.repository.ranking_repository import RankingRepository
 from interface.repository.playlist_repository import PlaylistRepository
+from interface.repository.search_result_repository import SearchResultRepository
 from interface.repository.track_repository import TrackRepository
 from interface.usecase.auth_usecase import AuthUsecase
+from interface.usecase.metrics_usecase import MetricsUsecase
 from interface.usecase.playlist_usecase import PlaylistUsecase
 from interface.usecase.track_usecase import TrackUsecase
 from interface.usecase.ranking_usecase import RankingUsecase
 from interactor.auth_interactor import AuthInteractor
+from interactor.metrics_interactor import MetricsInteractor
 from interactor.playlist_interactor import PlaylistInteractor
 from interactor.track_interactor import TrackInteractor
 from interactor.ranking_interactor import RankingInteractor
 from persistence.model import db
 from persistence.access_token import AccessTokenRepositoryImpl
+from persistence.async_spotify_client import AsyncSpotifyClient
+from persistence.async_track import AsyncTrackRepositoryImpl
 from persistence.auth import AuthRepositoryImpl
+from persistence.binary_redis import BinaryRedis
+from persistence.metrics import MetricsRepositoryImpl
 from persistence.playlist import PlaylistRepositoryImpl
 from persistence.ranking import RankingRepositoryImpl
+from persistence.rate_limiter import RateLimiter
+from persistence.search_result import SearchResultRepositoryImpl
+from persistence.spotify_client import SpotifyClient
 from persistence.track import TrackRepositoryImpl
 
 
 class DI(Module):
-    def __init__(self, redis: Redis, app: Flask, logger: Logger):
+    def __init__(
+        self,
+        redis: Redis,
+        binary_redis: Redis,
+        app: Flask,
+        logger: Logger,
+    ):
         self.redis = redis
+        self.binary_redis = binary_redis
         self.app = app
         self.logger = logger
 
@@ -36,14 +55,24 @@ class DI(Module):
         binder.bind(Flask, to=self.app)
         binder.bind(Logger, to=self.logger)
         binder.bind(Redis, to=self.redis)
+        binder.bind(BinaryRedis, to=self.binary_redis)
         binder.bind(SQLAlchemy, to=db)
+        binder.bind(RateLimiter, to=RateLimiter, scope=singleton)
+        binder.bind(SpotifyClient, to=SpotifyClient, scope=singleton)
+        binder.bind(AsyncSpotifyClient, to=AsyncSpotifyClient, scope=singleton)
 
         binder.bind(AccessTokenRepository, to=AccessTokenRepositoryImpl)
         binder.bind(AuthRepository, to=AuthRepositoryImpl)
         binder.bind(AuthUsecase, to=AuthInteractor)
+        binder.bind(MetricsRepository, to=MetricsRepositoryImpl)
+        binder.bind(MetricsUsecase, to=MetricsInteractor)
         binder.bind(PlaylistRepository, to=PlaylistRepositoryImpl)
         binder.bind(PlaylistUsecase, to=PlaylistInteractor)
         binder.bind(RankingRepository, to=RankingRepositoryImpl)
         binder.bind(RankingUsecase, to=RankingInteractor)
+        binder.bind(SearchResultRepository, to=SearchResultRepositoryImpl)
         binder.bind(TrackUsecase, to=TrackInteractor)
-        binder.bind(TrackRepository, to=TrackRepositoryImpl)
+        if Envs.SPOTIFY_ASYNC:
+            binder.bind(TrackRepository, to=AsyncTrackRepositoryImpl)
+        else:
+            binder.bind(TrackRepository, to=TrackRepositoryImpl)
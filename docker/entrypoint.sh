@@ -1,4 +1,4 @@
 #! /bin/sh
 flask db migrate
 flask db upgrade
-gunicorn --bind=0.0.0.0:8080 --workers=1 --access-logfile - app:app
+gunicorn --bind=0.0.0.0:8080 --workers=1 --threads=8 --access-logfile - app:app
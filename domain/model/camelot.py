@@ -0,0 +1,51 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class Camelot:
+    """Position of a key on the Camelot wheel used for harmonic mixing.
+
+    number goes around the circle of fifths from 1 to 12, and letter is "A" for
+    minor and "B" for major, so a minor key shares its number with its relative
+    major.
+    """
+    number: int
+    letter: str
+
+    @classmethod
+    def from_key(cls, key: int, mode: int) -> Optional[Camelot]:
+        """Get the position of the key given as Spotify audio features
+
+        Args:
+            key (int): pitch class from 0 (C) to 11 (B), or -1 if not detected
+            mode (int): 1 for major and 0 for minor
+
+        Returns:
+            Optional[Camelot]: position of the key. None if the key is unknown.
+        """
+        if not 0 <= key <= 11:
+            return None
+
+        if mode == 1:
+            return cls(number=(key * 7 + 7) % 12 + 1, letter="B")
+        # a minor key is at the position of its relative major 3 semitones above
+        return cls(number=((key + 3) * 7 + 7) % 12 + 1, letter="A")
+
+    def compatible(self) -> List[Camelot]:
+        """Get the positions to which a track in this key can be mixed smoothly
+
+        Returns:
+            List[Camelot]: this position, the adjacent numbers with the same letter
+                and the same number with the other letter
+        """
+        return [
+            self,
+            Camelot(number=self.number % 12 + 1, letter=self.letter),
+            Camelot(number=(self.number - 2) % 12 + 1, letter=self.letter),
+            Camelot(number=self.number, letter="B" if self.letter == "A" else "A"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.number}{self.letter}"
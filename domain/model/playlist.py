@@ -4,6 +4,8 @@ from datetime import datetime
 from typing import List, Optional
 import uuid
 
+from domain.model.rank import rank_between, spread_ranks
+from domain.model.sequence import sequence
 from domain.model.track import PlaylistTrack, Track
 
 
@@ -19,8 +21,13 @@ class PlaylistInfo:
     updated_at: datetime
 
     # TODO: add constraints to name or desc
-    # num_tracks must be less than 50 because spotify api "get tracks from ids"
-    # only receive ids
+
+
+@dataclass(frozen=True)
+class PlaylistInfoPage:
+    playlist_infos: List[PlaylistInfo]
+    # cursor to get the next page, which is None on the last page
+    next_cursor: Optional[str]
 
 
 @dataclass(frozen=True)
@@ -125,21 +132,40 @@ class Playlist:
         if order_from == order_to:
             return self
 
+        # the moved track gets a rank between the tracks around its new position,
+        # so the ranks of the other tracks do not change
+        ranked_tracks = self._ranked_tracks()
+        others = [
+            playlist_track
+            for playlist_track in ranked_tracks
+            if playlist_track.order != order_from
+        ]
+        before = others[order_to - 2].rank if order_to > 1 else None
+        after = others[order_to - 1].rank if order_to <= len(others) else None
+        rank = rank_between(before, after)
+
         playlist_tracks = []
-        for playlist_track in self.playlist_tracks:
+        for playlist_track in ranked_tracks:
             order = playlist_track.order
+            if order == order_from:
+                playlist_tracks.append(
+                    PlaylistTrack(
+                        id=playlist_track.id,
+                        order=order_to,
+                        track=playlist_track.track,
+                        created_at=playlist_track.created_at,
+                        updated_at=datetime.utcnow(),
+                        rank=rank,
+                    )
+                )
+                continue
+
             if order_from < order and order <= order_to:
                 new_order = playlist_track.order - 1
-                updated_at = datetime.utcnow()
             elif order_to <= order and order < order_from:
                 new_order = playlist_track.order + 1
-                updated_at = datetime.utcnow()
-            elif order == order_from:
-                new_order = order_to
-                updated_at = datetime.utcnow()
             else:
                 new_order = playlist_track.order
-                updated_at = playlist_track.updated_at
 
             playlist_tracks.append(
                 PlaylistTrack(
@@ -147,7 +173,8 @@ class Playlist:
                     order=new_order,
                     track=playlist_track.track,
                     created_at=playlist_track.created_at,
-                    updated_at=updated_at,
+                    updated_at=playlist_track.updated_at,
+                    rank=playlist_track.rank,
                 )
             )
         playlist_tracks = sorted(playlist_tracks, key=lambda e: e.order)
@@ -167,3 +194,105 @@ class Playlist:
             playlist_info=playlist_info,
             playlist_tracks=playlist_tracks
         )
+
+    def auto_sequence(self) -> Playlist:
+        """Reorder the tracks for smooth transitions of tempo and key. The first
+        track stays at the top.
+
+        Tracks which could not be fetched have neither tempo nor key, so they are
+        not sequenced and follow the others in the current order.
+
+        Returns:
+            Playlist: new playlist in which the tracks are reordered
+        """
+        fetched_tracks = [
+            playlist_track
+            for playlist_track in self.playlist_tracks
+            if playlist_track.track is not None
+        ]
+        missing_tracks = [
+            playlist_track
+            for playlist_track in self.playlist_tracks
+            if playlist_track.track is None
+        ]
+        indices = sequence([playlist_track.track for playlist_track in fetched_tracks])
+        ordered_tracks = [fetched_tracks[idx] for idx in indices] + missing_tracks
+
+        # every track is ranked again as most of them are moved
+        playlist_tracks = []
+        ranks = spread_ranks(len(ordered_tracks))
+        for new_order, (playlist_track, rank) in enumerate(
+            zip(ordered_tracks, ranks), 1
+        ):
+            if playlist_track.order == new_order:
+                updated_at = playlist_track.updated_at
+            else:
+                updated_at = datetime.utcnow()
+
+            playlist_tracks.append(
+                PlaylistTrack(
+                    id=playlist_track.id,
+                    order=new_order,
+                    track=playlist_track.track,
+                    created_at=playlist_track.created_at,
+                    updated_at=updated_at,
+                    rank=rank,
+                )
+            )
+
+        if len(playlist_tracks) == 0:
+            image_url = None
+        elif playlist_tracks[0].track is None:
+            image_url = self.playlist_info.image_url
+        else:
+            image_url = playlist_tracks[0].track.image_url
+
+        playlist_info = PlaylistInfo(
+            id=self.playlist_info.id,
+            uid=self.playlist_info.uid,
+            name=self.playlist_info.name,
+            desc=self.playlist_info.desc,
+            image_url=image_url,
+            num_tracks=self.playlist_info.num_tracks,
+            created_at=self.playlist_info.created_at,
+            updated_at=datetime.utcnow(),
+        )
+
+        return Playlist(
+            playlist_info=playlist_info,
+            playlist_tracks=playlist_tracks
+        )
+
+    def rebalance(self) -> Playlist:
+        """Give evenly spaced short ranks to the tracks in the same order
+
+        Returns:
+            Playlist: new playlist whose tracks have the new ranks
+        """
+        ranks = spread_ranks(len(self.playlist_tracks))
+        playlist_tracks = [
+            PlaylistTrack(
+                id=playlist_track.id,
+                order=playlist_track.order,
+                track=playlist_track.track,
+                created_at=playlist_track.created_at,
+                updated_at=playlist_track.updated_at,
+                rank=rank,
+            )
+            for playlist_track, rank in zip(self.playlist_tracks, ranks)
+        ]
+        return Playlist(
+            playlist_info=self.playlist_info,
+            playlist_tracks=playlist_tracks,
+        )
+
+    def _ranked_tracks(self) -> List[PlaylistTrack]:
+        """Get the tracks with ranks. They are ranked again if any of them has no
+        rank.
+        """
+        if all(
+            playlist_track.rank is not None
+            for playlist_track in self.playlist_tracks
+        ):
+            return self.playlist_tracks
+        return self.rebalance().playlist_tracks
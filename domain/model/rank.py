@@ -0,0 +1,84 @@
+from typing import List, Optional
+
+# a rank is the digits after the point of a base 36 fraction between 0 and 1 without
+# trailing zeros, so ranks sort in the same order as strings and as numbers. Only
+# digits and lowercase letters are used so that a case-insensitive collation of
+# the database keeps the order.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+# ranks given at once have this number of digits, and a rank appended after
+# another one is RANK_STEP larger, so it keeps the same length for many appends
+RANK_WIDTH = 8
+RANK_STEP = BASE ** 4
+# ranks longer than this are given again by rebalance
+MAX_RANK_LENGTH = 12
+
+
+def _to_rank(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """Get a rank between two ranks
+
+    Args:
+        before (Optional[str]): rank to be after. None means the start.
+        after (Optional[str]): rank to be before. None means the end.
+
+    Returns:
+        str: rank larger than before and smaller than after
+    """
+    if before is not None and after is None:
+        # appending is the most frequent case, so the rank is kept short by adding
+        # RANK_STEP as long as it fits in RANK_WIDTH digits
+        width = max(len(before), RANK_WIDTH)
+        value = int(before.ljust(width, "0"), BASE) + RANK_STEP
+        if len(before) <= RANK_WIDTH and value < BASE ** width:
+            return _to_rank(value, width)
+
+    return _midpoint(before or "", after)
+
+
+def _midpoint(before: str, after: Optional[str]) -> str:
+    """Get the shortest fraction between before and after, where missing digits of
+    before are zeros and after None means 1
+    """
+    if after is not None:
+        # the common prefix is kept as it is
+        idx = 0
+        while idx < len(after) and before.ljust(idx + 1, "0")[idx] == after[idx]:
+            idx += 1
+        if idx > 0:
+            return after[:idx] + _midpoint(before[idx:], after[idx:])
+
+    digit_before = DIGITS.index(before[0]) if before != "" else 0
+    digit_after = DIGITS.index(after[0]) if after is not None else BASE
+    if digit_after - digit_before > 1:
+        return DIGITS[(digit_before + digit_after + 1) // 2]
+
+    # the first digits are adjacent
+    if after is not None and len(after) > 1:
+        return after[0]
+    return DIGITS[digit_before] + _midpoint(before[1:], None)
+
+
+def spread_ranks(size: int) -> List[str]:
+    """Get evenly spaced ranks in ascending order
+
+    Args:
+        size (int): number of ranks
+
+    Returns:
+        List[str]: ranks of RANK_WIDTH digits at most, RANK_STEP apart as far as
+            possible
+    """
+    step = min(RANK_STEP, BASE ** RANK_WIDTH // (size + 1))
+    return [_to_rank(step * idx, RANK_WIDTH) for idx in range(1, size + 1)]
+
+
+def needs_rebalance(ranks: List[str]) -> bool:
+    return any(len(rank) > MAX_RANK_LENGTH for rank in ranks)
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RankingPayload:
+    body: bytes
+    etag: str
+    ttl: float
+    content_encoding: Optional[str] = None
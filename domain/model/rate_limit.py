@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+import threading
+from typing import Iterator
+
+# priorities of requests to Spotify. Background work such as rebuilding the
+# ranking leaves some of the rate limit to requests of users.
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_context = threading.local()
+
+
+class SpotifyRateLimitError(RuntimeError):
+    """Raised when a request to Spotify is shed because of the rate limit."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"spotify rate limit exceeded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@contextmanager
+def priority(name: str) -> Iterator[None]:
+    """Run the requests to Spotify made in this block with the given priority
+
+    Args:
+        name (str): INTERACTIVE or BACKGROUND
+    """
+    previous = current_priority()
+    _context.priority = name
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+def current_priority() -> str:
+    return getattr(_context, "priority", INTERACTIVE)
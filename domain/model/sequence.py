@@ -0,0 +1,155 @@
+import math
+import time
+from typing import List
+
+import numpy as np
+
+from domain.model.track import Track
+
+# a change of tempo by 6% costs as much as a step on the Camelot wheel
+TEMPO_STEP = 0.06
+# switching to half or double time costs as much as a step on the Camelot wheel
+HALF_TIME_COST = 1.0
+# cost of a transition from or to a track whose key or tempo is unknown
+UNKNOWN_COST = 1.0
+# 2-opt stops improving the order after this time in seconds
+TIME_BUDGET = 0.3
+# the cost matrices grow with the square of the number of tracks, so larger
+# playlists are not sequenced
+MAX_SEQUENCE_TRACKS = 2000
+
+
+class TooManyTracksError(ValueError):
+    """Raised when more than MAX_SEQUENCE_TRACKS tracks are to be sequenced."""
+
+    def __init__(self, num_tracks: int) -> None:
+        super().__init__(f"too many tracks to sequence: {num_tracks}")
+        self.num_tracks = num_tracks
+
+
+def _key_costs() -> np.ndarray:
+    """Steps on the Camelot wheel between the 24 keys, where the index of a key
+    is its number - 1 for minor and its number + 11 for major and the index 24 is
+    an unknown key
+    """
+    numbers = np.arange(24) % 12
+    steps = np.abs(numbers[:, None] - numbers[None, :])
+    modes = np.arange(24) // 12
+    costs = np.full((25, 25), UNKNOWN_COST, dtype=np.float32)
+    costs[:24, :24] = np.minimum(steps, 12 - steps)
+    costs[:24, :24] += modes[:, None] != modes[None, :]
+    return costs
+
+
+_KEY_COSTS = _key_costs()
+
+
+def _code(track: Track) -> int:
+    camelot = track.camelot
+    if camelot is None:
+        return 24
+    return camelot.number - 1 + (12 if camelot.letter == "B" else 0)
+
+
+def transition_costs(tracks: List[Track]) -> np.ndarray:
+    """Build the costs of playing each track right after another one
+
+    The cost is the number of steps on the Camelot wheel plus the change of tempo
+    in units of TEMPO_STEP, where half time or double time is allowed at the cost
+    of HALF_TIME_COST.
+
+    Args:
+        tracks (List[Track]): Track objects
+
+    Returns:
+        np.ndarray: symmetric float32 array in the shape of (len(tracks),
+            len(tracks)) with zeros on the diagonal
+    """
+    bpm = np.array([track.bpm for track in tracks], dtype=np.float32)
+    has_tempo = bpm > 0
+    codes = np.array([_code(track) for track in tracks], dtype=np.int64)
+
+    # the change of tempo is measured in octaves, where half time is -1, and the
+    # matrix is updated in place since it is the largest allocation here
+    step = math.log2(1 + TEMPO_STEP)
+    octaves = np.log2(np.where(has_tempo, bpm, 1)).astype(np.float32)
+    costs = np.subtract.outer(octaves, octaves)
+    np.abs(costs, out=costs)
+    half_time = costs - 1
+    np.abs(half_time, out=half_time)
+    half_time += HALF_TIME_COST * step
+    np.minimum(costs, half_time, out=costs)
+    del half_time
+    costs /= step
+    costs[~has_tempo, :] = UNKNOWN_COST
+    costs[:, ~has_tempo] = UNKNOWN_COST
+
+    costs += _KEY_COSTS[codes][:, codes]
+    np.fill_diagonal(costs, 0)
+    return costs
+
+
+def sequence(tracks: List[Track], time_budget: float = TIME_BUDGET) -> List[int]:
+    """Order tracks so that each transition keeps the tempo and the key as close
+    as possible.
+
+    The order is built greedily from the first track by choosing the cheapest next
+    one, and then improved by 2-opt, which reverses a segment when it makes the
+    transitions at both ends cheaper, until no reversal helps or the time budget
+    runs out. The first track stays at the top.
+
+    Args:
+        tracks (List[Track]): Track objects in the current order
+        time_budget (float): seconds spent on 2-opt at most
+
+    Returns:
+        List[int]: indices of tracks in the new order
+
+    Raises:
+        TooManyTracksError: if there are more than MAX_SEQUENCE_TRACKS tracks
+    """
+    size = len(tracks)
+    if size > MAX_SEQUENCE_TRACKS:
+        raise TooManyTracksError(size)
+    if size <= 2:
+        return list(range(size))
+
+    costs = transition_costs(tracks)
+
+    order = np.empty(size, dtype=np.int64)
+    order[0] = 0
+    visited = np.zeros(size, dtype=bool)
+    visited[0] = True
+    for idx in range(1, size):
+        row = np.where(visited, np.inf, costs[order[idx - 1]])
+        order[idx] = np.argmin(row)
+        visited[order[idx]] = True
+
+    # an extra node at the end costs nothing from any track, so that the last track
+    # can be changed by reversing a segment in the same way as the others
+    costs = np.pad(costs, ((0, 1), (0, 1)))
+    path = np.append(order, size)
+    deadline = time.perf_counter() + time_budget
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(size - 1):
+            # reversing path[i + 1:j + 1] replaces the transitions
+            # (path[i], path[i + 1]) and (path[j], path[j + 1])
+            # with (path[i], path[j]) and (path[i + 1], path[j + 1])
+            a, b = path[i], path[i + 1]
+            js = path[i + 2:]
+            nexts = path[i + 3:]
+            delta = costs[a, js[:-1]] + costs[b, nexts] \
+                - costs[a, b] - costs[js[:-1], nexts]
+            if len(delta) == 0:
+                continue
+
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-6:
+                path[i + 1:i + j + 3] = path[i + 1:i + j + 3][::-1].copy()
+                improved = True
+            if time.perf_counter() > deadline:
+                break
+
+    return path[:-1].tolist()
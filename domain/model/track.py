@@ -1,5 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
+
+from domain.model.camelot import Camelot
 
 
 @dataclass(frozen=True)
@@ -16,11 +19,18 @@ class Track:
     mode: int
     preview_url: str
 
+    @property
+    def camelot(self) -> Optional[Camelot]:
+        return Camelot.from_key(self.key, self.mode)
+
 
 @dataclass(frozen=True)
 class PlaylistTrack:
     id: str
+    # position in the playlist from 1
     order: int
     track: Track
     created_at: datetime
     updated_at: datetime
+    # key to sort tracks in the playlist, which is None until the track is ranked
+    rank: Optional[str] = None
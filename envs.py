@@ -1,8 +1,19 @@
 import os
+from typing import Dict
 
 from injector import singleton
 
 
+# spotify playlists of the charts served by /api/v1/ranking?chart=<name>
+DEFAULT_RANKING_CHARTS = ",".join([
+    "global:37i9dQZEVXbMDoHDwVN2tF",
+    "global-viral:37i9dQZEVXbLiRSasKsNU9",
+    "jp:37i9dQZEVXbKXQ4mDTEBXq",
+    "us:37i9dQZEVXbLRQDuF5jeBp",
+    "gb:37i9dQZEVXbLnolsZ8PSNw",
+])
+
+
 @singleton
 class Envs:
     CLIENT_ID: str = os.environ["CLIENT_ID"]
@@ -15,3 +26,96 @@ class Envs:
     MYSQL_USER: str = os.environ["MYSQL_USER"]
     MYSQL_PASSWORD: str = os.environ["MYSQL_PASSWORD"]
     MYSQL_DATABASE: str = os.environ["MYSQL_DATABASE"]
+
+    SPOTIFY_API_URL: str = os.environ.get(
+        "SPOTIFY_API_URL", "https://api.spotify.com/v1"
+    )
+    SPOTIFY_ACCOUNTS_URL: str = os.environ.get(
+        "SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com"
+    )
+    SPOTIFY_TIMEOUT: float = float(os.environ.get("SPOTIFY_TIMEOUT", 10))
+    SPOTIFY_POOL_CONNECTIONS: int = int(os.environ.get("SPOTIFY_POOL_CONNECTIONS", 2))
+    # keep SPOTIFY_POOL_MAXSIZE >= SPOTIFY_MAX_CONCURRENCY to reuse all connections
+    SPOTIFY_POOL_MAXSIZE: int = int(os.environ.get("SPOTIFY_POOL_MAXSIZE", 16))
+    SPOTIFY_POOL_BLOCK: bool = os.environ.get("SPOTIFY_POOL_BLOCK", "0") == "1"
+    SPOTIFY_KEEP_ALIVE: bool = os.environ.get("SPOTIFY_KEEP_ALIVE", "1") == "1"
+    SPOTIFY_CONCURRENT_FETCH: bool = (
+        os.environ.get("SPOTIFY_CONCURRENT_FETCH", "1") == "1"
+    )
+    SPOTIFY_MAX_CONCURRENCY: int = int(os.environ.get("SPOTIFY_MAX_CONCURRENCY", 16))
+    # audio features of a track never change and they are cached for 30 days
+    FEATURE_CACHE_TTL: int = int(os.environ.get("FEATURE_CACHE_TTL", 60 * 60 * 24 * 30))
+    TRACK_CACHE_MAX_SIZE: int = int(os.environ.get("TRACK_CACHE_MAX_SIZE", 2048))
+    TRACK_CACHE_LOCAL_TTL: int = int(os.environ.get("TRACK_CACHE_LOCAL_TTL", 60 * 10))
+    TRACK_CACHE_REDIS_TTL: int = int(
+        os.environ.get("TRACK_CACHE_REDIS_TTL", 60 * 60 * 24)
+    )
+    # "lru" or "fifo"
+    TRACK_CACHE_EVICTION: str = os.environ.get("TRACK_CACHE_EVICTION", "lru")
+    # tracks are kept in the track table and refreshed when older than max age
+    TRACK_CATALOG: bool = os.environ.get("TRACK_CATALOG", "1") == "1"
+    TRACK_CATALOG_MAX_AGE: int = int(
+        os.environ.get("TRACK_CATALOG_MAX_AGE", 60 * 60 * 24 * 30)
+    )
+    # tracks stored by other workers are loaded to the feature index at this interval
+    FEATURE_INDEX_SYNC_INTERVAL: int = int(
+        os.environ.get("FEATURE_INDEX_SYNC_INTERVAL", 60 * 10)
+    )
+    SEARCH_CACHE_TTL: int = int(os.environ.get("SEARCH_CACHE_TTL", 60 * 10))
+    SEARCH_CACHE_NEGATIVE_TTL: int = int(
+        os.environ.get("SEARCH_CACHE_NEGATIVE_TTL", 60)
+    )
+    SPOTIFY_SINGLEFLIGHT_REDIS: bool = (
+        os.environ.get("SPOTIFY_SINGLEFLIGHT_REDIS", "0") == "1"
+    )
+    SPOTIFY_SINGLEFLIGHT_LOCK_TIMEOUT: float = float(
+        os.environ.get("SPOTIFY_SINGLEFLIGHT_LOCK_TIMEOUT", 10)
+    )
+    SPOTIFY_SINGLEFLIGHT_RESULT_TTL: int = int(
+        os.environ.get("SPOTIFY_SINGLEFLIGHT_RESULT_TTL", 5)
+    )
+    SPOTIFY_RATE_LIMIT: bool = os.environ.get("SPOTIFY_RATE_LIMIT", "0") == "1"
+    SPOTIFY_RATE_LIMIT_RATE: float = float(
+        os.environ.get("SPOTIFY_RATE_LIMIT_RATE", 10)
+    )
+    SPOTIFY_RATE_LIMIT_CAPACITY: int = int(
+        os.environ.get("SPOTIFY_RATE_LIMIT_CAPACITY", 30)
+    )
+    # tokens which background requests leave for interactive requests
+    SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE: int = int(
+        os.environ.get("SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE", 10)
+    )
+    SPOTIFY_RATE_LIMIT_INTERACTIVE_MAX_WAIT: float = float(
+        os.environ.get("SPOTIFY_RATE_LIMIT_INTERACTIVE_MAX_WAIT", 2)
+    )
+    SPOTIFY_RATE_LIMIT_BACKGROUND_MAX_WAIT: float = float(
+        os.environ.get("SPOTIFY_RATE_LIMIT_BACKGROUND_MAX_WAIT", 10)
+    )
+    SPOTIFY_RATE_LIMIT_MAX_RETRIES: int = int(
+        os.environ.get("SPOTIFY_RATE_LIMIT_MAX_RETRIES", 1)
+    )
+    # use AsyncTrackRepositoryImpl instead of TrackRepositoryImpl
+    SPOTIFY_ASYNC: bool = os.environ.get("SPOTIFY_ASYNC", "0") == "1"
+    ACCESS_TOKEN_EXPIRY_MARGIN: int = int(
+        os.environ.get("ACCESS_TOKEN_EXPIRY_MARGIN", 300)
+    )
+    ACCESS_TOKEN_LOCK_TIMEOUT: float = float(
+        os.environ.get("ACCESS_TOKEN_LOCK_TIMEOUT", 10)
+    )
+    ACCESS_TOKEN_RENEWER: bool = os.environ.get("ACCESS_TOKEN_RENEWER", "1") == "1"
+    ACCESS_TOKEN_RENEW_AHEAD: int = int(
+        os.environ.get("ACCESS_TOKEN_RENEW_AHEAD", 300)
+    )
+    RANKING_MAX_STALENESS: int = int(
+        os.environ.get("RANKING_MAX_STALENESS", 60 * 60 * 24)
+    )
+    RANKING_LOCK_TIMEOUT: float = float(os.environ.get("RANKING_LOCK_TIMEOUT", 60))
+    # seconds for which the ranking is not rebuilt again after a rebuild fails
+    RANKING_FAILURE_COOLDOWN: float = float(
+        os.environ.get("RANKING_FAILURE_COOLDOWN", 60)
+    )
+    # comma separated <name>:<spotify playlist id>, the first one is the default
+    RANKING_CHARTS: Dict[str, str] = dict(
+        chart.split(":", 1)
+        for chart in os.environ.get("RANKING_CHARTS", DEFAULT_RANKING_CHARTS).split(",")
+    )
@@ -0,0 +1,14 @@
+from injector import inject, singleton
+
+from interface.repository.metrics_repository import MetricsRepository
+from interface.usecase.metrics_usecase import MetricsUsecase
+
+
+@singleton
+class MetricsInteractor(MetricsUsecase):
+    @inject
+    def __init__(self, metrics_repository: MetricsRepository) -> None:
+        self.metrics_repository = metrics_repository
+
+    def get_metrics(self) -> dict:
+        return self.metrics_repository.get_stats()
@@ -5,7 +5,8 @@ import uuid
 
 from injector import inject, singleton
 
-from domain.model.playlist import Playlist, PlaylistInfo
+from domain.model.playlist import Playlist, PlaylistInfo, PlaylistInfoPage
+from domain.model.sequence import MAX_SEQUENCE_TRACKS, TooManyTracksError
 from domain.model.track import PlaylistTrack
 from interface.repository.playlist_repository import PlaylistRepository
 from interface.repository.track_repository import TrackRepository
@@ -39,8 +40,21 @@ class PlaylistInteractor(PlaylistUsecase):
         self.playlist_repository.save_playlist_info(playlist_info)
         return playlist_info
 
-    def get_playlist_infos(self, uid: str) -> List[PlaylistInfo]:
-        return self.playlist_repository.get_playlist_infos(uid)
+    def get_playlist_infos(
+        self,
+        uid: str,
+        sort: str,
+        descending: bool,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Optional[PlaylistInfoPage]:
+        return self.playlist_repository.get_playlist_infos(
+            uid,
+            sort,
+            descending,
+            limit,
+            cursor,
+        )
 
     def get_playlist(self, plyalist_id: str, uid: str) -> Optional[Playlist]:
         playlist = self.playlist_repository.get_playlist(plyalist_id)
@@ -69,25 +83,26 @@ class PlaylistInteractor(PlaylistUsecase):
 
     def delete_track(
         self, playlist_id: str, playlist_track_id: str, uid: str
-    ) -> Optional[Playlist]:
-        playlist = self.playlist_repository.get_playlist(playlist_id)
-        if playlist is None:
+    ) -> Optional[PlaylistInfo]:
+        # the tracks are not needed to check the owner
+        playlist_info = self.playlist_repository.get_playlist_info(playlist_id)
+        if playlist_info is None:
             self.logger.info("no playlist with the playlist_id")
             return None
 
-        if playlist.playlist_info.uid != uid:
+        if playlist_info.uid != uid:
             self.logger.info("specified playlist is not created by the user")
             return None
 
-        playlist_track = self.playlist_repository.get_playlist_track(playlist_track_id)
-        if playlist_track is None:
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            playlist_id,
+            playlist_track_id,
+        )
+        if playlist_info is None:
             self.logger.info("no playlist_track with the playlist_track_id")
             return None
 
-        playlist = playlist.delete(playlist_track)
-        self.playlist_repository.save_playlist(playlist)
-
-        return playlist
+        return playlist_info
 
     def patch_playlist_info(
         self,
@@ -125,12 +140,13 @@ class PlaylistInteractor(PlaylistUsecase):
         uid: str,
         spotify_id: str,
     ) -> Optional[Playlist]:
-        playlist = self.playlist_repository.get_playlist(playlist_id)
-        if playlist is None:
+        # only the new track is fetched, and before the playlist is locked
+        playlist_info = self.playlist_repository.get_playlist_info(playlist_id)
+        if playlist_info is None:
             self.logger.info("no playlist with the playlist id")
             return None
 
-        if playlist.playlist_info.uid != uid:
+        if playlist_info.uid != uid:
             self.logger.info("specified playlist is not created by the user")
             return None
 
@@ -139,10 +155,15 @@ class PlaylistInteractor(PlaylistUsecase):
             self.logger.info("no track with the spotify id")
             return None
 
-        playlist = playlist.add(track)
-        self.playlist_repository.save_playlist(playlist)
+        playlist_track = self.playlist_repository.add_playlist_track(playlist_id, track)
+        if playlist_track is None:
+            self.logger.info("no playlist with the playlist id")
+            return None
 
-        return playlist
+        # the playlist is read after the insert only from the caches and the track
+        # table, where the new track is already stored above, so Spotify is not
+        # requested for the other tracks
+        return self.playlist_repository.get_playlist(playlist_id, stored_only=True)
 
     def patch_track_order(
         self, playlist_id: str, order_from: int, order_to: int, uid: str
@@ -163,3 +184,29 @@ class PlaylistInteractor(PlaylistUsecase):
 
         self.playlist_repository.save_playlist(playlist)
         return playlist.playlist_tracks
+
+    def auto_sequence(
+        self,
+        playlist_id: str,
+        uid: str,
+    ) -> Optional[List[PlaylistTrack]]:
+        # the number of tracks is checked before they are fetched
+        playlist_info = self.playlist_repository.get_playlist_info(playlist_id)
+        if playlist_info is None:
+            self.logger.info("no playlist with the playlist id")
+            return None
+
+        if playlist_info.uid != uid:
+            self.logger.info("specified playlist is not created by the user")
+            return None
+
+        if playlist_info.num_tracks > MAX_SEQUENCE_TRACKS:
+            raise TooManyTracksError(playlist_info.num_tracks)
+
+        playlist = Playlist(
+            playlist_info=playlist_info,
+            playlist_tracks=self.playlist_repository.get_playlist_tracks(playlist_id),
+        )
+        playlist = playlist.auto_sequence()
+        self.playlist_repository.save_track_orders(playlist)
+        return playlist.playlist_tracks
@@ -1,13 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+import json
 import time
+from typing import List, Optional
 
 from injector import inject, singleton
 from logging import Logger
-import requests
 
+from domain.model.ranking import RankingPayload
+from domain.model.rate_limit import BACKGROUND, priority, SpotifyRateLimitError
 from envs import Envs
-from interface.repository.access_token_repository import AccessTokenRepository
 from interface.usecase.ranking_usecase import RankingUsecase
 from interface.repository.ranking_repository import RankingRepository
+from interface.repository.track_repository import TrackRepository
 
 
 @singleton
@@ -16,89 +21,153 @@ class RankingInteractor(RankingUsecase):
     def __init__(
         self,
         env: Envs,
-        access_token_repository: AccessTokenRepository,
         ranking_repository: RankingRepository,
         logger: Logger,
+        track_repository: TrackRepository,
     ) -> None:
         self.env = env
-        self.access_token_repository = access_token_repository
         self.ranking_repository = ranking_repository
         self.logger = logger
-
-    def get_ranking(self) -> list:
-        if self.ranking_repository.exist():
-            ranking_ttl = self.ranking_repository.get_ttl()
-
-            # check if ranking should be updated
-            if ranking_ttl > time.time():
-                ranking = self.ranking_repository.get()
-            else:
-                self.logger.info("ranking is expired and create new one.")
-                ranking = self._create_ranking()
-
-        else:
-            self.logger.info("ranking doesn't exist and create new one.")
-            ranking = self._create_ranking()
-
-        return ranking
-
-    def _create_ranking(self) -> list:
-        access_token = self.access_token_repository.get_access_token()
-
-        global_charts_id = "37i9dQZEVXbMDoHDwVN2tF"
-        response = requests.get(
-            f"https://api.spotify.com/v1/playlists/{global_charts_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
+        self.track_repository = track_repository
+        self.charts = env.RANKING_CHARTS
+        self.default_chart = next(iter(self.charts))
+        # an expired ranking is served for this many seconds while it is rebuilt
+        self.max_staleness = env.RANKING_MAX_STALENESS
+        self.lock_timeout = env.RANKING_LOCK_TIMEOUT
+        # a failed rebuild is not retried for this many seconds, so that requests
+        # do not keep sending requests to Spotify during its outage
+        self.failure_cooldown = env.RANKING_FAILURE_COOLDOWN
+        self.executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="ranking",
         )
-        body = response.json()
 
-        if response.status_code != requests.codes.ok:
-            message = f"cannot fetch ranking correctly: {body}"
-            self.logger.error(message)
-            raise RuntimeError(message)
+    def get_charts(self) -> List[str]:
+        return list(self.charts)
 
-        items = body["tracks"]["items"]
+    def get_ranking(self, chart: Optional[str] = None) -> list:
+        payload = self.get_ranking_payload(False, chart)
+        if payload is None:
+            return []
+        return json.loads(payload.body)
 
-        response = requests.get(
-            "https://api.spotify.com/v1/audio-features",
-            headers={"Authorization": f"Bearer {access_token}"},
-            params={
-                "ids": ",".join(map(lambda item: item["track"]["id"], items)),
-            },
-        )
-        body = response.json()
-
-        if response.status_code != requests.codes.ok:
-            message = f"cannot fetch ranking features correctly: {body}"
-            self.logger.error(message)
-            raise RuntimeError(message)
-
-        features = body["audio_features"]
-
-        ranking = []
-        for idx, item in enumerate(items):
-            spotify_id = item["track"]["id"]
-            song_name = item["track"]["name"]
-            artist = item["track"]["artists"][0]["name"]
-            image_url = item["track"]["album"]["images"][0]["url"]
-            album_name = item["track"]["album"]["name"]
-            preview_url = item["track"]["preview_url"]
-
-            ranking.append({
-                "spotify_id": spotify_id,
-                "song_name": song_name,
-                "album_name": album_name,
-                "artist": artist,
-                "bpm": features[idx]["tempo"],
-                "key": features[idx]["key"],
-                "mode": features[idx]["mode"],
-                "image_url": image_url,
-                "preview_url": preview_url,
-                "danceability": features[idx]["danceability"],
-                "energy": features[idx]["energy"],
-            })
+    def get_ranking_payload(
+        self,
+        compressed: bool,
+        chart: Optional[str] = None,
+    ) -> Optional[RankingPayload]:
+        chart = chart or self.default_chart
+        if chart not in self.charts:
+            raise ValueError(f"unknown chart: {chart}")
+
+        payload = self.ranking_repository.get_payload(compressed, chart)
+        if payload is None:
+            if self.ranking_repository.is_rebuild_failed(chart):
+                self.logger.info(f"ranking of {chart} failed to be created recently.")
+                return None
+
+            self.logger.info(f"ranking of {chart} doesn't exist and create new one.")
+            self._create_ranking_with_lock(chart)
+            # the ranking may have been evicted or failed to be stored
+            return self.ranking_repository.get_payload(compressed, chart)
+
+        # check if ranking should be updated
+        if payload.ttl > time.time():
+            return payload
+
+        # the stale ranking is served until the cooldown of a failed rebuild ends
+        if self.ranking_repository.is_rebuild_failed(chart):
+            return payload
+
+        if time.time() - payload.ttl > self.max_staleness:
+            self.logger.info(f"ranking of {chart} is too old and create new one.")
+            self._create_ranking_with_lock(chart)
+            return self.ranking_repository.get_payload(compressed, chart)
+
+        self.logger.info(f"ranking of {chart} is expired and rebuild it in background.")
+        self._rebuild_in_background(chart)
+        return payload
+
+    def refresh_rankings(self) -> List[str]:
+        """Rebuild the rankings of all charts which no other worker is rebuilding.
+        The charts are fetched concurrently.
+
+        Returns:
+            List[str]: names of the rebuilt charts
+        """
+        tokens = {}
+        for chart in self.charts:
+            token = self.ranking_repository.acquire_lock(self.lock_timeout, chart)
+            if token is not None:
+                tokens[chart] = token
+
+        try:
+            if len(tokens) > 0:
+                with priority(BACKGROUND):
+                    self._create_rankings(list(tokens))
+        finally:
+            for chart, token in tokens.items():
+                self.ranking_repository.release_lock(token, chart)
+
+        return list(tokens)
+
+    def _rebuild_in_background(self, chart: str) -> None:
+        # only the worker which takes the lock rebuilds the ranking
+        token = self.ranking_repository.acquire_lock(self.lock_timeout, chart)
+        if token is None:
+            return
+
+        self.executor.submit(self._rebuild, chart, token)
+
+    def _rebuild(self, chart: str, token: str) -> None:
+        try:
+            # rebuilding the ranking gives way to searches of users
+            with priority(BACKGROUND):
+                self._create_rankings([chart])
+        except SpotifyRateLimitError as e:
+            self.logger.warning(f"keep the expired ranking of {chart}: {e}")
+            self.ranking_repository.set_rebuild_failed(self.failure_cooldown, chart)
+        except Exception as e:
+            self.logger.error(f"failed to rebuild ranking of {chart}: {e}")
+            self.ranking_repository.set_rebuild_failed(self.failure_cooldown, chart)
+        finally:
+            self.ranking_repository.release_lock(token, chart)
+
+    def _create_ranking_with_lock(self, chart: str) -> None:
+        """Create ranking while holding the lock, or wait for the ranking created
+        by another worker holding it.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            token = self.ranking_repository.acquire_lock(self.lock_timeout, chart)
+            if token is not None:
+                try:
+                    self._create_rankings([chart])
+                    return
+                except Exception:
+                    self.ranking_repository.set_rebuild_failed(
+                        self.failure_cooldown,
+                        chart,
+                    )
+                    raise
+                finally:
+                    self.ranking_repository.release_lock(token, chart)
+
+            time.sleep(0.1)
+            payload = self.ranking_repository.get_payload(False, chart)
+            if payload is not None and payload.ttl > time.time():
+                return
+
+            if time.monotonic() > deadline:
+                self._create_rankings([chart])
+                return
+
+    def _create_rankings(self, charts: List[str]) -> None:
+        playlist_ids = [self.charts[chart] for chart in charts]
+        tracks_list = self.track_repository.get_tracks_by_playlist_ids(playlist_ids)
 
         # expire cache after 6 hours
         ttl = time.time() + 60 * 60 * 6
-        self.ranking_repository.create(ranking, ttl)
-        return ranking
+        for chart, tracks in zip(charts, tracks_list):
+            ranking = [asdict(track) for track in tracks]
+            self.ranking_repository.create(ranking, ttl, chart)
@@ -1,7 +1,8 @@
 from injector import inject, singleton
-from typing import List
+from typing import List, Optional
 
 from domain.model.track import Track
+from interface.repository.search_result_repository import SearchResultRepository
 from interface.repository.track_repository import TrackRepository
 from interface.usecase.track_usecase import TrackUsecase
 
@@ -12,8 +13,50 @@ class TrackInteractor(TrackUsecase):
     def __init__(
         self,
         track_repository: TrackRepository,
+        search_result_repository: SearchResultRepository,
     ) -> None:
         self.track_repository = track_repository
+        self.search_result_repository = search_result_repository
 
     def get_tracks_by_query(self, query: str) -> List[Track]:
-        return self.track_repository.get_tracks_by_query(query)
+        spotify_ids = self.search_result_repository.get(query)
+        if spotify_ids is not None:
+            # hydrate the cached result from the track cache
+            tracks = self.track_repository.get_tracks_by_ids(spotify_ids)
+            return [track for track in tracks if track is not None]
+
+        tracks = self.track_repository.get_tracks_by_query(query)
+        self.search_result_repository.save(
+            query,
+            [track.spotify_id for track in tracks],
+        )
+        return tracks
+
+    def get_tracks_by_bpm(
+        self,
+        bpm_min: float,
+        bpm_max: float,
+        offset: int,
+        limit: int,
+    ) -> List[Track]:
+        return self.track_repository.get_tracks_by_bpm(
+            bpm_min,
+            bpm_max,
+            offset,
+            limit,
+        )
+
+    def get_similar_tracks(self, track_id: str, limit: int) -> Optional[List[Track]]:
+        return self.track_repository.get_similar_tracks(track_id, limit)
+
+    def get_compatible_tracks(
+        self,
+        track_id: str,
+        tolerance: float,
+        limit: int,
+    ) -> Optional[List[Track]]:
+        return self.track_repository.get_compatible_tracks(
+            track_id,
+            tolerance,
+            limit,
+        )
@@ -10,3 +10,13 @@ class AccessTokenRepository(metaclass=ABCMeta):
             str: spotify access token
         """
         pass
+
+    @abstractmethod
+    def invalidate_access_token(self, access_token: str) -> None:
+        """Discard the access token rejected by Spotify so that the next call of
+        get_access_token gets a new one
+
+        Args:
+            access_token (str): access token rejected by Spotify
+        """
+        pass
@@ -0,0 +1,12 @@
+from abc import ABCMeta, abstractmethod
+
+
+class MetricsRepository(metaclass=ABCMeta):
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """Get statistics of the clients, caches and indexes of this worker
+
+        Returns:
+            dict: statistics keyed by component name
+        """
+        pass
@@ -1,17 +1,19 @@
 from abc import ABCMeta, abstractmethod
 from typing import List, Optional
 
-from domain.model.playlist import Playlist, PlaylistInfo
-from domain.model.track import PlaylistTrack
+from domain.model.playlist import Playlist, PlaylistInfo, PlaylistInfoPage
+from domain.model.track import PlaylistTrack, Track
 
 
 class PlaylistRepository(metaclass=ABCMeta):
     @abstractmethod
-    def get_playlist(playlist_id: str) -> Optional[Playlist]:
+    def get_playlist(playlist_id: str, stored_only: bool = False) -> Optional[Playlist]:
         """Get Playlist object with the playlist_id.
 
         Args:
             playlist_id (str): playlist id
+            stored_only (bool): if True, tracks are read only from the caches and
+                the track table, and a track which is not stored there is None
 
         Returns:
             Optional[Playlist]: Playlist object if it exists, else None.
@@ -19,15 +21,29 @@ class PlaylistRepository(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_playlist_infos(self, uid: str) -> List[PlaylistInfo]:
-        """Get list of PlaylistInfo objects of the user with the uid.
-        If no playlist exists, return the list with no element.
+    def get_playlist_infos(
+        self,
+        uid: str,
+        sort: str,
+        descending: bool,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Optional[PlaylistInfoPage]:
+        """Get a page of PlaylistInfo objects of the user with the uid.
+        If no playlist exists, return the page with no element.
 
         Args:
             uid (str): user id
+            sort (str): "updated_at", "name" or "num_tracks" to sort playlists by
+            descending (bool): sort in descending order if True
+            limit (Optional[int]): maximum number of playlists in the page. All
+                playlists are in one page if None.
+            cursor (Optional[str]): next_cursor of the previous page. The first
+                page is returned if None.
 
         Returns:
-            List[PlaylistInfo]: list of PlaylistInfo objects
+            Optional[PlaylistInfoPage]: page of PlaylistInfo objects if the cursor
+                is valid for the sort, else None.
         """
         pass
 
@@ -56,12 +72,17 @@ class PlaylistRepository(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def get_playlist_tracks(playlist_id: str) -> List[PlaylistTrack]:
+    def get_playlist_tracks(
+        playlist_id: str,
+        stored_only: bool = False,
+    ) -> List[PlaylistTrack]:
         """Get list of PlaylistTrack objects of the playlist with the specified playlist
         If no playlist_track exists, return the list with no element.
 
         Args:
             playlist_id (str): playlist id
+            stored_only (bool): if True, tracks are read only from the caches and
+                the track table, and a track which is not stored there is None
 
         Returns:
             List[PlaylistTrack]: list of PlaylistTrack objects.
@@ -77,6 +98,16 @@ class PlaylistRepository(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def save_track_orders(self, playlist: Playlist) -> None:
+        """Update the ranks of the tracks and the playlist info of the playlist
+        in bulk. Tracks are neither added nor removed.
+
+        Args:
+            playlist (Playlist): Playlist object whose tracks are reordered
+        """
+        pass
+
     @abstractmethod
     def save_playlist_info(self, playlist_info: PlaylistInfo) -> None:
         """Upsert playlist info such as playlist name or
@@ -88,6 +119,47 @@ class PlaylistRepository(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def add_playlist_track(
+        self,
+        playlist_id: str,
+        track: Track,
+    ) -> Optional[PlaylistTrack]:
+        """Append the track to the end of the playlist and update num_tracks of the
+        playlist in one transaction. The other tracks are neither fetched nor
+        written.
+
+        Args:
+            playlist_id (str): playlist id
+            track (Track): Track object to add
+
+        Returns:
+            Optional[PlaylistTrack]: added PlaylistTrack object if the playlist
+                exists, else None.
+        """
+        pass
+
+    @abstractmethod
+    def delete_playlist_track(
+        self,
+        playlist_id: str,
+        playlist_track_id: str,
+    ) -> Optional[PlaylistInfo]:
+        """Delete the playlist_track from the playlist and update num_tracks and
+        image_url of the playlist in one transaction. When the image of the new
+        first track is not stored with the tracks, the track is looked up after the
+        transaction and image_url is kept as it is if the lookup fails.
+
+        Args:
+            playlist_id (str): playlist id
+            playlist_track_id (str): playlist track id
+
+        Returns:
+            Optional[PlaylistInfo]: updated PlaylistInfo object if the playlist_track
+                exists in the playlist, else None.
+        """
+        pass
+
     @abstractmethod
     def delete_playlist(self, playlist_id: str) -> None:
         """Delete the playlist with the specified playlist_id
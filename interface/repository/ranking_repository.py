@@ -1,15 +1,79 @@
 from abc import ABCMeta, abstractmethod
+from typing import Optional
+
+from domain.model.ranking import RankingPayload
 
 
 class RankingRepository(metaclass=ABCMeta):
     @abstractmethod
-    def create(self, ranking: list, ttl: float) -> None:
+    def create(self, ranking: list, ttl: float, chart: str = "global") -> None:
+        pass
+
+    @abstractmethod
+    def exist(self, chart: str = "global") -> bool:
+        pass
+
+    @abstractmethod
+    def get(self, chart: str = "global") -> dict:
+        pass
+
+    @abstractmethod
+    def get_ttl(self, chart: str = "global") -> float:
+        pass
+
+    @abstractmethod
+    def get_payload(
+        self,
+        compressed: bool,
+        chart: str = "global",
+    ) -> Optional[RankingPayload]:
+        """Get the ranking of the chart as the body of a response
+
+        Args:
+            compressed (bool): get gzip compressed body if True
+            chart (str): name of the chart
+
+        Returns:
+            Optional[RankingPayload]: the ranking or None if it does not exist
+        """
+        pass
+
+    @abstractmethod
+    def acquire_lock(self, timeout: float, chart: str = "global") -> Optional[str]:
+        """Take the lock shared by all workers for rebuilding the ranking
+
+        Args:
+            timeout (float): seconds after which the lock is released anyway
+            chart (str): name of the chart
+
+        Returns:
+            Optional[str]: token to release the lock. None if another worker holds
+                the lock.
+        """
         pass
 
     @abstractmethod
-    def exist(self) -> bool:
+    def release_lock(self, token: str, chart: str = "global") -> None:
         pass
 
     @abstractmethod
-    def get(self) -> dict:
+    def set_rebuild_failed(self, cooldown: float, chart: str = "global") -> None:
+        """Record that rebuilding the ranking failed, which is shared by all workers
+
+        Args:
+            cooldown (float): seconds for which the record is kept
+            chart (str): name of the chart
+        """
+        pass
+
+    @abstractmethod
+    def is_rebuild_failed(self, chart: str = "global") -> bool:
+        """Check if rebuilding the ranking failed within the cooldown
+
+        Args:
+            chart (str): name of the chart
+
+        Returns:
+            bool: True if the ranking should not be rebuilt yet
+        """
         pass
@@ -0,0 +1,28 @@
+from abc import ABCMeta, abstractmethod
+from typing import List, Optional
+
+
+class SearchResultRepository(metaclass=ABCMeta):
+    @abstractmethod
+    def get(self, query: str) -> Optional[List[str]]:
+        """Get spotify ids of the cached search result of the query.
+        Queries which differ only in case, width or whitespace share one result.
+
+        Args:
+            query (str): search query
+
+        Returns:
+            Optional[List[str]]: ordered list of spotify ids if the result is cached,
+                else None. The list is empty when the query had no result.
+        """
+        pass
+
+    @abstractmethod
+    def save(self, query: str, spotify_ids: List[str]) -> None:
+        """Cache spotify ids of the search result of the query
+
+        Args:
+            query (str): search query
+            spotify_ids (List[str]): ordered list of spotify ids in the result
+        """
+        pass
@@ -29,6 +29,20 @@ class TrackRepository(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def get_stored_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        """Get list of Track objects with the specified ids from the caches and the
+        track table without requesting Spotify
+
+        Args:
+            track_ids (List[str]): list of track ids
+
+        Returns:
+            List[Optional[Track]]: list of Track objects with the specified ids,
+                where a track which is not stored is None
+        """
+        pass
+
     @abstractmethod
     def get_tracks_by_query(self, query: str) -> List[Track]:
         """Get list of Track objects related to the spiecied query
@@ -40,3 +54,91 @@ class TrackRepository(metaclass=ABCMeta):
             List[Track]: list of Track objects related to the specifed query
         """
         pass
+
+    @abstractmethod
+    def get_tracks_by_bpm(
+        self,
+        bpm_min: float,
+        bpm_max: float,
+        offset: int,
+        limit: int,
+    ) -> List[Track]:
+        """Get list of Track objects whose bpm is in the range among the tracks which
+        have been fetched before. Spotify is not asked.
+
+        Args:
+            bpm_min (float): minimum bpm, inclusive
+            bpm_max (float): maximum bpm, inclusive
+            offset (int): number of tracks to skip
+            limit (int): maximum number of tracks
+
+        Returns:
+            List[Track]: list of Track objects in ascending order of bpm
+        """
+        pass
+
+    @abstractmethod
+    def get_similar_tracks(self, track_id: str, limit: int) -> Optional[List[Track]]:
+        """Get list of Track objects whose bpm, energy, danceability and key are
+        close to the track with the specified id among the tracks which have been
+        fetched before
+
+        Args:
+            track_id (str): track id
+            limit (int): maximum number of tracks
+
+        Returns:
+            Optional[List[Track]]: list of Track objects from the most similar one.
+                None if the track with the specified id does not exist.
+        """
+        pass
+
+    @abstractmethod
+    def get_compatible_tracks(
+        self,
+        track_id: str,
+        tolerance: float,
+        limit: int,
+    ) -> Optional[List[Track]]:
+        """Get list of Track objects which can be mixed harmonically with the track
+        with the specified id among the tracks which have been fetched before.
+        They are in a compatible Camelot key and their tempo is within the
+        tolerance of the tempo, half time or double time of the track.
+
+        Args:
+            track_id (str): track id
+            tolerance (float): tolerance of tempo as a ratio such as 0.06
+            limit (int): maximum number of tracks
+
+        Returns:
+            Optional[List[Track]]: list of Track objects from the closest tempo.
+                None if the track with the specified id does not exist.
+        """
+        pass
+
+    @abstractmethod
+    def get_tracks_by_playlist_id(self, playlist_id: str) -> List[Track]:
+        """Get list of Track objects in the spotify playlist with the specified id
+
+        Args:
+            playlist_id (str): spotify playlist id
+
+        Returns:
+            List[Track]: list of Track objects in the order of the playlist
+        """
+        pass
+
+    @abstractmethod
+    def get_tracks_by_playlist_ids(
+        self,
+        playlist_ids: List[str],
+    ) -> List[List[Track]]:
+        """Get lists of Track objects in the spotify playlists with the specified ids
+
+        Args:
+            playlist_ids (List[str]): spotify playlist ids
+
+        Returns:
+            List[List[Track]]: list of Track objects in the order of each playlist
+        """
+        pass
@@ -0,0 +1,12 @@
+from abc import ABCMeta, abstractmethod
+
+
+class MetricsUsecase(metaclass=ABCMeta):
+    @abstractmethod
+    def get_metrics(self) -> dict:
+        """Get runtime metrics of this worker such as connection pool statistics
+
+        Returns:
+            dict: metrics keyed by component name
+        """
+        pass
@@ -1,7 +1,7 @@
 from abc import ABCMeta, abstractmethod
 from typing import List, Optional
 
-from domain.model.playlist import Playlist, PlaylistInfo
+from domain.model.playlist import Playlist, PlaylistInfo, PlaylistInfoPage
 from domain.model.track import PlaylistTrack
 
 
@@ -18,14 +18,27 @@ class PlaylistUsecase(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_playlist_infos(self, uid: str) -> List[PlaylistInfo]:
-        """Get all playlist infos of the user with the specifed uid
+    def get_playlist_infos(
+        self,
+        uid: str,
+        sort: str,
+        descending: bool,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Optional[PlaylistInfoPage]:
+        """Get a page of playlist infos of the user with the specifed uid
 
         Args:
             uid (str): user id
+            sort (str): "updated_at", "name" or "num_tracks" to sort playlists by
+            descending (bool): sort in descending order if True
+            limit (Optional[int]): maximum number of playlists in the page. All
+                playlists are in one page if None.
+            cursor (Optional[str]): next_cursor of the previous page
 
         Returns:
-            List[PlaylistInfo]: list of PlyalistInfo objects
+            Optional[PlaylistInfoPage]: page of PlyalistInfo objects if the cursor
+                is valid, else None.
         """
         pass
 
@@ -49,7 +62,7 @@ class PlaylistUsecase(metaclass=ABCMeta):
         playlist_id: str,
         playlist_track_id: str,
         uid: str,
-    ) -> Optional[Playlist]:
+    ) -> Optional[PlaylistInfo]:
         """Delete track from specified playlist
 
         Args:
@@ -58,8 +71,9 @@ class PlaylistUsecase(metaclass=ABCMeta):
             uid (str): user id
 
         Returns:
-            Optional[Playlist]: Playlist object if it exists and the playlist is created
-                by the user with the specified uid, else None.
+            Optional[PlaylistInfo]: updated PlaylistInfo object if the track exists
+                in the playlist and the playlist is created by the user with the
+                specified uid, else None.
         """
         pass
 
@@ -94,18 +108,17 @@ class PlaylistUsecase(metaclass=ABCMeta):
         uid: str,
         spotify_id: str,
     ) -> Optional[Playlist]:
-        """Update playlist tracks of the playlist with the specified playlist_id
+        """Add the track to the end of the playlist with the specified playlist_id
 
         Args:
             playlist_id (str): playlist id
             uid (str): user id
-            spotify_id (str): spotify id. if "track" is set to "kind",
-                this value must be specified. Defaults to None.
+            spotify_id (str): spotify id of the track to add
 
         Returns:
-            Optional[Playlist]: Playlist object
-                if it exists and the playlist is created by the user with the specified
-                uid, else None.
+            Optional[Playlist]: Playlist object to which the track is added
+                if the playlist and the track exist and the playlist is created by the
+                user with the specified uid, else None.
         """
         pass
 
@@ -145,3 +158,27 @@ class PlaylistUsecase(metaclass=ABCMeta):
                 and the spcified order is valid range.
         """
         pass
+
+    @abstractmethod
+    def auto_sequence(
+        self,
+        playlist_id: str,
+        uid: str,
+    ) -> Optional[List[PlaylistTrack]]:
+        """Reorder the tracks in the specified playlist for smooth transitions of
+        tempo and key.
+
+        Args:
+            playlist_id (str): playlist id
+            uid (str): user id
+
+        Returns:
+            Optional[List[PlaylistTrack]]: List of PlyalistTrack objects in the new
+                order if the playlist exists and is created by the user with the
+                specified uid, else None.
+
+        Raises:
+            TooManyTracksError: if the playlist has more than MAX_SEQUENCE_TRACKS
+                tracks
+        """
+        pass
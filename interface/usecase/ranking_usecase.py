@@ -1,7 +1,36 @@
 from abc import ABCMeta, abstractmethod
+from typing import List, Optional
+
+from domain.model.ranking import RankingPayload
 
 
 class RankingUsecase(metaclass=ABCMeta):
     @abstractmethod
-    def get_ranking(self) -> list:
+    def get_charts(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def get_ranking(self, chart: Optional[str] = None) -> list:
+        pass
+
+    @abstractmethod
+    def get_ranking_payload(
+        self,
+        compressed: bool,
+        chart: Optional[str] = None,
+    ) -> Optional[RankingPayload]:
+        """Get the ranking of the chart as the body of a response
+
+        Args:
+            compressed (bool): get gzip compressed body if True
+            chart (Optional[str]): name of the chart. The default one if None.
+
+        Returns:
+            Optional[RankingPayload]: the ranking, or None if it cannot be created
+                for now
+        """
+        pass
+
+    @abstractmethod
+    def refresh_rankings(self) -> List[str]:
         pass
@@ -1,5 +1,5 @@
 from abc import ABCMeta, abstractmethod
-from typing import List
+from typing import List, Optional
 
 from domain.model.track import Track
 
@@ -8,3 +8,26 @@ class TrackUsecase(metaclass=ABCMeta):
     @abstractmethod
     def get_tracks_by_query(self, query: str) -> List[Track]:
         pass
+
+    @abstractmethod
+    def get_tracks_by_bpm(
+        self,
+        bpm_min: float,
+        bpm_max: float,
+        offset: int,
+        limit: int,
+    ) -> List[Track]:
+        pass
+
+    @abstractmethod
+    def get_similar_tracks(self, track_id: str, limit: int) -> Optional[List[Track]]:
+        pass
+
+    @abstractmethod
+    def get_compatible_tracks(
+        self,
+        track_id: str,
+        tolerance: float,
+        limit: int,
+    ) -> Optional[List[Track]]:
+        pass
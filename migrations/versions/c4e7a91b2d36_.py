@@ -0,0 +1,105 @@
+"""replace order of playlist_track with rank
+
+Revision ID: c4e7a91b2d36
+Revises: 8b3f6a2d7c15
+Create Date: 2026-10-18 16:40:05.912874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a91b2d36'
+down_revision = '8b3f6a2d7c15'
+branch_labels = None
+depends_on = None
+
+# same as spread_ranks in domain.model.rank at the time of this revision
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_WIDTH = 8
+RANK_STEP = 36 ** 4
+
+
+def _to_rank(value):
+    digits = []
+    for _ in range(RANK_WIDTH):
+        value, digit = divmod(value, 36)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+playlist_track = sa.table(
+    'playlist_track',
+    sa.column('id', sa.String),
+    sa.column('playlist_id', sa.String),
+    sa.column('order', sa.Integer),
+    sa.column('rank', sa.String),
+)
+
+
+def upgrade():
+    op.add_column(
+        'playlist_track', sa.Column('rank', sa.String(length=255), nullable=True)
+    )
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(playlist_track.c.id, playlist_track.c.playlist_id)
+        .order_by(playlist_track.c.playlist_id, playlist_track.c.order)
+    ).fetchall()
+    position = 0
+    last_playlist_id = None
+    for id_, playlist_id in rows:
+        position = position + 1 if playlist_id == last_playlist_id else 1
+        last_playlist_id = playlist_id
+        connection.execute(
+            playlist_track.update()
+            .where(playlist_track.c.id == id_)
+            .values(rank=_to_rank(RANK_STEP * position))
+        )
+
+    op.alter_column(
+        'playlist_track',
+        'rank',
+        existing_type=sa.String(length=255),
+        nullable=False,
+    )
+    op.create_index(
+        'ix_playlist_track_playlist_id_rank',
+        'playlist_track',
+        ['playlist_id', 'rank'],
+        unique=False,
+    )
+    op.drop_column('playlist_track', 'order')
+
+
+def downgrade():
+    op.add_column(
+        'playlist_track', sa.Column('order', sa.Integer(), nullable=True)
+    )
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(playlist_track.c.id, playlist_track.c.playlist_id)
+        .order_by(playlist_track.c.playlist_id, playlist_track.c.rank)
+    ).fetchall()
+    position = 0
+    last_playlist_id = None
+    for id_, playlist_id in rows:
+        position = position + 1 if playlist_id == last_playlist_id else 1
+        last_playlist_id = playlist_id
+        connection.execute(
+            playlist_track.update()
+            .where(playlist_track.c.id == id_)
+            .values(order=position)
+        )
+
+    op.alter_column(
+        'playlist_track',
+        'order',
+        existing_type=sa.Integer(),
+        nullable=False,
+    )
+    op.drop_index('ix_playlist_track_playlist_id_rank', table_name='playlist_track')
+    op.drop_column('playlist_track', 'rank')
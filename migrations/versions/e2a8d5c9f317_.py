@@ -0,0 +1,50 @@
+"""make updated_at of playlist not null and index the sort columns
+
+Revision ID: e2a8d5c9f317
+Revises: c4e7a91b2d36
+Create Date: 2026-10-19 10:12:44.207316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a8d5c9f317'
+down_revision = 'c4e7a91b2d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # playlists which have never been updated are sorted by when they were created
+    op.execute(
+        "UPDATE playlist SET updated_at = created_at WHERE updated_at IS NULL"
+    )
+    op.alter_column(
+        'playlist',
+        'updated_at',
+        existing_type=sa.DateTime(timezone=True),
+        nullable=False,
+        server_default=sa.func.now(),
+    )
+    op.create_index(
+        'ix_playlist_updated_at_id', 'playlist', ['updated_at', 'id'], unique=False
+    )
+    op.create_index('ix_playlist_name_id', 'playlist', ['name', 'id'], unique=False)
+    op.create_index(
+        'ix_playlist_num_tracks_id', 'playlist', ['num_tracks', 'id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_playlist_num_tracks_id', table_name='playlist')
+    op.drop_index('ix_playlist_name_id', table_name='playlist')
+    op.drop_index('ix_playlist_updated_at_id', table_name='playlist')
+    op.alter_column(
+        'playlist',
+        'updated_at',
+        existing_type=sa.DateTime(timezone=True),
+        nullable=True,
+        server_default=None,
+    )
@@ -0,0 +1,59 @@
+"""copy the owner to playlist and index the sort columns by owner
+
+Revision ID: f3b9c6d2e801
+Revises: e2a8d5c9f317
+Create Date: 2026-10-19 15:31:08.640215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9c6d2e801'
+down_revision = 'e2a8d5c9f317'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('playlist', sa.Column('uid', sa.String(length=190), nullable=True))
+    op.execute(
+        "UPDATE playlist SET uid = ("
+        "SELECT user_playlist.uid FROM user_playlist "
+        "WHERE user_playlist.playlist_id = playlist.id)"
+    )
+
+    # playlists are listed only by owner, so the indexes start with uid
+    op.drop_index('ix_playlist_num_tracks_id', table_name='playlist')
+    op.drop_index('ix_playlist_name_id', table_name='playlist')
+    op.drop_index('ix_playlist_updated_at_id', table_name='playlist')
+    op.create_index(
+        'ix_playlist_uid_updated_at_id',
+        'playlist',
+        ['uid', 'updated_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_playlist_uid_name_id', 'playlist', ['uid', 'name', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_playlist_uid_num_tracks_id',
+        'playlist',
+        ['uid', 'num_tracks', 'id'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_playlist_uid_num_tracks_id', table_name='playlist')
+    op.drop_index('ix_playlist_uid_name_id', table_name='playlist')
+    op.drop_index('ix_playlist_uid_updated_at_id', table_name='playlist')
+    op.create_index(
+        'ix_playlist_updated_at_id', 'playlist', ['updated_at', 'id'], unique=False
+    )
+    op.create_index('ix_playlist_name_id', 'playlist', ['name', 'id'], unique=False)
+    op.create_index(
+        'ix_playlist_num_tracks_id', 'playlist', ['num_tracks', 'id'], unique=False
+    )
+    op.drop_column('playlist', 'uid')
@@ -1,5 +1,8 @@
+import json
 from logging import Logger
+import threading
 import time
+from typing import Optional, Tuple
 
 from injector import inject, singleton
 from redis import Redis
@@ -8,33 +11,180 @@ from requests.auth import HTTPBasicAuth
 
 from envs import Envs
 from interface.repository.access_token_repository import AccessTokenRepository
+from persistence.redis_lock import RedisLock
+from persistence.spotify_client import SpotifyClient
 
 
 @singleton
 class AccessTokenRepositoryImpl(AccessTokenRepository):
+    # a string key with native expiry, unlike the hash used before
+    KEY = "spotify:access_token"
+    LOCK_KEY = "spotify:access_token:lock"
+
     @inject
-    def __init__(self, envs: Envs, logger: Logger, redis: Redis) -> None:
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        redis: Redis,
+        spotify_client: SpotifyClient,
+    ) -> None:
         self.envs = envs
         self.logger = logger
         self.redis = redis
+        self.redis_lock = RedisLock(redis)
+        self.spotify_client = spotify_client
+        # seconds before the real expiry to stop using a token
+        self.expiry_margin = envs.ACCESS_TOKEN_EXPIRY_MARGIN
+        self.lock_timeout = envs.ACCESS_TOKEN_LOCK_TIMEOUT
+        # the renewer replaces the token this many seconds before it expires
+        self.renewer_enabled = envs.ACCESS_TOKEN_RENEWER
+        self.renew_ahead = envs.ACCESS_TOKEN_RENEW_AHEAD
+
+        self._lock = threading.Lock()
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._renewer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
 
     def get_access_token(self) -> str:
-        if self._valid_cache():
-            access_token = self._get_access_token_from_cache()
+        """Get access token from the memory of this worker, then from redis and
+        finally from Spotify. Both copies expire shortly before the token does.
+        """
+        with self._lock:
+            if self._expires_at > time.time():
+                return self._access_token
 
-        else:
-            self.logger.info("access_token cache is not valid and create new one.")
-            access_token = self._get_access_token_from_spotify()
-            self._save_cache(access_token)
+            access_token, expires_at = self._load_or_refresh()
+            self._access_token = access_token
+            self._expires_at = expires_at
 
+        self._start_renewer()
         return access_token
 
-    def _get_access_token_from_cache(self) -> str:
-        return self.redis.hget("access_token", "access_token")
+    def _load_or_refresh(self) -> Tuple[str, float]:
+        """Get access token from redis or refresh it while holding the redis lock,
+        so that only one worker asks Spotify while the others wait for the token.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            cache = self._get_cache()
+            if cache is not None:
+                return cache
+
+            lock_token = self._acquire_lock()
+            if lock_token is not None:
+                try:
+                    # another worker may have refreshed it just before the lock
+                    cache = self._get_cache()
+                    if cache is not None:
+                        return cache
+
+                    self.logger.info(
+                        "access_token cache is not valid and create new one."
+                    )
+                    return self._refresh()
+
+                finally:
+                    self._release_lock(lock_token)
+
+            if time.monotonic() > deadline:
+                self.logger.warning("timed out waiting for access token refresh.")
+                return self._refresh()
+
+            time.sleep(0.05)
+
+    def _refresh(self) -> Tuple[str, float]:
+        access_token, expires_in = self._get_access_token_from_spotify()
+        expires_at = time.time() + expires_in - self.expiry_margin
+        self._save_cache(access_token, expires_at)
+        return access_token, expires_at
+
+    def _acquire_lock(self) -> Optional[str]:
+        return self.redis_lock.acquire(self.LOCK_KEY, int(self.lock_timeout * 1000))
+
+    def _release_lock(self, lock_token: str) -> None:
+        self.redis_lock.release(self.LOCK_KEY, lock_token)
+
+    def _start_renewer(self) -> None:
+        # the thread is started lazily so that it runs in the gunicorn worker
+        if not self.renewer_enabled or self._renewer is not None:
+            return
+
+        with self._lock:
+            if self._renewer is None:
+                self._renewer = threading.Thread(
+                    target=self._run_renewer,
+                    name="access-token-renewer",
+                    daemon=True,
+                )
+                self._renewer.start()
+
+    def stop_renewer(self) -> None:
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join()
+
+    def _run_renewer(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._renew()
+            except Exception as e:
+                self.logger.warning(f"failed to renew access token: {e}")
+
+            wait = self._expires_at - self.renew_ahead - time.time()
+            self._stop.wait(min(max(wait, 1), 60))
+
+    def _renew(self) -> None:
+        """Replace the token which expires within renew_ahead seconds.
+        Only the worker holding the lock asks Spotify and the others take the new
+        token from redis.
+        """
+        cache = self._get_cache()
+        if cache is None or cache[1] <= time.time() + self.renew_ahead:
+            lock_token = self._acquire_lock()
+            if lock_token is None:
+                return
+
+            try:
+                cache = self._get_cache()
+                if cache is None or cache[1] <= time.time() + self.renew_ahead:
+                    self.logger.info("renew access_token before it expires.")
+                    cache = self._refresh()
+            finally:
+                self._release_lock(lock_token)
+
+        with self._lock:
+            self._access_token, self._expires_at = cache
+
+    def invalidate_access_token(self, access_token: str) -> None:
+        with self._lock:
+            # the token may already be replaced by another thread or worker
+            if self._access_token == access_token:
+                self._access_token = None
+                self._expires_at = 0.0
+
+            cache = self._get_cache()
+            if cache is not None and cache[0] == access_token:
+                self.redis.delete(self.KEY)
+
+    def _get_cache(self) -> Optional[Tuple[str, float]]:
+        """Get access token and its expiry time in epoch seconds from redis
+
+        Returns:
+            Optional[Tuple[str, float]]: access token and expiry time. None if it
+                is not stored or has expired.
+        """
+        value = self.redis.get(self.KEY)
+        if value is None:
+            return None
+
+        value = json.loads(value)
+        return value["access_token"], value["expires_at"]
 
-    def _get_access_token_from_spotify(self) -> str:
-        response = requests.post(
-            "https://accounts.spotify.com/api/token",
+    def _get_access_token_from_spotify(self) -> Tuple[str, int]:
+        response = self.spotify_client.post_accounts(
+            "/api/token",
             headers={"Content-Type": "application/x-www-form-urlencoded"},
             auth=HTTPBasicAuth(self.envs.CLIENT_ID, self.envs.CLIENT_SECRET),
             data={"grant_type": "client_credentials"},
@@ -46,24 +196,12 @@ class AccessTokenRepositoryImpl(AccessTokenRepository):
             self.logger.error(message)
             raise RuntimeError(message)
 
-        access_token = body["access_token"]
-        return access_token
-
-    def _save_cache(self, access_token: str) -> None:
-        # spotify access token will expire after 1 hour and set ttl to 50 min
-        ttl = time.time() + 60 * 50
-
-        self.redis.hset("access_token", "access_token", access_token)
-        self.redis.hset("access_token", "ttl", ttl)
+        return body["access_token"], body["expires_in"]
 
-    def _valid_cache(self) -> bool:
-        """Check if cache exists and is not expired
-
-        Returns:
-            bool: True if chache exists and is not expired
-        """
-        if not self.redis.exists("access_token"):
-            return False
+    def _save_cache(self, access_token: str, expires_at: float) -> None:
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
 
-        ttl = float(self.redis.hget("access_token", "ttl"))
-        return ttl > time.time()
+        value = json.dumps({"access_token": access_token, "expires_at": expires_at})
+        self.redis.set(self.KEY, value, ex=ttl)
@@ -0,0 +1,206 @@
+import asyncio
+from contextvars import ContextVar
+from logging import Logger
+import threading
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import aiohttp
+from injector import inject, singleton
+
+from domain.model.rate_limit import (
+    current_priority,
+    INTERACTIVE,
+    SpotifyRateLimitError,
+)
+from envs import Envs
+from persistence.rate_limiter import RateLimiter
+
+# priority of the request made by the coroutine, which is carried into the tasks
+# created from it unlike the thread-local priority of the sync client
+_priority: "ContextVar[str]" = ContextVar("priority", default=INTERACTIVE)
+
+
+@singleton
+class AsyncSpotifyClient:
+    """Asyncio counterpart of SpotifyClient.
+
+    One event loop runs in a daemon thread of each worker and every coroutine is
+    scheduled on it, so chunked lookups fan out on one aiohttp connection pool
+    without a thread per request. Sync callers such as the request handlers of
+    Flask submit coroutines with run() and wait for the result.
+    """
+
+    @inject
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        rate_limiter: RateLimiter,
+    ) -> None:
+        self.logger = logger
+        self.rate_limiter = rate_limiter
+        self.api_url = envs.SPOTIFY_API_URL.rstrip("/")
+        self.timeout = envs.SPOTIFY_TIMEOUT
+        self.pool_maxsize = envs.SPOTIFY_POOL_MAXSIZE
+        self.keep_alive = envs.SPOTIFY_KEEP_ALIVE
+        self.max_retries = envs.SPOTIFY_RATE_LIMIT_MAX_RETRIES
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._num_requests = 0
+        self._num_coalesced = 0
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        # the loop is started lazily so that it is created in the gunicorn worker
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="spotify-loop",
+                    daemon=True,
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """Run the coroutine on the event loop and wait for the result.
+        The priority of the calling thread is kept in the coroutine.
+
+        Args:
+            coro (Awaitable[Any]): coroutine to run
+
+        Returns:
+            Any: result of the coroutine
+        """
+        async def call(priority: str) -> Any:
+            _priority.set(priority)
+            return await coro
+
+        future = asyncio.run_coroutine_threadsafe(
+            call(current_priority()),
+            self._get_loop(),
+        )
+        return future.result()
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # only called on the event loop thread
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize,
+                force_close=not self.keep_alive,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def get(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> Tuple[int, Any]:
+        """Send GET request to Spotify Web API.
+        Identical requests in flight are coalesced into one.
+
+        Args:
+            path (str): path relative to the api root such as "/tracks"
+            params (Optional[dict]): query parameters
+            headers (Optional[dict]): request headers
+
+        Returns:
+            Tuple[int, Any]: status code and json body of the response
+        """
+        url = f"{self.api_url}{path}"
+        params = params or {}
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            with self._lock:
+                self._num_coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        # the result is retrieved here in case no one else waits for it
+        future.add_done_callback(
+            lambda f: None if f.cancelled() else f.exception()
+        )
+        self._inflight[key] = future
+        try:
+            result = await self._request(url, params, headers)
+            future.set_result(result)
+            return result
+
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        except Exception as e:
+            future.set_exception(e)
+            raise
+
+        finally:
+            del self._inflight[key]
+
+    async def _request(
+        self,
+        url: str,
+        params: dict,
+        headers: Optional[dict],
+    ) -> Tuple[int, Any]:
+        loop = asyncio.get_running_loop()
+        priority = _priority.get()
+        for _ in range(self.max_retries + 1):
+            # the rate limiter may sleep, so it waits out of the event loop
+            await loop.run_in_executor(None, self.rate_limiter.acquire, priority)
+            with self._lock:
+                self._num_requests += 1
+
+            async with self._get_session().get(
+                url,
+                params=params,
+                headers=headers,
+            ) as response:
+                if response.status != 429:
+                    return response.status, await response.json(content_type=None)
+
+                retry_after = self._parse_retry_after(response)
+
+            self.logger.warning(f"spotify rate limit hit, retry after {retry_after}s")
+            # Retry-After is shared with the other workers through redis
+            await loop.run_in_executor(None, self.rate_limiter.block, retry_after)
+
+        raise SpotifyRateLimitError(retry_after=retry_after)
+
+    def _parse_retry_after(self, response: aiohttp.ClientResponse) -> float:
+        try:
+            return max(float(response.headers.get("Retry-After", 1)), 0)
+        except ValueError:
+            return 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._num_requests,
+                "coalesced": self._num_coalesced,
+            }
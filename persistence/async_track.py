@@ -0,0 +1,334 @@
+import asyncio
+from functools import partial
+from logging import Logger
+from typing import Callable, List, Optional
+
+from injector import inject, singleton
+import requests
+
+from domain.model.track import Track
+from interface.repository.access_token_repository import AccessTokenRepository
+from persistence.async_spotify_client import AsyncSpotifyClient
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.track_base import (
+    chunk,
+    FEATURES_CHUNK_SIZE,
+    TRACKS_CHUNK_SIZE,
+    TrackRepositoryBase,
+)
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
+
+
+@singleton
+class AsyncTrackRepositoryImpl(TrackRepositoryBase):
+    """TrackRepository whose requests to Spotify run as coroutines on the event
+    loop of AsyncSpotifyClient.
+
+    The sync methods of TrackRepository wait for the coroutines, so it can replace
+    TrackRepositoryImpl as it is, and the *_async coroutines can be awaited
+    directly by async callers. The caches, the catalog and the indexes are shared
+    with TrackRepositoryImpl through TrackRepositoryBase, and the blocking calls to
+    them run in the default executor instead of on the event loop.
+    """
+
+    @inject
+    def __init__(
+        self,
+        logger: Logger,
+        access_token_repository: AccessTokenRepository,
+        spotify_client: AsyncSpotifyClient,
+        feature_cache: FeatureCache,
+        track_cache: TrackCache,
+        track_catalog: TrackCatalog,
+        feature_index: FeatureIndex,
+        camelot_index: CamelotIndex,
+    ):
+        super().__init__(
+            logger,
+            access_token_repository,
+            feature_cache,
+            track_cache,
+            track_catalog,
+            feature_index,
+            camelot_index,
+        )
+        self.spotify_client = spotify_client
+
+    def get_track_by_id(self, track_id: str) -> Optional[Track]:
+        return self.spotify_client.run(self.get_track_by_id_async(track_id))
+
+    def get_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        return self.spotify_client.run(self.get_tracks_by_ids_async(track_ids))
+
+    def get_tracks_by_query(self, query: str) -> List[Track]:
+        return self.spotify_client.run(self.get_tracks_by_query_async(query))
+
+    def get_tracks_by_playlist_id(self, playlist_id: str) -> List[Track]:
+        return self.spotify_client.run(
+            self.get_tracks_by_playlist_id_async(playlist_id)
+        )
+
+    def get_tracks_by_playlist_ids(
+        self,
+        playlist_ids: List[str],
+    ) -> List[List[Track]]:
+        return self.spotify_client.run(
+            self.get_tracks_by_playlist_ids_async(playlist_ids)
+        )
+
+    def _fetch_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        return self.spotify_client.run(self._fetch_tracks_by_ids_async(track_ids))
+
+    async def _run_blocking(self, func: Callable, *args):
+        """Run a blocking call to Redis, the database or Spotify in the default
+        executor so that the other coroutines on the event loop keep running.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args))
+
+    async def _get_access_token(self) -> str:
+        # the token may be refreshed with a blocking request to Spotify
+        return await self._run_blocking(self.access_token_repository.get_access_token)
+
+    async def _get_async(self, path: str, access_token: str, **kwargs):
+        status_code, body = await self.spotify_client.get(
+            path,
+            headers={"Authorization": f"Bearer {access_token}"},
+            **kwargs,
+        )
+        if status_code != requests.codes.unauthorized:
+            return status_code, body
+
+        # retry once with a new token as TrackRepositoryImpl._get does
+        self.logger.warning("access token is rejected by spotify and renew it.")
+        await self._run_blocking(
+            self.access_token_repository.invalidate_access_token,
+            access_token,
+        )
+        access_token = await self._get_access_token()
+        return await self.spotify_client.get(
+            path,
+            headers={"Authorization": f"Bearer {access_token}"},
+            **kwargs,
+        )
+
+    async def get_features_by_ids_async(
+        self,
+        ids: List[str],
+        access_token: str = None,
+    ) -> List[Optional[dict]]:
+        """Get audio features from the cache and fetch the missing ones from
+        Spotify by chunks concurrently.
+        """
+        ids = list(ids)
+        features = await self._run_blocking(self.feature_cache.get_many, ids)
+
+        missing_ids = [id_ for id_, feature in zip(ids, features) if feature is None]
+        if len(missing_ids) == 0:
+            return features
+
+        if access_token is None:
+            access_token = await self._get_access_token()
+
+        feature_chunks = chunk(missing_ids, FEATURES_CHUNK_SIZE)
+        results = await asyncio.gather(*[
+            self._fetch_features_by_ids_async(feature_chunk, access_token)
+            for feature_chunk in feature_chunks
+        ])
+        return await self._run_blocking(
+            self._merge_features,
+            ids,
+            features,
+            feature_chunks,
+            results,
+        )
+
+    async def _fetch_features_by_ids_async(
+        self,
+        ids: List[str],
+        access_token: str,
+    ) -> List[Optional[dict]]:
+        status_code, body = await self._get_async(
+            "/audio-features",
+            access_token,
+            params={"ids": ",".join(ids)},
+        )
+
+        # When the specified spotify ids contain invalid one like including "_"
+        if status_code == requests.codes.bad_request:
+            message = f"Specified spotify_ids include invalid one: {body}"
+            self.logger.warning(message)
+            return []
+
+        elif status_code != requests.codes.ok:
+            message = f"cannot fetch search result features correctly: {body}"
+            self.logger.error(message)
+            raise RuntimeError(message)
+
+        # None is returned for a spotify id that does not exist in spotify
+        return body["audio_features"]
+
+    async def _fetch_track_items_by_ids_async(
+        self,
+        ids: List[str],
+        access_token: str,
+    ) -> List[Optional[dict]]:
+        status_code, body = await self._get_async(
+            "/tracks",
+            access_token,
+            params={"ids": ",".join(ids)},
+        )
+
+        # When the specified spotify ids contain invalid one like including "_"
+        if status_code == requests.codes.bad_request:
+            message = f"Specified spotify_ids include invalid one: {body}"
+            self.logger.warning(message)
+            return [None] * len(ids)
+
+        elif status_code != requests.codes.ok:
+            message = f"cannot fetch tracks by ids correctly: {body}"
+            self.logger.error(message)
+            raise RuntimeError(message)
+
+        # None is returned for a spotify id that does not exist in spotify
+        return body["tracks"]
+
+    async def get_track_by_id_async(self, track_id: str) -> Optional[Track]:
+        return (await self.get_tracks_by_ids_async([track_id]))[0]
+
+    async def get_tracks_by_ids_async(
+        self,
+        track_ids: List[str],
+    ) -> List[Optional[Track]]:
+        """Get tracks from the cache and fetch the missing ones from Spotify.
+        Track metadata and audio features of all chunks are fetched concurrently.
+        """
+        track_ids = list(track_ids)
+        tracks = await self._run_blocking(self._get_stored_tracks, track_ids)
+
+        missing_ids = [id_ for id_, track in zip(track_ids, tracks) if track is None]
+        if len(missing_ids) == 0:
+            return tracks
+
+        fetched_tracks = await self._fetch_tracks_by_ids_async(missing_ids)
+        await self._run_blocking(self._save_tracks, fetched_tracks)
+        fetched = dict(zip(missing_ids, fetched_tracks))
+        return [
+            fetched.get(id_) if track is None else track
+            for id_, track in zip(track_ids, tracks)
+        ]
+
+    async def _fetch_tracks_by_ids_async(
+        self,
+        track_ids: List[str],
+    ) -> List[Optional[Track]]:
+        access_token = await self._get_access_token()
+        track_chunks = chunk(track_ids, TRACKS_CHUNK_SIZE)
+        item_results, features = await asyncio.gather(
+            asyncio.gather(*[
+                self._fetch_track_items_by_ids_async(track_chunk, access_token)
+                for track_chunk in track_chunks
+            ]),
+            self.get_features_by_ids_async(track_ids, access_token),
+        )
+        items = [item for chunk_items in item_results for item in chunk_items]
+
+        return [
+            self._create_track(item, feature)
+            for item, feature in zip(items, features)
+        ]
+
+    async def get_tracks_by_query_async(self, query: str) -> List[Track]:
+        access_token = await self._get_access_token()
+        status_code, body = await self._get_async(
+            "/search",
+            access_token,
+            params={"type": "track", "q": query},
+        )
+
+        if status_code != requests.codes.ok:
+            message = f"cannot fetch search results correctly: {body}"
+            self.logger.error(message)
+            raise RuntimeError(message)
+
+        items = body["tracks"]["items"]
+        if len(items) == 0:
+            self.logger.info("no search result for the specified query.")
+            return []
+
+        return await self._create_tracks_async(items, access_token)
+
+    async def get_tracks_by_playlist_id_async(self, playlist_id: str) -> List[Track]:
+        return (await self.get_tracks_by_playlist_ids_async([playlist_id]))[0]
+
+    async def get_tracks_by_playlist_ids_async(
+        self,
+        playlist_ids: List[str],
+    ) -> List[List[Track]]:
+        """Fetch the playlists concurrently and then the audio features of the
+        tracks in them at once, so that a track in many playlists is looked up
+        only once.
+        """
+        access_token = await self._get_access_token()
+        items_list = await asyncio.gather(*[
+            self._fetch_playlist_items_async(playlist_id, access_token)
+            for playlist_id in playlist_ids
+        ])
+
+        ids = list(dict.fromkeys(
+            item["id"] for items in items_list for item in items
+        ))
+        features = await self.get_features_by_ids_async(ids, access_token)
+        features = dict(zip(ids, features))
+
+        tracks_list = []
+        for items in items_list:
+            tracks = [self._create_track(item, features[item["id"]]) for item in items]
+            tracks_list.append([track for track in tracks if track is not None])
+        await self._run_blocking(self._save_tracks, [
+            track for tracks in tracks_list for track in tracks
+        ])
+
+        return tracks_list
+
+    async def _fetch_playlist_items_async(
+        self,
+        playlist_id: str,
+        access_token: str,
+    ) -> List[dict]:
+        status_code, body = await self._get_async(
+            f"/playlists/{playlist_id}",
+            access_token,
+        )
+
+        if status_code != requests.codes.ok:
+            message = f"cannot fetch playlist tracks correctly: {body}"
+            self.logger.error(message)
+            raise RuntimeError(message)
+
+        # track is null for a local or an unavailable track in spotify playlist
+        return [
+            item["track"]
+            for item in body["tracks"]["items"]
+            if item["track"] is not None
+        ]
+
+    async def _create_tracks_async(
+        self,
+        items: List[dict],
+        access_token: str,
+    ) -> List[Track]:
+        ids = [item["id"] for item in items]
+        features = await self.get_features_by_ids_async(ids, access_token)
+
+        tracks = [
+            self._create_track(item, feature)
+            for item, feature in zip(items, features)
+        ]
+        tracks = [track for track in tracks if track is not None]
+        await self._run_blocking(self._save_tracks, tracks)
+
+        return tracks
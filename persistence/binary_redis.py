@@ -0,0 +1,7 @@
+from typing import NewType
+
+from redis import Redis
+
+# redis connection which returns values as bytes, for values which are not utf-8
+# text such as gzip compressed responses
+BinaryRedis = NewType("BinaryRedis", Redis)
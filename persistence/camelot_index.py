@@ -0,0 +1,183 @@
+from bisect import bisect_left
+import heapq
+from logging import Logger
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from injector import inject, singleton
+
+from domain.model.track import Track
+from envs import Envs
+from persistence.catalog_index import CatalogIndex
+from persistence.track_catalog import TrackCatalog
+
+# width of the tempo band of a bucket in bpm
+TEMPO_BAND_WIDTH = 4.0
+
+_BucketKey = Tuple[str, int]
+
+
+class _Bucket:
+    """Tracks in one Camelot code and tempo band sorted by bpm"""
+
+    def __init__(self) -> None:
+        self.bpms: List[float] = []
+        self.ids: List[str] = []
+
+    def insert(self, bpm: float, spotify_id: str) -> None:
+        idx = bisect_left(self.bpms, bpm)
+        self.bpms.insert(idx, bpm)
+        self.ids.insert(idx, spotify_id)
+
+    def remove(self, bpm: float, spotify_id: str) -> None:
+        idx = bisect_left(self.bpms, bpm)
+        while self.ids[idx] != spotify_id:
+            idx += 1
+        del self.bpms[idx]
+        del self.ids[idx]
+
+
+def _band(bpm: float) -> int:
+    return int(bpm // TEMPO_BAND_WIDTH)
+
+
+@singleton
+class CamelotIndex(CatalogIndex):
+    """Index of tracks for harmonic mixing in each worker.
+
+    Tracks are bucketed by Camelot code and tempo band and each bucket is sorted by
+    bpm. A query walks outwards from the target tempo in the buckets of the
+    compatible codes and stops at the limit, so its cost depends on the limit and
+    the tempo tolerance but not on the number of indexed tracks.
+    """
+
+    @inject
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        track_catalog: TrackCatalog,
+    ) -> None:
+        super().__init__(envs, logger, track_catalog, "camelot-index")
+        self._buckets: Dict[_BucketKey, _Bucket] = {}
+        self._entries: Dict[str, Tuple[_BucketKey, float]] = {}
+
+    def add_many(self, tracks: List[Optional[Track]]) -> None:
+        with self._lock:
+            for track in tracks:
+                if track is None:
+                    continue
+
+                camelot = track.camelot
+                entry = self._entries.pop(track.spotify_id, None)
+                if entry is not None:
+                    key, bpm = entry
+                    self._buckets[key].remove(bpm, track.spotify_id)
+                # a track without a detected key or tempo cannot be mixed
+                if camelot is None or track.bpm <= 0:
+                    continue
+
+                key = (str(camelot), _band(track.bpm))
+                self._buckets.setdefault(key, _Bucket()).insert(
+                    track.bpm,
+                    track.spotify_id,
+                )
+                self._entries[track.spotify_id] = (key, track.bpm)
+
+    def get_compatible_ids(
+        self,
+        track: Track,
+        tolerance: float,
+        limit: int,
+    ) -> List[str]:
+        """Get spotify ids of the indexed tracks in a compatible key whose tempo is
+        within the tolerance of the tempo, half time or double time of the track
+
+        Args:
+            track (Track): Track object to mix with
+            tolerance (float): tolerance of tempo as a ratio such as 0.06
+            limit (int): maximum number of ids
+
+        Returns:
+            List[str]: spotify ids in ascending order of the relative difference of
+                tempo. The track itself is excluded.
+        """
+        self._sync_in_background()
+
+        camelot = track.camelot
+        if camelot is None or track.bpm <= 0:
+            return []
+
+        spotify_ids: Dict[str, None] = {}
+        with self._lock:
+            streams = [
+                self._iter_nearest(str(code), target, tolerance)
+                for code in camelot.compatible()
+                for target in [track.bpm, track.bpm / 2, track.bpm * 2]
+            ]
+            # a track appears twice when the tolerance is wide enough to overlap
+            # the tempo and the half time
+            for _, spotify_id in heapq.merge(*streams):
+                if spotify_id != track.spotify_id:
+                    spotify_ids[spotify_id] = None
+                if len(spotify_ids) == limit:
+                    break
+
+        return list(spotify_ids)
+
+    def _iter_nearest(
+        self,
+        code: str,
+        target: float,
+        tolerance: float,
+    ) -> Iterator[Tuple[float, str]]:
+        """Iterate over the tracks of the code within the tolerance of the target
+        tempo from the nearest with the relative difference of tempo
+        """
+        upper = (
+            ((bpm - target) / target, id_)
+            for bpm, id_ in self._iter_up(code, target, target * (1 + tolerance))
+        )
+        lower = (
+            ((target - bpm) / target, id_)
+            for bpm, id_ in self._iter_down(code, target, target * (1 - tolerance))
+        )
+        return heapq.merge(upper, lower)
+
+    def _iter_up(
+        self,
+        code: str,
+        start: float,
+        stop: float,
+    ) -> Iterator[Tuple[float, str]]:
+        for band in range(_band(start), _band(stop) + 1):
+            bucket = self._buckets.get((code, band))
+            if bucket is None:
+                continue
+
+            for idx in range(bisect_left(bucket.bpms, start), len(bucket.bpms)):
+                if bucket.bpms[idx] > stop:
+                    return
+                yield bucket.bpms[idx], bucket.ids[idx]
+
+    def _iter_down(
+        self,
+        code: str,
+        start: float,
+        stop: float,
+    ) -> Iterator[Tuple[float, str]]:
+        for band in range(_band(start), _band(stop) - 1, -1):
+            bucket = self._buckets.get((code, band))
+            if bucket is None:
+                continue
+
+            for idx in range(bisect_left(bucket.bpms, start) - 1, -1, -1):
+                if bucket.bpms[idx] < stop:
+                    return
+                yield bucket.bpms[idx], bucket.ids[idx]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "buckets": len(self._buckets),
+            }
@@ -0,0 +1,85 @@
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from logging import Logger
+import threading
+import time
+from typing import List, Optional
+
+from domain.model.track import Track
+from envs import Envs
+from persistence.track_catalog import TrackCatalog
+
+
+class CatalogIndex(metaclass=ABCMeta):
+    """In-memory index of tracks in each worker kept in sync with the catalog.
+
+    Tracks stored by this worker are added as they are stored, and the ones
+    stored by other workers are loaded from the track catalog in background every
+    FEATURE_INDEX_SYNC_INTERVAL seconds when the index is queried.
+    """
+
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        track_catalog: TrackCatalog,
+        name: str,
+    ) -> None:
+        self.logger = logger
+        self.track_catalog = track_catalog
+        self.sync_interval = envs.FEATURE_INDEX_SYNC_INTERVAL
+        self.name = name
+
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=name,
+        )
+        self._syncing = False
+        self._synced_at: Optional[float] = None
+        self._synced_since: Optional[datetime] = None
+
+    @abstractmethod
+    def add_many(self, tracks: List[Optional[Track]]) -> None:
+        """Add tracks to the index or update the indexed ones.
+        None in tracks is ignored.
+
+        Args:
+            tracks (List[Optional[Track]]): Track objects
+        """
+        pass
+
+    def _sync_in_background(self) -> None:
+        with self._lock:
+            if self._syncing:
+                return
+            if self._synced_at is not None and \
+                    time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            self._syncing = True
+
+        self.executor.submit(self._sync)
+
+    def _sync(self) -> None:
+        """Add the tracks stored to the catalog since the last sync"""
+        started_at = datetime.utcnow()
+        num_tracks = 0
+        try:
+            for tracks in self.track_catalog.iter_tracks(
+                fetched_since=self._synced_since,
+            ):
+                self.add_many(tracks)
+                num_tracks += len(tracks)
+
+            # rows written during the sync may be missed without the margin
+            self._synced_since = started_at - timedelta(seconds=60)
+            self.logger.info(f"loaded {num_tracks} tracks to {self.name}")
+
+        except Exception as e:
+            self.logger.warning(f"failed to load tracks to {self.name}: {e}")
+
+        finally:
+            with self._lock:
+                self._syncing = False
+                self._synced_at = time.monotonic()
@@ -0,0 +1,95 @@
+import json
+from logging import Logger
+import threading
+from typing import Dict, List, Optional
+
+from injector import inject, singleton
+from redis import Redis
+from redis.exceptions import RedisError
+
+from envs import Envs
+
+
+@singleton
+class FeatureCache:
+    """Redis cache of Spotify audio features keyed by spotify_id.
+
+    Audio features of a track never change, so they are kept with a long ttl.
+    Failure of redis is treated as a cache miss so that requests still succeed by
+    asking Spotify.
+    """
+
+    @inject
+    def __init__(self, envs: Envs, logger: Logger, redis: Redis) -> None:
+        self.logger = logger
+        self.redis = redis
+        self.ttl = envs.FEATURE_CACHE_TTL
+
+        self._lock = threading.Lock()
+        self._num_hits = 0
+        self._num_misses = 0
+
+    def _key(self, spotify_id: str) -> str:
+        return f"audio_feature:{spotify_id}"
+
+    def get_many(self, spotify_ids: List[str]) -> List[Optional[dict]]:
+        """Get audio features of the specified ids in one round trip
+
+        Args:
+            spotify_ids (List[str]): list of spotify ids
+
+        Returns:
+            List[Optional[dict]]: audio features in the same order as spotify_ids.
+                None is set for an id which is not cached.
+        """
+        if len(spotify_ids) == 0:
+            return []
+
+        try:
+            values = self.redis.mget([self._key(id_) for id_ in spotify_ids])
+        except RedisError as e:
+            self.logger.warning(f"failed to get audio features from cache: {e}")
+            values = [None] * len(spotify_ids)
+
+        features = [None if value is None else json.loads(value) for value in values]
+
+        num_hits = sum(feature is not None for feature in features)
+        num_misses = len(features) - num_hits
+        with self._lock:
+            self._num_hits += num_hits
+            self._num_misses += num_misses
+        self.logger.debug(
+            f"audio feature cache: {num_hits} hits, {num_misses} misses"
+        )
+
+        return features
+
+    def set_many(self, features: Dict[str, dict]) -> None:
+        """Store audio features with one pipeline
+
+        Args:
+            features (Dict[str, dict]): audio features keyed by spotify id
+        """
+        if len(features) == 0:
+            return
+
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            for spotify_id, feature in features.items():
+                pipeline.setex(self._key(spotify_id), self.ttl, json.dumps(feature))
+            pipeline.execute()
+
+        except RedisError as e:
+            self.logger.warning(f"failed to save audio features to cache: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            num_hits = self._num_hits
+            num_misses = self._num_misses
+
+        num_total = num_hits + num_misses
+        return {
+            "hits": num_hits,
+            "misses": num_misses,
+            "hit_rate": num_hits / num_total if num_total > 0 else 0.0,
+        }
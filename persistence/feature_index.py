@@ -0,0 +1,155 @@
+from logging import Logger
+from typing import Dict, List, Optional
+
+from injector import inject, singleton
+import numpy as np
+
+from domain.model.track import Track
+from envs import Envs
+from persistence.catalog_index import CatalogIndex
+from persistence.track_catalog import TrackCatalog
+
+# a difference of 10 bpm weighs as much as 0.2 of energy or danceability
+BPM_SCALE = 10.0
+FEATURE_SCALE = 0.2
+# keys are placed on the circle of fifths with a relative minor at the position of
+# its major, so adjacent keys are 0.52 apart and the opposite keys 2.0 apart
+KEY_WEIGHT = 1.0
+MODE_WEIGHT = 0.5
+NUM_DIMENSIONS = 6
+
+INITIAL_CAPACITY = 1024
+# every SAMPLE_STEP-th distance is sampled to find a bound of the nearest ones
+SAMPLE_STEP = 100
+
+
+def vectorize(tracks: List[Track]) -> np.ndarray:
+    """Map tracks to points in which the euclidean distance means how different
+    they feel
+
+    Args:
+        tracks (List[Track]): Track objects
+
+    Returns:
+        np.ndarray: float32 array in the shape of (len(tracks), NUM_DIMENSIONS)
+    """
+    bpm = np.array([track.bpm for track in tracks], dtype=np.float32)
+    energy = np.array([track.energy for track in tracks], dtype=np.float32)
+    danceability = np.array(
+        [track.danceability for track in tracks],
+        dtype=np.float32,
+    )
+    key = np.array([track.key for track in tracks], dtype=np.int64)
+    mode = np.array([track.mode for track in tracks], dtype=np.float32)
+
+    fifths = ((key + np.where(mode == 1, 0, 3)) * 7) % 12
+    angle = fifths * (2 * np.pi / 12)
+    # key is -1 when Spotify could not detect it
+    has_key = key >= 0
+    return np.stack([
+        bpm / BPM_SCALE,
+        energy / FEATURE_SCALE,
+        danceability / FEATURE_SCALE,
+        np.where(has_key, np.cos(angle), 0) * KEY_WEIGHT,
+        np.where(has_key, np.sin(angle), 0) * KEY_WEIGHT,
+        mode * MODE_WEIGHT,
+    ], axis=1).astype(np.float32)
+
+
+@singleton
+class FeatureIndex(CatalogIndex):
+    """Nearest neighbour index of the audio features of tracks in each worker.
+
+    Features are kept as columns of one float32 matrix, which grows by doubling,
+    with their squared norms, so the distances to all tracks are one matrix-vector
+    product. The nearest ones are selected among the tracks closer than a bound
+    taken from a sample of the distances. 1M tracks take 28MB and a query takes
+    a few milliseconds.
+    """
+
+    @inject
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        track_catalog: TrackCatalog,
+    ) -> None:
+        super().__init__(envs, logger, track_catalog, "feature-index")
+        self._matrix = np.empty((NUM_DIMENSIONS, INITIAL_CAPACITY), dtype=np.float32)
+        self._norms = np.empty(INITIAL_CAPACITY, dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def add_many(self, tracks: List[Optional[Track]]) -> None:
+        tracks = [track for track in tracks if track is not None]
+        if len(tracks) == 0:
+            return
+
+        vectors = vectorize(tracks)
+        with self._lock:
+            for track, vector in zip(tracks, vectors):
+                row = self._rows.get(track.spotify_id)
+                if row is None:
+                    row = len(self._ids)
+                    if row == len(self._norms):
+                        self._grow()
+                    self._ids.append(track.spotify_id)
+                    self._rows[track.spotify_id] = row
+                self._matrix[:, row] = vector
+                self._norms[row] = vector @ vector
+
+    def _grow(self) -> None:
+        capacity = len(self._norms)
+        matrix = np.empty((NUM_DIMENSIONS, capacity * 2), dtype=np.float32)
+        matrix[:, :capacity] = self._matrix
+        norms = np.empty(capacity * 2, dtype=np.float32)
+        norms[:capacity] = self._norms
+        self._matrix, self._norms = matrix, norms
+
+    def get_similar_ids(self, track: Track, limit: int) -> List[str]:
+        """Get spotify ids of the indexed tracks nearest to the track
+
+        Args:
+            track (Track): Track object to compare with
+            limit (int): maximum number of ids
+
+        Returns:
+            List[str]: spotify ids from the nearest. The track itself is excluded.
+        """
+        self._sync_in_background()
+
+        # tracks are only appended, so the columns below size never move
+        with self._lock:
+            matrix, norms = self._matrix, self._norms
+            size = len(self._ids)
+        if size == 0:
+            return []
+
+        # |x - v|^2 without |v|^2, which does not change the order
+        vector = vectorize([track])[0]
+        distances = vector @ matrix[:, :size]
+        distances *= -2
+        distances += norms[:size]
+        row = self._rows.get(track.spotify_id)
+        if row is not None and row < size:
+            distances[row] = np.inf
+
+        # the sampled tracks closer than the bound are enough to fill the limit,
+        # so only the tracks closer than it need to be sorted
+        limit = min(limit, size)
+        candidates = np.arange(size)
+        sample = distances[::SAMPLE_STEP]
+        if len(sample) > limit:
+            bound = np.partition(sample, limit)[limit]
+            candidates = np.flatnonzero(distances <= bound)
+
+        rows = candidates[np.argpartition(distances[candidates], limit - 1)[:limit]]
+        rows = rows[np.argsort(distances[rows])]
+        return [self._ids[row] for row in rows if np.isfinite(distances[row])]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._ids),
+                "capacity": len(self._norms),
+            }
@@ -0,0 +1,43 @@
+from injector import inject, singleton
+
+from interface.repository.metrics_repository import MetricsRepository
+from persistence.async_spotify_client import AsyncSpotifyClient
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.spotify_client import SpotifyClient
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
+
+
+@singleton
+class MetricsRepositoryImpl(MetricsRepository):
+    @inject
+    def __init__(
+        self,
+        spotify_client: SpotifyClient,
+        async_spotify_client: AsyncSpotifyClient,
+        feature_cache: FeatureCache,
+        feature_index: FeatureIndex,
+        camelot_index: CamelotIndex,
+        track_cache: TrackCache,
+        track_catalog: TrackCatalog,
+    ) -> None:
+        self.spotify_client = spotify_client
+        self.async_spotify_client = async_spotify_client
+        self.feature_cache = feature_cache
+        self.feature_index = feature_index
+        self.camelot_index = camelot_index
+        self.track_cache = track_cache
+        self.track_catalog = track_catalog
+
+    def get_stats(self) -> dict:
+        return {
+            "spotify_client": self.spotify_client.get_stats(),
+            "async_spotify_client": self.async_spotify_client.get_stats(),
+            "feature_cache": self.feature_cache.get_stats(),
+            "feature_index": self.feature_index.get_stats(),
+            "camelot_index": self.camelot_index.get_stats(),
+            "track_cache": self.track_cache.get_stats(),
+            "track_catalog": self.track_catalog.get_stats(),
+        }
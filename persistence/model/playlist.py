@@ -3,13 +3,27 @@ from . import db
 
 class PlaylistInfoDataModel(db.Model):
     __tablename__ = "playlist"
+    # playlists of a user are listed in pages in the order of (sort column, id),
+    # so each index starts with uid and the pages of a user are read in order
+    __table_args__ = (
+        db.Index("ix_playlist_uid_updated_at_id", "uid", "updated_at", "id"),
+        db.Index("ix_playlist_uid_name_id", "uid", "name", "id"),
+        db.Index("ix_playlist_uid_num_tracks_id", "uid", "num_tracks", "id"),
+    )
     id = db.Column(db.String(50), primary_key=True)
+    # copy of the owner in user_playlist for the indexes above
+    uid = db.Column(db.String(190), nullable=True)
     name = db.Column(db.String(50), nullable=False)
     desc = db.Column(db.Text, nullable=False)
     num_tracks = db.Column(db.Integer, nullable=False)
     image_url = db.Column(db.String(2048), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
-    updated_at = db.Column(db.DateTime(timezone=True), onupdate=db.func.now())
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
 
     playlist_track = db.relationship(
         "PlaylistTrackDataModel",
@@ -3,13 +3,17 @@ from . import db
 
 class PlaylistTrackDataModel(db.Model):
     __tablename__ = "playlist_track"
+    __table_args__ = (
+        db.Index("ix_playlist_track_playlist_id_rank", "playlist_id", "rank"),
+    )
     id = db.Column(db.String(50), primary_key=True)
     playlist_id = db.Column(
         db.String(50),
         db.ForeignKey('playlist.id'),
     )
     spotify_id = db.Column(db.String(190))
-    order = db.Column(db.Integer, nullable=False)
+    # tracks in a playlist are sorted by rank and the order is the position in it
+    rank = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=db.func.now())
 
@@ -0,0 +1,20 @@
+from . import db
+
+
+class TrackDataModel(db.Model):
+    __tablename__ = "track"
+    spotify_id = db.Column(db.String(190), primary_key=True)
+    song_name = db.Column(db.String(255), nullable=False)
+    artist = db.Column(db.String(255), nullable=False)
+    album_name = db.Column(db.String(255), nullable=False)
+    bpm = db.Column(db.Float, nullable=False)
+    key = db.Column(db.Integer, nullable=False)
+    mode = db.Column(db.Integer, nullable=False)
+    danceability = db.Column(db.Float, nullable=False)
+    energy = db.Column(db.Float, nullable=False)
+    image_url = db.Column(db.String(2048), nullable=True)
+    preview_url = db.Column(db.String(2048), nullable=True)
+    fetched_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<TrackDataModel {self.spotify_id}>"
@@ -8,7 +8,7 @@ class UserPlaylistDataModel(db.Model):
         db.ForeignKey('playlist.id'),
         primary_key=True,
     )
-    uid = db.Column(db.String(190), primary_key=True)
+    uid = db.Column(db.String(190), primary_key=True, index=True)
 
     def __repr__(self):
         return f"<UserPlaylistDataModel {self.playlist_id},{self.uid}>"
@@ -1,17 +1,26 @@
+import base64
+from dataclasses import replace
+from datetime import datetime
+import json
 from logging import Logger
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
+import uuid
 
 from injector import inject, singleton
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.exc import SQLAlchemyError
 
-from domain.model.playlist import Playlist, PlaylistInfo
-from domain.model.track import PlaylistTrack
+from domain.model.playlist import Playlist, PlaylistInfo, PlaylistInfoPage
+from domain.model.rank import needs_rebalance, rank_between, spread_ranks
+from domain.model.track import PlaylistTrack, Track
 from interface.repository.playlist_repository import PlaylistRepository
 from interface.repository.track_repository import TrackRepository
 from persistence.model.playlist import PlaylistInfoDataModel
 from persistence.model.user_playlist import UserPlaylistDataModel
 from persistence.model.playlist_track import PlaylistTrackDataModel
+from persistence.model.track import TrackDataModel
+from persistence.upsert import upsert
 
 
 @singleton
@@ -27,43 +36,134 @@ class PlaylistRepositoryImpl(PlaylistRepository):
         self.logger = logger
         self.track_repository = track_repository
 
-    def get_playlist_infos(self, uid: str) -> List[PlaylistInfo]:
-        user_playlist_datas = self.db.session.query(UserPlaylistDataModel) \
-            .filter_by(uid=uid)
-
-        playlist_ids = [
-            user_playlist_data.playlist_id
-            for user_playlist_data in user_playlist_datas
-        ]
+    def get_playlist_infos(
+        self,
+        uid: str,
+        sort: str,
+        descending: bool,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Optional[PlaylistInfoPage]:
+        sort_column = {
+            "updated_at": PlaylistInfoDataModel.updated_at,
+            "name": PlaylistInfoDataModel.name,
+            "num_tracks": PlaylistInfoDataModel.num_tracks,
+        }[sort]
+        id_column = PlaylistInfoDataModel.id
 
-        if len(playlist_ids) == 0:
-            return []
+        try:
+            query = self.db.session.query(PlaylistInfoDataModel, sort_column) \
+                .filter(PlaylistInfoDataModel.uid == uid)
+
+            # the page starts right after the last playlist of the previous page in
+            # the order of (sort_column, id), so no row before it is read
+            if cursor is not None:
+                position = self._decode_cursor(cursor, sort, descending)
+                if position is None:
+                    return None
+                value, last_id = position
+                if descending:
+                    query = query.filter(or_(
+                        sort_column < value,
+                        and_(sort_column == value, id_column < last_id),
+                    ))
+                else:
+                    query = query.filter(or_(
+                        sort_column > value,
+                        and_(sort_column == value, id_column > last_id),
+                    ))
+
+            if descending:
+                query = query.order_by(sort_column.desc(), id_column.desc())
+            else:
+                query = query.order_by(sort_column, id_column)
+            if limit is None:
+                rows = query.all()
+            else:
+                rows = query.limit(limit + 1).all()
+
+            playlist_infos = [
+                PlaylistInfo(
+                    id=playlist_info_data.id,
+                    uid=uid,
+                    name=playlist_info_data.name,
+                    desc=playlist_info_data.desc,
+                    image_url=playlist_info_data.image_url,
+                    num_tracks=playlist_info_data.num_tracks,
+                    created_at=playlist_info_data.created_at,
+                    updated_at=playlist_info_data.updated_at,
+                )
+                for playlist_info_data, _ in rows[:limit]
+            ]
 
-        in_exp = PlaylistInfoDataModel.id.in_(playlist_ids)
-        playlist_info_datas = self.db.session.query(PlaylistInfoDataModel) \
-            .filter(in_exp)
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                playlist_info_data, value = rows[limit - 1]
+                next_cursor = self._encode_cursor(
+                    sort,
+                    descending,
+                    value,
+                    playlist_info_data.id,
+                )
 
-        playlist_infos = [
-            PlaylistInfo(
-                id=playlist_info_data.id,
-                uid=uid,
-                name=playlist_info_data.name,
-                desc=playlist_info_data.desc,
-                image_url=playlist_info_data.image_url,
-                num_tracks=playlist_info_data.num_tracks,
-                created_at=playlist_info_data.created_at,
-                updated_at=playlist_info_data.updated_at,
+            return PlaylistInfoPage(
+                playlist_infos=playlist_infos,
+                next_cursor=next_cursor,
             )
-            for playlist_info_data in playlist_info_datas
-        ]
-        return playlist_infos
 
-    def get_playlist(self, playlist_id: str) -> Optional[Playlist]:
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            self.logger.error(f"failed to get playlist infos: {e}")
+            raise e
+
+        finally:
+            self.db.session.close()
+
+    def _encode_cursor(
+        self,
+        sort: str,
+        descending: bool,
+        value: Union[datetime, str, int],
+        playlist_id: str,
+    ) -> str:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        position = json.dumps([sort, descending, value, playlist_id])
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def _decode_cursor(
+        self,
+        cursor: str,
+        sort: str,
+        descending: bool,
+    ) -> Optional[Tuple[Union[datetime, str, int], str]]:
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            sort_, descending_, value, playlist_id = position
+            if sort == "updated_at":
+                value = datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+
+        # a cursor is only valid for the sort of the page it was made for
+        if sort_ != sort or descending_ != descending:
+            return None
+        if not isinstance(value, {"name": str, "num_tracks": int}.get(sort, datetime)):
+            return None
+        if not isinstance(playlist_id, str):
+            return None
+        return value, playlist_id
+
+    def get_playlist(
+        self,
+        playlist_id: str,
+        stored_only: bool = False,
+    ) -> Optional[Playlist]:
         playlist_info = self.get_playlist_info(playlist_id)
         if playlist_info is None:
             return None
 
-        playlist_tracks = self.get_playlist_tracks(playlist_id)
+        playlist_tracks = self.get_playlist_tracks(playlist_id, stored_only)
         return Playlist(playlist_info=playlist_info, playlist_tracks=playlist_tracks)
 
     def get_playlist_info(self, playlist_id: str) -> Optional[PlaylistInfo]:
@@ -106,12 +206,25 @@ class PlaylistRepositoryImpl(PlaylistRepository):
                 spotify_id = playlist_track_data.spotify_id
                 track = self.track_repository.get_track_by_id(spotify_id)
 
+                # the order is the number of tracks ranked before it plus one
+                num_before = self.db.session.query(PlaylistTrackDataModel) \
+                    .filter_by(playlist_id=playlist_track_data.playlist_id) \
+                    .filter(or_(
+                        PlaylistTrackDataModel.rank < playlist_track_data.rank,
+                        and_(
+                            PlaylistTrackDataModel.rank == playlist_track_data.rank,
+                            PlaylistTrackDataModel.id < playlist_track_data.id,
+                        ),
+                    )) \
+                    .count()
+
                 return PlaylistTrack(
                     id=playlist_track_data.id,
-                    order=playlist_track_data.order,
+                    order=num_before + 1,
                     track=track,
                     created_at=playlist_track_data.created_at,
                     updated_at=playlist_track_data.updated_at,
+                    rank=playlist_track_data.rank,
                 )
 
         except SQLAlchemyError as e:
@@ -122,11 +235,16 @@ class PlaylistRepositoryImpl(PlaylistRepository):
         finally:
             self.db.session.close()
 
-    def get_playlist_tracks(self, playlist_id: str) -> List[PlaylistTrack]:
+    def get_playlist_tracks(
+        self,
+        playlist_id: str,
+        stored_only: bool = False,
+    ) -> List[PlaylistTrack]:
         try:
             playlist_track_datas = self.db.session.query(PlaylistTrackDataModel) \
                 .filter_by(playlist_id=playlist_id) \
-                .order_by(PlaylistTrackDataModel.order)
+                .order_by(PlaylistTrackDataModel.rank, PlaylistTrackDataModel.id) \
+                .all()
 
             track_ids = [
                 playlist_track_data.spotify_id
@@ -136,15 +254,19 @@ class PlaylistRepositoryImpl(PlaylistRepository):
             if len(track_ids) == 0:
                 return []
 
-            tracks = self.track_repository.get_tracks_by_ids(track_ids)
+            if stored_only:
+                tracks = self.track_repository.get_stored_tracks_by_ids(track_ids)
+            else:
+                tracks = self.track_repository.get_tracks_by_ids(track_ids)
 
             return [
                 PlaylistTrack(
                     id=playlist_track_data.id,
                     track=tracks[idx],
-                    order=playlist_track_data.order,
+                    order=idx + 1,
                     created_at=playlist_track_data.created_at,
                     updated_at=playlist_track_data.updated_at,
+                    rank=playlist_track_data.rank,
                 )
                 for idx, playlist_track_data in enumerate(playlist_track_datas)
             ]
@@ -159,18 +281,37 @@ class PlaylistRepositoryImpl(PlaylistRepository):
 
     def save_playlist(self, playlist: Playlist) -> None:
         playlist_info = playlist.playlist_info
-        old_playlist_tracks = self.get_playlist_tracks(playlist_info.id)
+        ranks = [playlist_track.rank for playlist_track in playlist.playlist_tracks]
+        # ranks get longer when tracks are moved between the same tracks many times,
+        # so they are given again before a long one is written
+        if None in ranks or needs_rebalance(ranks):
+            ranks = spread_ranks(len(ranks))
         try:
-            playlist_info_data = PlaylistInfoDataModel(
-                id=playlist_info.id,
-                name=playlist_info.name,
-                desc=playlist_info.desc,
-                image_url=playlist_info.image_url,
-                num_tracks=playlist_info.num_tracks,
-                created_at=playlist_info.created_at,
-                updated_at=playlist_info.updated_at,
-            )
-            self.db.session.merge(playlist_info_data)
+            # only ids and ranks of the stored rows are needed to find the changed
+            # rows, so the tracks are not fetched from Spotify
+            stored_rows = self.db.session.query(
+                PlaylistTrackDataModel.id,
+                PlaylistTrackDataModel.spotify_id,
+                PlaylistTrackDataModel.rank,
+            ) \
+                .filter_by(playlist_id=playlist_info.id) \
+                .all()
+            stored = {
+                id_: (spotify_id, rank) for id_, spotify_id, rank in stored_rows
+            }
+
+            upsert(self.db.session, PlaylistInfoDataModel, [
+                {
+                    "id": playlist_info.id,
+                    "uid": playlist_info.uid,
+                    "name": playlist_info.name,
+                    "desc": playlist_info.desc,
+                    "image_url": playlist_info.image_url,
+                    "num_tracks": playlist_info.num_tracks,
+                    "created_at": playlist_info.created_at,
+                    "updated_at": playlist_info.updated_at,
+                },
+            ], ["name", "desc", "image_url", "num_tracks", "updated_at"])
 
             user_playlist_info_data = UserPlaylistDataModel(
                 playlist_id=playlist_info.id,
@@ -178,28 +319,41 @@ class PlaylistRepositoryImpl(PlaylistRepository):
             )
             self.db.session.merge(user_playlist_info_data)
 
-            # upsert playlist_track
-            for playlist_track in playlist.playlist_tracks:
-                playlist_track_data = PlaylistTrackDataModel(
-                    id=playlist_track.id,
-                    playlist_id=playlist_info.id,
-                    spotify_id=playlist_track.track.spotify_id,
-                    order=playlist_track.order,
-                    created_at=playlist_track.created_at,
-                    updated_at=playlist_track.updated_at,
-                )
-                self.db.session.merge(playlist_track_data)
+            # upsert playlist_track which is added or moved in bulk
+            playlist_track_rows = []
+            for playlist_track, rank in zip(playlist.playlist_tracks, ranks):
+                # id of a new playlist_track is uuid.UUID
+                playlist_track_id = str(playlist_track.id)
+                row = (playlist_track.track.spotify_id, rank)
+                if stored.get(playlist_track_id) == row:
+                    continue
+
+                playlist_track_rows.append({
+                    "id": playlist_track_id,
+                    "playlist_id": playlist_info.id,
+                    "spotify_id": playlist_track.track.spotify_id,
+                    "rank": rank,
+                    "created_at": playlist_track.created_at,
+                    "updated_at": playlist_track.updated_at,
+                })
+            upsert(
+                self.db.session,
+                PlaylistTrackDataModel,
+                playlist_track_rows,
+                ["playlist_id", "spotify_id", "rank", "updated_at"],
+            )
 
             # delete playlist_track
-            old_ids = set(map(lambda x: x.id, old_playlist_tracks))
-            new_ids = set(map(lambda x: x.id, playlist.playlist_tracks))
-            delete_playlist_track_ids = old_ids - new_ids
+            new_ids = {
+                str(playlist_track.id) for playlist_track in playlist.playlist_tracks
+            }
+            delete_playlist_track_ids = set(stored) - new_ids
 
             if len(delete_playlist_track_ids) > 0:
                 in_exp = PlaylistTrackDataModel.id.in_(delete_playlist_track_ids)
-                playlist_track_data = self.db.session.query(PlaylistTrackDataModel) \
+                self.db.session.query(PlaylistTrackDataModel) \
                     .filter(in_exp) \
-                    .delete()
+                    .delete(synchronize_session=False)
 
             self.db.session.commit()
 
@@ -211,10 +365,311 @@ class PlaylistRepositoryImpl(PlaylistRepository):
         finally:
             self.db.session.close()
 
+    def save_track_orders(self, playlist: Playlist) -> None:
+        playlist_info = playlist.playlist_info
+        if needs_rebalance([
+            playlist_track.rank for playlist_track in playlist.playlist_tracks
+        ]):
+            playlist = playlist.rebalance()
+        try:
+            self.db.session.query(PlaylistInfoDataModel) \
+                .filter_by(id=playlist_info.id) \
+                .update(
+                    {
+                        "image_url": playlist_info.image_url,
+                        "updated_at": playlist_info.updated_at,
+                    },
+                    synchronize_session=False,
+                )
+
+            # all ranks are written by one statement instead of a merge per track
+            playlist_tracks = {
+                playlist_track.id: playlist_track
+                for playlist_track in playlist.playlist_tracks
+            }
+            if len(playlist_tracks) > 0:
+                track_id = PlaylistTrackDataModel.id
+                self.db.session.query(PlaylistTrackDataModel) \
+                    .filter(PlaylistTrackDataModel.playlist_id == playlist_info.id) \
+                    .filter(track_id.in_(playlist_tracks)) \
+                    .update(
+                        {
+                            "rank": case(
+                                {
+                                    id_: playlist_track.rank
+                                    for id_, playlist_track in playlist_tracks.items()
+                                },
+                                value=track_id,
+                            ),
+                            "updated_at": case(
+                                {
+                                    id_: playlist_track.updated_at
+                                    for id_, playlist_track in playlist_tracks.items()
+                                },
+                                value=track_id,
+                            ),
+                        },
+                        synchronize_session=False,
+                    )
+
+            self.db.session.commit()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            self.logger.error(f"failed to save track orders: {e}")
+            raise e
+
+        finally:
+            self.db.session.close()
+
+    def add_playlist_track(
+        self,
+        playlist_id: str,
+        track: Track,
+    ) -> Optional[PlaylistTrack]:
+        try:
+            # the playlist is locked so that tracks added at the same time get
+            # different ranks and num_tracks counts all of them
+            playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+                .filter_by(id=playlist_id) \
+                .with_for_update() \
+                .first()
+            if playlist_info_data is None:
+                self.db.session.rollback()
+                return None
+
+            last_rank = self.db.session.query(func.max(PlaylistTrackDataModel.rank)) \
+                .filter_by(playlist_id=playlist_id) \
+                .scalar()
+            if needs_rebalance([rank_between(last_rank, None)]):
+                ranks = self._rebalance_ranks(playlist_id)
+                last_rank = ranks[-1]
+            now = datetime.utcnow()
+            playlist_track = PlaylistTrack(
+                id=str(uuid.uuid4()),
+                order=playlist_info_data.num_tracks + 1,
+                track=track,
+                created_at=now,
+                updated_at=now,
+                rank=rank_between(last_rank, None),
+            )
+            self.db.session.add(PlaylistTrackDataModel(
+                id=playlist_track.id,
+                playlist_id=playlist_id,
+                spotify_id=track.spotify_id,
+                rank=playlist_track.rank,
+                created_at=now,
+                updated_at=now,
+            ))
+
+            # image_url is the one of the first track, which is the new track only
+            # when the playlist was empty
+            values = {
+                "num_tracks": PlaylistInfoDataModel.num_tracks + 1,
+                "updated_at": now,
+            }
+            if last_rank is None:
+                values["image_url"] = track.image_url
+            self.db.session.query(PlaylistInfoDataModel) \
+                .filter_by(id=playlist_id) \
+                .update(values, synchronize_session=False)
+
+            self.db.session.commit()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            self.logger.error(f"failed to add playlist track: {e}")
+            raise e
+
+        finally:
+            self.db.session.close()
+
+        return playlist_track
+
+    def delete_playlist_track(
+        self,
+        playlist_id: str,
+        playlist_track_id: str,
+    ) -> Optional[PlaylistInfo]:
+        # spotify id of the new first track whose image is not in the track table
+        missing_image_id = None
+        try:
+            # the playlist is locked so that concurrent changes of the tracks keep
+            # num_tracks and image_url consistent
+            playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+                .filter_by(id=playlist_id) \
+                .with_for_update() \
+                .first()
+            if playlist_info_data is None:
+                self.db.session.rollback()
+                return None
+
+            first_id = self.db.session.query(PlaylistTrackDataModel.id) \
+                .filter_by(playlist_id=playlist_id) \
+                .order_by(PlaylistTrackDataModel.rank, PlaylistTrackDataModel.id) \
+                .limit(1) \
+                .scalar()
+            num_deleted = self.db.session.query(PlaylistTrackDataModel) \
+                .filter_by(id=playlist_track_id, playlist_id=playlist_id) \
+                .delete(synchronize_session=False)
+            if num_deleted == 0:
+                self.db.session.rollback()
+                return None
+
+            # orders are positions by rank, so the other rows are not changed and
+            # image_url changes only when the first track is deleted
+            image_url = playlist_info_data.image_url
+            if first_id == playlist_track_id:
+                spotify_id, stored_image_url = self._get_first_track_image(playlist_id)
+                if spotify_id is None:
+                    image_url = None
+                elif stored_image_url is None:
+                    missing_image_id = spotify_id
+                else:
+                    image_url = stored_image_url
+
+            updated_at = datetime.utcnow()
+            self.db.session.query(PlaylistInfoDataModel) \
+                .filter_by(id=playlist_id) \
+                .update(
+                    {
+                        "num_tracks": PlaylistInfoDataModel.num_tracks - 1,
+                        "image_url": image_url,
+                        "updated_at": updated_at,
+                    },
+                    synchronize_session=False,
+                )
+            uid = self.db.session.query(UserPlaylistDataModel.uid) \
+                .filter_by(playlist_id=playlist_id) \
+                .scalar()
+
+            playlist_info = PlaylistInfo(
+                id=playlist_info_data.id,
+                uid=uid,
+                name=playlist_info_data.name,
+                desc=playlist_info_data.desc,
+                image_url=image_url,
+                num_tracks=playlist_info_data.num_tracks - 1,
+                created_at=playlist_info_data.created_at,
+                updated_at=updated_at,
+            )
+            self.db.session.commit()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            self.logger.error(f"failed to delete playlist track: {e}")
+            raise e
+
+        finally:
+            self.db.session.close()
+
+        if missing_image_id is not None:
+            image_url = self._update_first_image_url(playlist_id, missing_image_id)
+            if image_url is not None:
+                playlist_info = replace(playlist_info, image_url=image_url)
+
+        return playlist_info
+
+    def _get_first_track_image(
+        self,
+        playlist_id: str,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Get spotify_id of the first track in the playlist and its image_url in
+        the track table, which is None when the track is not stored there. Both are
+        None when the playlist has no track.
+        """
+        row = self.db.session.query(
+            PlaylistTrackDataModel.spotify_id,
+            TrackDataModel.image_url,
+        ) \
+            .outerjoin(
+                TrackDataModel,
+                TrackDataModel.spotify_id == PlaylistTrackDataModel.spotify_id,
+            ) \
+            .filter(PlaylistTrackDataModel.playlist_id == playlist_id) \
+            .order_by(PlaylistTrackDataModel.rank, PlaylistTrackDataModel.id) \
+            .first()
+        if row is None:
+            return None, None
+        return row.spotify_id, row.image_url
+
+    def _update_first_image_url(
+        self,
+        playlist_id: str,
+        spotify_id: str,
+    ) -> Optional[str]:
+        """Set image_url of the playlist to that of the track from the caches or
+        Spotify. The track is looked up after the playlist is unlocked, and
+        image_url is kept as it is when the lookup fails.
+        """
+        try:
+            track = self.track_repository.get_track_by_id(spotify_id)
+        except Exception as e:
+            self.logger.warning(f"failed to get image of a track({spotify_id}): {e}")
+            return None
+
+        if track is None:
+            self.logger.warning(f"no track({spotify_id}) for the playlist image")
+            return None
+
+        try:
+            # the first track may have been changed during the lookup
+            self.db.session.query(PlaylistInfoDataModel.id) \
+                .filter_by(id=playlist_id) \
+                .with_for_update() \
+                .first()
+            first_spotify_id, _ = self._get_first_track_image(playlist_id)
+            if first_spotify_id != spotify_id:
+                self.db.session.rollback()
+                return None
+
+            self.db.session.query(PlaylistInfoDataModel) \
+                .filter_by(id=playlist_id) \
+                .update({"image_url": track.image_url}, synchronize_session=False)
+            self.db.session.commit()
+            return track.image_url
+
+        # the track is already deleted, so the old image is kept instead of failing
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            self.logger.error(f"failed to update image_url of the playlist: {e}")
+            return None
+
+        finally:
+            self.db.session.close()
+
+    def _rebalance_ranks(self, playlist_id: str) -> List[str]:
+        """Give the new ranks in the transaction of the session without committing
+        it and return them in ascending order
+        """
+        # the rows are locked so that a track moved meanwhile is not overwritten
+        playlist_track_ids = [
+            id_
+            for id_, in self.db.session.query(PlaylistTrackDataModel.id)
+            .filter_by(playlist_id=playlist_id)
+            .order_by(PlaylistTrackDataModel.rank, PlaylistTrackDataModel.id)
+            .with_for_update()
+        ]
+        ranks = spread_ranks(len(playlist_track_ids))
+        if len(playlist_track_ids) > 0:
+            self.db.session.query(PlaylistTrackDataModel) \
+                .filter(PlaylistTrackDataModel.id.in_(playlist_track_ids)) \
+                .update(
+                    {
+                        "rank": case(
+                            dict(zip(playlist_track_ids, ranks)),
+                            value=PlaylistTrackDataModel.id,
+                        ),
+                    },
+                    synchronize_session=False,
+                )
+        return ranks
+
     def save_playlist_info(self, playlist_info: PlaylistInfo) -> None:
         try:
             playlist_info_data = PlaylistInfoDataModel(
                 id=playlist_info.id,
+                uid=playlist_info.uid,
                 name=playlist_info.name,
                 desc=playlist_info.desc,
                 image_url=playlist_info.image_url,
@@ -1,27 +1,85 @@
+import gzip
+import hashlib
 from injector import inject, singleton
 import json
-from redis import Redis
+from typing import Optional
 
+from domain.model.ranking import RankingPayload
 from interface.repository.ranking_repository import RankingRepository
+from persistence.binary_redis import BinaryRedis
+from persistence.redis_lock import RedisLock
 
 
 @singleton
 class RankingRepositoryImpl(RankingRepository):
+    """Ranking of each chart is stored as ready-to-send json and its gzip variant,
+    each prefixed with the ttl and the etag, so that a request is served by one GET
+    without any json encoding or decoding.
+    """
+
     @inject
-    def __init__(self, redis: Redis) -> None:
+    def __init__(self, redis: BinaryRedis) -> None:
         self.redis = redis
+        self.redis_lock = RedisLock(redis)
+
+    def _key(self, chart: str, name: str) -> str:
+        return f"ranking:{chart}:{name}"
+
+    def create(self, ranking: list, ttl: float, chart: str = "global") -> None:
+        body = json.dumps(ranking, separators=(",", ":")).encode("utf-8")
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        compressed = gzip.compress(body, mtime=0)
+
+        pipeline = self.redis.pipeline()
+        pipeline.set(self._key(chart, "json"), self._dump(ttl, etag, body))
+        # the etag differs between the representations of the same ranking
+        pipeline.set(
+            self._key(chart, "gzip"),
+            self._dump(ttl, f"{etag}-gzip", compressed),
+        )
+        pipeline.execute()
+
+    def _dump(self, ttl: float, etag: str, body: bytes) -> bytes:
+        return f"{ttl}\n{etag}\n".encode() + body
+
+    def exist(self, chart: str = "global") -> bool:
+        return self.redis.exists(self._key(chart, "json")) > 0
+
+    def get(self, chart: str = "global") -> dict:
+        return json.loads(self.get_payload(False, chart).body)
+
+    def get_ttl(self, chart: str = "global") -> float:
+        return self.get_payload(False, chart).ttl
+
+    def get_payload(
+        self,
+        compressed: bool,
+        chart: str = "global",
+    ) -> Optional[RankingPayload]:
+        value = self.redis.get(self._key(chart, "gzip" if compressed else "json"))
+        if value is None:
+            return None
+
+        ttl, etag, body = value.split(b"\n", 2)
+        return RankingPayload(
+            body=body,
+            etag=etag.decode(),
+            ttl=float(ttl),
+            content_encoding="gzip" if compressed else None,
+        )
 
-    def create(self, ranking: list, ttl: float) -> None:
-        ranking_str = json.dumps(ranking)
-        self.redis.hset("ranking", "ranking", ranking_str)
-        self.redis.hset("ranking", "ttl", ttl)
+    def acquire_lock(self, timeout: float, chart: str = "global") -> Optional[str]:
+        return self.redis_lock.acquire(self._key(chart, "lock"), int(timeout * 1000))
 
-    def exist(self) -> bool:
-        return self.redis.exists("ranking")
+    def release_lock(self, token: str, chart: str = "global") -> None:
+        self.redis_lock.release(self._key(chart, "lock"), token)
 
-    def get(self) -> dict:
-        ranking_str = self.redis.hget("ranking", "ranking")
-        return json.loads(ranking_str)
+    def set_rebuild_failed(self, cooldown: float, chart: str = "global") -> None:
+        self.redis.set(
+            self._key(chart, "rebuild_failed"),
+            1,
+            px=max(int(cooldown * 1000), 1),
+        )
 
-    def get_ttl(self) -> float:
-        return float(self.redis.hget("ranking", "ttl"))
+    def is_rebuild_failed(self, chart: str = "global") -> bool:
+        return self.redis.exists(self._key(chart, "rebuild_failed")) > 0
@@ -0,0 +1,203 @@
+from logging import Logger
+import math
+import threading
+import time
+from typing import Optional
+
+from injector import inject, singleton
+from redis import Redis
+from redis.exceptions import RedisError
+
+from domain.model.rate_limit import (
+    BACKGROUND,
+    current_priority,
+    INTERACTIVE,
+    SpotifyRateLimitError,
+)
+from envs import Envs
+
+# KEYS[1]: hash of the bucket, KEYS[2]: key alive while Spotify asks to back off
+# ARGV: refill rate per second, capacity, now in ms, tokens to keep for others
+# returns {allowed, milliseconds to wait, tokens left}
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local allowed = 0
+local wait = redis.call("PTTL", KEYS[2])
+if wait <= 0 then
+    wait = 0
+    if tokens - 1 >= reserve then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        wait = math.ceil((reserve + 1 - tokens) * 1000 / rate)
+    end
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, wait, math.floor(tokens)}
+"""
+
+
+@singleton
+class RateLimiter:
+    """Token bucket shared by all gunicorn workers through redis.
+
+    Each request to Spotify takes a token. Interactive requests wait for a short
+    time and are shed when the bucket stays empty, while background requests wait
+    longer but never take the last tokens reserved for interactive requests.
+    When Spotify answers 429, every worker stops sending for Retry-After seconds.
+    """
+
+    BUCKET_KEY = "spotify:rate_limit:bucket"
+    BLOCK_KEY = "spotify:rate_limit:blocked"
+
+    @inject
+    def __init__(self, envs: Envs, logger: Logger, redis: Redis) -> None:
+        self.logger = logger
+        self.redis = redis
+        self.enabled = envs.SPOTIFY_RATE_LIMIT
+        self.rate = envs.SPOTIFY_RATE_LIMIT_RATE
+        self.capacity = envs.SPOTIFY_RATE_LIMIT_CAPACITY
+        self.reserves = {
+            INTERACTIVE: 0,
+            BACKGROUND: envs.SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE,
+        }
+        self.max_waits = {
+            INTERACTIVE: envs.SPOTIFY_RATE_LIMIT_INTERACTIVE_MAX_WAIT,
+            BACKGROUND: envs.SPOTIFY_RATE_LIMIT_BACKGROUND_MAX_WAIT,
+        }
+        self.script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+        # Retry-After is kept in this worker as well in case redis is unavailable
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"allowed": 0, "waited": 0, "shed": 0, "throttled": 0}
+
+    def acquire(self, priority: Optional[str] = None) -> None:
+        """Wait until a request can be sent to Spotify
+
+        Args:
+            priority (Optional[str]): INTERACTIVE or BACKGROUND. The priority of
+                the current context is used if not specified.
+
+        Raises:
+            SpotifyRateLimitError: when the request would wait longer than allowed
+                for the priority
+        """
+        priority = priority or current_priority()
+        deadline = time.monotonic() + self.max_waits[priority]
+        waited = False
+        while True:
+            wait = self._take(priority)
+            if wait <= 0:
+                self._count("waited" if waited else "allowed")
+                return
+
+            if time.monotonic() + wait > deadline:
+                self._count("shed")
+                self.logger.warning(
+                    f"shed {priority} request to spotify, retry after {wait:.2f}s"
+                )
+                raise SpotifyRateLimitError(retry_after=math.ceil(wait))
+
+            waited = True
+            time.sleep(wait)
+
+    def _take(self, priority: str) -> float:
+        """Take a token and return seconds to wait before retrying, or 0 if taken"""
+        local_wait = self._blocked_until - time.monotonic()
+        if local_wait > 0:
+            return local_wait
+        if not self.enabled:
+            return 0
+
+        try:
+            allowed, wait_ms, _ = self.script(
+                keys=[self.BUCKET_KEY, self.BLOCK_KEY],
+                args=[
+                    self.rate,
+                    self.capacity,
+                    int(time.time() * 1000),
+                    self.reserves[priority],
+                ],
+            )
+        except RedisError as e:
+            self.logger.warning(f"failed to take spotify rate limit token: {e}")
+            return 0
+
+        return 0 if allowed == 1 else max(wait_ms, 1) / 1000
+
+    def block(self, retry_after: float) -> None:
+        """Stop sending requests to Spotify for retry_after seconds
+
+        Args:
+            retry_after (float): value of the Retry-After header
+        """
+        self._count("throttled")
+        with self._lock:
+            self._blocked_until = max(
+                self._blocked_until,
+                time.monotonic() + retry_after,
+            )
+        if not self.enabled:
+            return
+
+        try:
+            self.redis.set(self.BLOCK_KEY, 1, px=max(int(retry_after * 1000), 1))
+        except RedisError as e:
+            self.logger.warning(f"failed to share spotify Retry-After: {e}")
+
+    def max_wait(self, priority: Optional[str] = None) -> float:
+        return self.max_waits[priority or current_priority()]
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> dict:
+        """Get the current budget shared by all workers and the counts of this
+        worker
+
+        Returns:
+            dict: rate limit statistics
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats["enabled"] = self.enabled
+        stats["capacity"] = self.capacity
+        stats["rate"] = self.rate
+        stats["tokens"] = None
+        stats["blocked_ms"] = max(
+            int((self._blocked_until - time.monotonic()) * 1000), 0
+        )
+        if not self.enabled:
+            return stats
+
+        try:
+            tokens, ts = self.redis.hmget(self.BUCKET_KEY, ["tokens", "ts"])
+            blocked_ms = self.redis.pttl(self.BLOCK_KEY)
+        except RedisError as e:
+            self.logger.warning(f"failed to get spotify rate limit budget: {e}")
+            return stats
+
+        if tokens is None:
+            stats["tokens"] = self.capacity
+        else:
+            elapsed = max(time.time() * 1000 - float(ts), 0)
+            stats["tokens"] = min(
+                self.capacity,
+                float(tokens) + elapsed * self.rate / 1000,
+            )
+        stats["blocked_ms"] = max(stats["blocked_ms"], blocked_ms)
+        return stats
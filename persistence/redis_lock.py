@@ -0,0 +1,51 @@
+from typing import Optional
+import uuid
+
+from redis import Redis
+
+# KEYS[1]: lock key, ARGV[1]: token stored by the holder
+# the lock is deleted only if it is still held with the token, since it may have
+# expired and been taken by another worker
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLock:
+    """Lock shared between workers, which holds a unique token so that only the
+    holder can release it
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self.script = redis.register_script(RELEASE_LOCK_SCRIPT)
+
+    def acquire(self, key: str, timeout_ms: int) -> Optional[str]:
+        """Take the lock if nobody holds it
+
+        Args:
+            key (str): lock key
+            timeout_ms (int): milliseconds after which the lock expires
+
+        Returns:
+            Optional[str]: token to release the lock. None if it is held by another.
+        """
+        token = uuid.uuid4().hex
+        if self.redis.set(key, token, nx=True, px=timeout_ms):
+            return token
+        return None
+
+    def release(self, key: str, token: str) -> bool:
+        """Release the lock in one round trip if it is still held with the token
+
+        Args:
+            key (str): lock key
+            token (str): token returned by acquire
+
+        Returns:
+            bool: True if the lock is released
+        """
+        return self.script(keys=[key], args=[token]) == 1
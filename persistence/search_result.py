@@ -0,0 +1,62 @@
+import hashlib
+import json
+from logging import Logger
+import re
+from typing import List, Optional
+import unicodedata
+
+from injector import inject, singleton
+from redis import Redis
+from redis.exceptions import RedisError
+
+from envs import Envs
+from interface.repository.search_result_repository import SearchResultRepository
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so that equivalent queries have the same form.
+    Full-width characters are converted to half-width ones by NFKC, the case is
+    folded and runs of whitespace are collapsed into one space.
+
+    Args:
+        query (str): search query
+
+    Returns:
+        str: normalized query
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return re.sub(r"\s+", " ", query).strip()
+
+
+@singleton
+class SearchResultRepositoryImpl(SearchResultRepository):
+    @inject
+    def __init__(self, envs: Envs, logger: Logger, redis: Redis) -> None:
+        self.logger = logger
+        self.redis = redis
+        self.ttl = envs.SEARCH_CACHE_TTL
+        self.negative_ttl = envs.SEARCH_CACHE_NEGATIVE_TTL
+
+    def _key(self, query: str) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode()).hexdigest()
+        return f"search:{digest}"
+
+    def get(self, query: str) -> Optional[List[str]]:
+        try:
+            value = self.redis.get(self._key(query))
+        except RedisError as e:
+            self.logger.warning(f"failed to get search result from cache: {e}")
+            return None
+
+        if value is None:
+            return None
+
+        return json.loads(value)
+
+    def save(self, query: str, spotify_ids: List[str]) -> None:
+        # a query without result is cached for a shorter time
+        ttl = self.ttl if len(spotify_ids) > 0 else self.negative_ttl
+        try:
+            self.redis.setex(self._key(query), ttl, json.dumps(spotify_ids))
+        except RedisError as e:
+            self.logger.warning(f"failed to save search result to cache: {e}")
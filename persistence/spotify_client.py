@@ -0,0 +1,330 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+from logging import Logger
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from injector import inject, singleton
+from redis import Redis
+from redis.exceptions import RedisError
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from domain.model.rate_limit import (
+    current_priority,
+    priority,
+    SpotifyRateLimitError,
+)
+from envs import Envs
+from persistence.rate_limiter import RateLimiter
+from persistence.redis_lock import RedisLock
+from persistence.singleflight import SingleFlight
+
+
+class _StatsMixin:
+    """Count whether a connection checked out of the pool is already open.
+    A connection without socket has to do TCP (and TLS) handshake again.
+    """
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        if getattr(conn, "sock", None) is None:
+            self.num_misses = getattr(self, "num_misses", 0) + 1
+        else:
+            self.num_hits = getattr(self, "num_hits", 0) + 1
+        return conn
+
+
+class _HTTPConnectionPool(_StatsMixin, HTTPConnectionPool):
+    pass
+
+
+class _HTTPSConnectionPool(_StatsMixin, HTTPSConnectionPool):
+    pass
+
+
+@singleton
+class SpotifyClient:
+    """HTTP client shared by every component that talks to Spotify.
+
+    One requests.Session is kept per worker so that TCP and TLS connections to
+    api.spotify.com and accounts.spotify.com are reused across requests instead of
+    being opened for every call.
+    """
+
+    @inject
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        redis: Redis,
+        rate_limiter: RateLimiter,
+    ) -> None:
+        self.envs = envs
+        self.logger = logger
+        self.redis = redis
+        self.redis_lock = RedisLock(redis)
+        self.rate_limiter = rate_limiter
+        self.max_retries = envs.SPOTIFY_RATE_LIMIT_MAX_RETRIES
+        self.api_url = envs.SPOTIFY_API_URL.rstrip("/")
+        self.accounts_url = envs.SPOTIFY_ACCOUNTS_URL.rstrip("/")
+        self.timeout = envs.SPOTIFY_TIMEOUT
+
+        # pool_connections is the number of hosts to keep pools for and pool_maxsize
+        # is the number of connections kept alive per host.
+        self.adapter = HTTPAdapter(
+            pool_connections=envs.SPOTIFY_POOL_CONNECTIONS,
+            pool_maxsize=envs.SPOTIFY_POOL_MAXSIZE,
+            pool_block=envs.SPOTIFY_POOL_BLOCK,
+        )
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            "http": _HTTPConnectionPool,
+            "https": _HTTPSConnectionPool,
+        }
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        if not envs.SPOTIFY_KEEP_ALIVE:
+            self.session.headers["Connection"] = "close"
+
+        # independent calls such as /tracks and /audio-features are sent at the same
+        # time on this pool when concurrent fetch is enabled
+        self.concurrent_fetch = envs.SPOTIFY_CONCURRENT_FETCH
+        self.executor = ThreadPoolExecutor(
+            max_workers=envs.SPOTIFY_MAX_CONCURRENCY,
+            thread_name_prefix="spotify",
+        )
+
+        # identical GET requests in flight are coalesced into one upstream call in
+        # this worker, and also across workers through redis if enabled
+        self.singleflight = SingleFlight()
+        self.shared_singleflight = envs.SPOTIFY_SINGLEFLIGHT_REDIS
+        self.singleflight_lock_timeout = envs.SPOTIFY_SINGLEFLIGHT_LOCK_TIMEOUT
+        self.singleflight_result_ttl = envs.SPOTIFY_SINGLEFLIGHT_RESULT_TTL
+
+        self._lock = threading.Lock()
+        self._num_requests = 0
+        self._num_coalesced = 0
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """Send GET request to Spotify Web API
+
+        Args:
+            path (str): path relative to the api root such as "/tracks"
+
+        Returns:
+            requests.Response: response from Spotify. The same object may be
+                returned to the concurrent callers with the same path and params.
+        """
+        url = f"{self.api_url}{path}"
+        params = kwargs.get("params") or {}
+        # the Authorization header is not a part of the key because every worker
+        # uses the same client credentials
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+        def call() -> requests.Response:
+            if self.shared_singleflight:
+                return self._get_shared(key, lambda: self.request("GET", url, **kwargs))
+            return self.request("GET", url, **kwargs)
+
+        response, shared = self.singleflight.do(key, call)
+        if shared:
+            with self._lock:
+                self._num_coalesced += 1
+        return response
+
+    def _get_shared(self, key: tuple, func: Callable[[], requests.Response]):
+        """Coalesce the call with the calls in other workers.
+        The worker which takes the redis lock calls Spotify and stores the response
+        in the result key and the other workers wait for the result key.
+        """
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        lock_key = f"singleflight:lock:{digest}"
+        result_key = f"singleflight:result:{digest}"
+
+        try:
+            response = self._load_response(result_key)
+            if response is not None:
+                return response
+
+            lock_timeout_ms = int(self.singleflight_lock_timeout * 1000)
+            lock_token = self.redis_lock.acquire(lock_key, lock_timeout_ms)
+            if lock_token is None:
+                response = self._wait_response(result_key, lock_key)
+                if response is not None:
+                    with self._lock:
+                        self._num_coalesced += 1
+                    return response
+                return func()
+
+        except RedisError as e:
+            self.logger.warning(f"failed to coalesce spotify request: {e}")
+            return func()
+
+        try:
+            response = func()
+            if response.status_code == requests.codes.ok:
+                self.redis.setex(
+                    result_key,
+                    self.singleflight_result_ttl,
+                    json.dumps({
+                        "status_code": response.status_code,
+                        "content": response.content.decode("utf-8"),
+                        "content_type": response.headers.get("Content-Type"),
+                    }),
+                )
+            return response
+
+        except RedisError as e:
+            self.logger.warning(f"failed to share spotify response: {e}")
+            return response
+
+        finally:
+            try:
+                self.redis_lock.release(lock_key, lock_token)
+            except RedisError:
+                pass
+
+    def _wait_response(
+        self,
+        result_key: str,
+        lock_key: str,
+    ) -> Optional[requests.Response]:
+        deadline = time.monotonic() + self.singleflight_lock_timeout
+        while time.monotonic() < deadline:
+            response = self._load_response(result_key)
+            if response is not None:
+                return response
+
+            # the leader failed without storing the result
+            if not self.redis.exists(lock_key):
+                return self._load_response(result_key)
+
+            time.sleep(0.01)
+
+        return None
+
+    def _load_response(self, result_key: str) -> Optional[requests.Response]:
+        value = self.redis.get(result_key)
+        if value is None:
+            return None
+
+        value = json.loads(value)
+        response = requests.Response()
+        response.status_code = value["status_code"]
+        response._content = value["content"].encode("utf-8")
+        response.encoding = "utf-8"
+        if value["content_type"] is not None:
+            response.headers["Content-Type"] = value["content_type"]
+        return response
+
+    def post_accounts(self, path: str, **kwargs) -> requests.Response:
+        """Send POST request to Spotify accounts service
+
+        Args:
+            path (str): path relative to the accounts root such as "/api/token"
+
+        Returns:
+            requests.Response: response from Spotify
+        """
+        return self.request("POST", f"{self.accounts_url}{path}", **kwargs)
+
+    def run_all(self, *funcs: Callable[[], Any]) -> List[Any]:
+        """Call the given functions and return their results in the same order.
+        The functions are called concurrently if concurrent fetch is enabled,
+        otherwise one after another.
+
+        Returns:
+            List[Any]: results of the functions
+        """
+        if not self.concurrent_fetch or len(funcs) <= 1:
+            return [func() for func in funcs]
+
+        # the priority of the caller is kept in the threads of the executor
+        caller_priority = current_priority()
+
+        def call(func: Callable[[], Any]) -> Any:
+            with priority(caller_priority):
+                return func()
+
+        futures = [self.executor.submit(call, func) for func in funcs]
+        return [future.result() for future in futures]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send request to Spotify within the rate limit.
+        A request answered with 429 is retried after Retry-After seconds if the
+        wait is allowed for the priority of the current context.
+
+        Raises:
+            SpotifyRateLimitError: when the request is shed by the rate limiter or
+                Spotify keeps answering 429
+
+        Returns:
+            requests.Response: response from Spotify
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for _ in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            with self._lock:
+                self._num_requests += 1
+
+            response = self.session.request(method, url, **kwargs)
+            if response.status_code != requests.codes.too_many_requests:
+                return response
+
+            retry_after = self._parse_retry_after(response)
+            self.logger.warning(f"spotify rate limit hit, retry after {retry_after}s")
+            self.rate_limiter.block(retry_after)
+
+        raise SpotifyRateLimitError(retry_after=retry_after)
+
+    def _parse_retry_after(self, response: requests.Response) -> float:
+        try:
+            return max(float(response.headers.get("Retry-After", 1)), 0)
+        except ValueError:
+            return 1
+
+    def _count_idle_connections(self, pool) -> int:
+        # the queue of a pool is filled with None up to maxsize, which stands for a
+        # connection not opened yet, so only the opened ones are counted
+        if not pool.pool:
+            return 0
+        return sum(conn is not None for conn in list(pool.pool.queue))
+
+    def get_stats(self) -> dict:
+        """Get statistics of the connection pools kept by this client.
+        A request served by an already opened connection is counted as a hit and
+        a request which had to open a new connection is counted as a miss.
+
+        Returns:
+            dict: pool statistics of this worker
+        """
+        pools = {}
+        pool_manager = self.adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            pools[host] = {
+                "requests": pool.num_requests,
+                "hits": getattr(pool, "num_hits", 0),
+                "misses": getattr(pool, "num_misses", 0),
+                "idle_connections": self._count_idle_connections(pool),
+                "max_connections": pool.pool.maxsize if pool.pool else 0,
+            }
+
+        num_hits = sum(pool["hits"] for pool in pools.values())
+        num_misses = sum(pool["misses"] for pool in pools.values())
+        return {
+            "requests": self._num_requests,
+            "coalesced": self._num_coalesced,
+            "hits": num_hits,
+            "misses": num_misses,
+            "pools": pools,
+            "rate_limit": self.rate_limiter.get_stats(),
+        }
@@ -1,32 +1,123 @@
+from functools import partial
 from logging import Logger
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 from injector import inject, singleton
 import requests
 
 from domain.model.track import Track
 from interface.repository.access_token_repository import AccessTokenRepository
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.spotify_client import SpotifyClient
+from persistence.track_base import (
+    chunk,
+    FEATURES_CHUNK_SIZE,
+    TRACKS_CHUNK_SIZE,
+    TrackRepositoryBase,
+)
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
 
 
 @singleton
-class TrackRepositoryImpl:
+class TrackRepositoryImpl(TrackRepositoryBase):
     @inject
-    def __init__(self, logger: Logger, access_token_repository: AccessTokenRepository):
-        self.logger = logger
-        self.access_token_repository = access_token_repository
+    def __init__(
+        self,
+        logger: Logger,
+        access_token_repository: AccessTokenRepository,
+        spotify_client: SpotifyClient,
+        feature_cache: FeatureCache,
+        track_cache: TrackCache,
+        track_catalog: TrackCatalog,
+        feature_index: FeatureIndex,
+        camelot_index: CamelotIndex,
+    ):
+        super().__init__(
+            logger,
+            access_token_repository,
+            feature_cache,
+            track_cache,
+            track_catalog,
+            feature_index,
+            camelot_index,
+        )
+        self.spotify_client = spotify_client
+
+    def _get(self, path: str, access_token: str, **kwargs) -> requests.Response:
+        """Send GET request to Spotify with the access token.
+        When Spotify rejects the token, it is discarded and the request is sent
+        once more with a new one.
+        """
+        response = self.spotify_client.get(
+            path,
+            headers={"Authorization": f"Bearer {access_token}"},
+            **kwargs,
+        )
+        if response.status_code != requests.codes.unauthorized:
+            return response
+
+        self.logger.warning("access token is rejected by spotify and renew it.")
+        self.access_token_repository.invalidate_access_token(access_token)
+        access_token = self.access_token_repository.get_access_token()
+        return self.spotify_client.get(
+            path,
+            headers={"Authorization": f"Bearer {access_token}"},
+            **kwargs,
+        )
 
     def _get_feature_by_id(
         self,
         spotify_id: str,
         access_token: str = None
     ) -> Optional[dict]:
+        feature = self.feature_cache.get_many([spotify_id])[0]
+        if feature is not None:
+            return feature
+
+        feature = self._fetch_feature_by_id(spotify_id, access_token)
+        if feature is not None:
+            self.feature_cache.set_many({spotify_id: feature})
+
+        return feature
+
+    def _get_features_by_ids(
+        self,
+        ids: List[str],
+        access_token: str = None,
+    ) -> List[Optional[dict]]:
+        """Get audio features from the cache and ask Spotify only for the ids
+        which are not cached. Missing ids are split into chunks which Spotify
+        accepts and the chunks are fetched concurrently.
+        """
+        ids = list(ids)
+        features = self.feature_cache.get_many(ids)
+
+        missing_ids = [id_ for id_, feature in zip(ids, features) if feature is None]
+        if len(missing_ids) == 0:
+            return features
+
+        feature_chunks = chunk(missing_ids, FEATURES_CHUNK_SIZE)
+        results = self.spotify_client.run_all(*[
+            partial(self._fetch_features_by_ids, feature_chunk, access_token)
+            for feature_chunk in feature_chunks
+        ])
+        return self._merge_features(ids, features, feature_chunks, results)
+
+    def _fetch_feature_by_id(
+        self,
+        spotify_id: str,
+        access_token: str = None
+    ) -> Optional[dict]:
 
         if access_token is None:
             access_token = self.access_token_repository.get_access_token()
 
-        response = requests.get(
-            f"https://api.spotify.com/v1/audio-features/{spotify_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
+        response = self._get(
+            f"/audio-features/{spotify_id}",
+            access_token,
         )
         body = response.json()
 
@@ -43,7 +134,7 @@ class TrackRepositoryImpl:
 
         return body
 
-    def _get_features_by_ids(
+    def _fetch_features_by_ids(
         self,
         ids: List[str],
         access_token: str = None,
@@ -52,9 +143,9 @@ class TrackRepositoryImpl:
         if access_token is None:
             access_token = self.access_token_repository.get_access_token()
 
-        response = requests.get(
-            "https://api.spotify.com/v1/audio-features",
-            headers={"Authorization": f"Bearer {access_token}"},
+        response = self._get(
+            "/audio-features",
+            access_token,
             params={
                 "ids": ",".join(ids),
             },
@@ -76,13 +167,18 @@ class TrackRepositoryImpl:
         features = body["audio_features"]
         return features
 
-    def get_track_by_id(self, track_id: str) -> Optional[Track]:
-        spotify_id = track_id
-        access_token = self.access_token_repository.get_access_token()
+    def _get_track_item_by_id(
+        self,
+        spotify_id: str,
+        access_token: str = None,
+    ) -> Optional[dict]:
 
-        response = requests.get(
-            f"https://api.spotify.com/v1/tracks/{spotify_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
+        if access_token is None:
+            access_token = self.access_token_repository.get_access_token()
+
+        response = self._get(
+            f"/tracks/{spotify_id}",
+            access_token,
         )
         body = response.json()
 
@@ -97,30 +193,22 @@ class TrackRepositoryImpl:
             self.logger.error(message)
             raise RuntimeError(message)
 
-        feature = self._get_feature_by_id(spotify_id)
-
-        return Track(
-            spotify_id=body["id"],
-            song_name=body["name"],
-            album_name=body["album"]["name"],
-            artist=body["artists"][0]["name"],
-            bpm=feature["tempo"],
-            key=feature["key"],
-            mode=feature["mode"],
-            image_url=body["album"]["images"][0]["url"],
-            preview_url=body["preview_url"],
-            danceability=feature["danceability"],
-            energy=feature["energy"],
-        )
+        return body
 
-    def get_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
-        access_token = self.access_token_repository.get_access_token()
+    def _get_track_items_by_ids(
+        self,
+        ids: List[str],
+        access_token: str = None,
+    ) -> List[Optional[dict]]:
 
-        response = requests.get(
-            "https://api.spotify.com/v1/tracks",
-            headers={"Authorization": f"Bearer {access_token}"},
+        if access_token is None:
+            access_token = self.access_token_repository.get_access_token()
+
+        response = self._get(
+            "/tracks",
+            access_token,
             params={
-                "ids": ",".join(track_ids),
+                "ids": ",".join(ids),
             },
         )
         body = response.json()
@@ -138,36 +226,90 @@ class TrackRepositoryImpl:
 
         # None is returned for a spotify id that does not exist in spotify
         items = body["tracks"]
-        features = self._get_features_by_ids(track_ids)
-
-        tracks = []
-        for idx, item in enumerate(items):
-            if item is None:
-                track = None
-            else:
-                track = Track(
-                    spotify_id=item["id"],
-                    song_name=item["name"],
-                    album_name=item["album"]["name"],
-                    artist=item["artists"][0]["name"],
-                    bpm=features[idx]["tempo"],
-                    key=features[idx]["key"],
-                    mode=features[idx]["mode"],
-                    image_url=item["album"]["images"][0]["url"],
-                    preview_url=item["preview_url"],
-                    danceability=features[idx]["danceability"],
-                    energy=features[idx]["energy"],
-                )
-            tracks.append(track)
+        return items
 
-        return tracks
+    def get_track_by_id(self, track_id: str) -> Optional[Track]:
+        spotify_id = track_id
+        track = self._get_stored_tracks([spotify_id])[0]
+        if track is not None:
+            return track
+
+        access_token = self.access_token_repository.get_access_token()
+
+        # track metadata and audio features do not depend on each other
+        item, feature = self.spotify_client.run_all(
+            lambda: self._get_track_item_by_id(spotify_id, access_token),
+            lambda: self._get_feature_by_id(spotify_id, access_token),
+        )
+
+        track = self._create_track(item, feature)
+        self._save_tracks([track])
+        return track
+
+    def get_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        track_ids = list(track_ids)
+        tracks = self._get_stored_tracks(track_ids)
+
+        missing_ids = [id_ for id_, track in zip(track_ids, tracks) if track is None]
+        if len(missing_ids) == 0:
+            return tracks
+
+        fetched_tracks = self._fetch_tracks_by_ids(missing_ids)
+        self._save_tracks(fetched_tracks)
+        fetched = dict(zip(missing_ids, fetched_tracks))
+        return [
+            fetched.get(id_) if track is None else track
+            for id_, track in zip(track_ids, tracks)
+        ]
+
+    def _fetch_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        """Fetch tracks from Spotify by any number of ids.
+        The ids are split into chunks which Spotify accepts and all requests for
+        track metadata and audio features are sent concurrently at once.
+        """
+        access_token = self.access_token_repository.get_access_token()
+
+        features = self.feature_cache.get_many(track_ids)
+        missing_feature_ids = [
+            id_ for id_, feature in zip(track_ids, features) if feature is None
+        ]
+
+        track_chunks = chunk(track_ids, TRACKS_CHUNK_SIZE)
+        feature_chunks = chunk(missing_feature_ids, FEATURES_CHUNK_SIZE)
+        calls: List[Callable] = [
+            partial(self._get_track_items_by_ids, track_chunk, access_token)
+            for track_chunk in track_chunks
+        ] + [
+            partial(self._fetch_features_by_ids, feature_chunk, access_token)
+            for feature_chunk in feature_chunks
+        ]
+        results = self.spotify_client.run_all(*calls)
+
+        items = []
+        for track_chunk, chunk_items in zip(track_chunks, results):
+            # Spotify rejects a whole chunk when it includes an invalid id
+            if len(chunk_items) == 0:
+                chunk_items = [None] * len(track_chunk)
+            items.extend(chunk_items)
+
+        features = self._merge_features(
+            track_ids,
+            features,
+            feature_chunks,
+            results[len(track_chunks):],
+        )
+
+        return [
+            self._create_track(item, feature)
+            for item, feature in zip(items, features)
+        ]
 
     def get_tracks_by_query(self, query: str) -> List[Track]:
         access_token = self.access_token_repository.get_access_token()
 
-        response = requests.get(
-            "https://api.spotify.com/v1/search",
-            headers={"Authorization": f"Bearer {access_token}"},
+        response = self._get(
+            "/search",
+            access_token,
             params={
                 "type": "track",
                 "q": query,
@@ -185,24 +327,68 @@ class TrackRepositoryImpl:
             self.logger.info("no search result for the specified query.")
             return []
 
-        ids = map(lambda item: item["id"], items)
-        features = self._get_features_by_ids(ids)
+        ids = [item["id"] for item in items]
+        features = self._get_features_by_ids(ids, access_token)
 
         tracks = [
-            Track(
-                spotify_id=item["id"],
-                song_name=item["name"],
-                album_name=item["album"]["name"],
-                artist=item["artists"][0]["name"],
-                bpm=features[idx]["tempo"],
-                key=features[idx]["key"],
-                mode=features[idx]["mode"],
-                image_url=item["album"]["images"][0]["url"],
-                preview_url=item["preview_url"],
-                danceability=features[idx]["danceability"],
-                energy=features[idx]["energy"],
-            )
-            for idx, item in enumerate(items)
+            self._create_track(item, feature)
+            for item, feature in zip(items, features)
         ]
+        tracks = [track for track in tracks if track is not None]
+        self._save_tracks(tracks)
 
         return tracks
+
+    def get_tracks_by_playlist_id(self, playlist_id: str) -> List[Track]:
+        return self.get_tracks_by_playlist_ids([playlist_id])[0]
+
+    def get_tracks_by_playlist_ids(
+        self,
+        playlist_ids: List[str],
+    ) -> List[List[Track]]:
+        """Fetch the playlists concurrently and then the audio features of the
+        tracks in them at once, so that a track in many playlists is looked up
+        only once.
+        """
+        access_token = self.access_token_repository.get_access_token()
+        items_list = self.spotify_client.run_all(*[
+            partial(self._get_playlist_items, playlist_id, access_token)
+            for playlist_id in playlist_ids
+        ])
+
+        ids = list(dict.fromkeys(
+            item["id"] for items in items_list for item in items
+        ))
+        self.logger.debug(
+            f"{len(ids)} unique tracks in {len(playlist_ids)} playlists"
+        )
+        features = dict(zip(ids, self._get_features_by_ids(ids, access_token)))
+
+        tracks_list = []
+        for items in items_list:
+            tracks = [self._create_track(item, features[item["id"]]) for item in items]
+            tracks_list.append([track for track in tracks if track is not None])
+        self._save_tracks([
+            track for tracks in tracks_list for track in tracks
+        ])
+
+        return tracks_list
+
+    def _get_playlist_items(self, playlist_id: str, access_token: str) -> List[dict]:
+        response = self._get(
+            f"/playlists/{playlist_id}",
+            access_token,
+        )
+        body = response.json()
+
+        if response.status_code != requests.codes.ok:
+            message = f"cannot fetch playlist tracks correctly: {body}"
+            self.logger.error(message)
+            raise RuntimeError(message)
+
+        # track is null for a local or an unavailable track in spotify playlist
+        return [
+            item["track"]
+            for item in body["tracks"]["items"]
+            if item["track"] is not None
+        ]
@@ -0,0 +1,215 @@
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+import threading
+from typing import Dict, List, Optional, Set
+
+from domain.model.rate_limit import BACKGROUND, priority
+from domain.model.track import Track
+from interface.repository.access_token_repository import AccessTokenRepository
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
+
+# maximum number of ids which Spotify accepts in one request
+TRACKS_CHUNK_SIZE = 50
+FEATURES_CHUNK_SIZE = 100
+
+
+def chunk(ids: List[str], size: int) -> List[List[str]]:
+    return [ids[idx:idx + size] for idx in range(0, len(ids), size)]
+
+
+class TrackRepositoryBase(metaclass=ABCMeta):
+    """Caches, catalog and indexes of tracks shared by TrackRepositoryImpl and
+    AsyncTrackRepositoryImpl.
+
+    It holds no client of Spotify, so each subclass fetches tracks only with its
+    own client.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        access_token_repository: AccessTokenRepository,
+        feature_cache: FeatureCache,
+        track_cache: TrackCache,
+        track_catalog: TrackCatalog,
+        feature_index: FeatureIndex,
+        camelot_index: CamelotIndex,
+    ):
+        self.logger = logger
+        self.access_token_repository = access_token_repository
+        self.feature_cache = feature_cache
+        self.track_cache = track_cache
+        self.track_catalog = track_catalog
+        self.feature_index = feature_index
+        self.camelot_index = camelot_index
+
+        # stale rows of the catalog are refreshed one batch at a time
+        self.executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="track-catalog",
+        )
+        self._refreshing: Set[str] = set()
+        self._refreshing_lock = threading.Lock()
+
+    @abstractmethod
+    def get_track_by_id(self, track_id: str) -> Optional[Track]:
+        pass
+
+    @abstractmethod
+    def _fetch_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        """Fetch tracks from Spotify by any number of ids"""
+        pass
+
+    def _merge_features(
+        self,
+        ids: List[str],
+        features: List[Optional[dict]],
+        feature_chunks: List[List[str]],
+        results: List[List[Optional[dict]]],
+    ) -> List[Optional[dict]]:
+        """Fill features missing in the cache with ones fetched by chunks and store
+        the fetched ones to the cache.
+        """
+        fetched: Dict[str, dict] = {}
+        for feature_chunk, chunk_features in zip(feature_chunks, results):
+            for id_, feature in zip(feature_chunk, chunk_features):
+                if feature is not None:
+                    fetched[id_] = feature
+        self.feature_cache.set_many(fetched)
+
+        return [
+            fetched.get(id_) if feature is None else feature
+            for id_, feature in zip(ids, features)
+        ]
+
+    def _create_track(
+        self,
+        item: Optional[dict],
+        feature: Optional[dict],
+    ) -> Optional[Track]:
+        if item is None:
+            return None
+
+        # Spotify has no audio features for some tracks such as very short ones
+        if feature is None:
+            self.logger.warning(f"no audio features for a track({item['id']})")
+            return None
+
+        return Track(
+            spotify_id=item["id"],
+            song_name=item["name"],
+            album_name=item["album"]["name"],
+            artist=item["artists"][0]["name"],
+            bpm=feature["tempo"],
+            key=feature["key"],
+            mode=feature["mode"],
+            image_url=item["album"]["images"][0]["url"],
+            preview_url=item["preview_url"],
+            danceability=feature["danceability"],
+            energy=feature["energy"],
+        )
+
+    def _get_stored_tracks(self, track_ids: List[str]) -> List[Optional[Track]]:
+        """Get tracks from TrackCache and then from the catalog for the missing
+        ones. Tracks found in the catalog are put back to the cache and the stale
+        ones are refreshed in background.
+        """
+        tracks = self.track_cache.get_many(track_ids)
+
+        missing_ids = [id_ for id_, track in zip(track_ids, tracks) if track is None]
+        if len(missing_ids) == 0:
+            return tracks
+
+        stored_tracks, stale_ids = self.track_catalog.get_many(missing_ids)
+        if any(track is not None for track in stored_tracks):
+            self.track_cache.set_many(stored_tracks)
+            self.feature_index.add_many(stored_tracks)
+            self.camelot_index.add_many(stored_tracks)
+        if len(stale_ids) > 0:
+            self._refresh_in_background(stale_ids)
+
+        stored = dict(zip(missing_ids, stored_tracks))
+        return [
+            stored.get(id_) if track is None else track
+            for id_, track in zip(track_ids, tracks)
+        ]
+
+    def get_stored_tracks_by_ids(self, track_ids: List[str]) -> List[Optional[Track]]:
+        return self._get_stored_tracks(list(track_ids))
+
+    def _save_tracks(self, tracks: List[Optional[Track]]) -> None:
+        """Store tracks fetched from Spotify to TrackCache, the catalog and the
+        in-memory indexes"""
+        self.track_cache.set_many(tracks)
+        self.track_catalog.upsert_many(tracks)
+        self.feature_index.add_many(tracks)
+        self.camelot_index.add_many(tracks)
+
+    def _refresh_in_background(self, track_ids: List[str]) -> None:
+        with self._refreshing_lock:
+            track_ids = [id_ for id_ in track_ids if id_ not in self._refreshing]
+            self._refreshing.update(track_ids)
+
+        if len(track_ids) > 0:
+            self.executor.submit(self._refresh, track_ids)
+
+    def _refresh(self, track_ids: List[str]) -> None:
+        try:
+            with priority(BACKGROUND):
+                tracks = self._fetch_tracks_by_ids(track_ids)
+            self._save_tracks(tracks)
+            self.logger.info(f"refreshed {len(track_ids)} tracks in the catalog")
+
+        except Exception as e:
+            self.logger.warning(f"failed to refresh tracks in the catalog: {e}")
+
+        finally:
+            with self._refreshing_lock:
+                self._refreshing.difference_update(track_ids)
+
+    def get_tracks_by_bpm(
+        self,
+        bpm_min: float,
+        bpm_max: float,
+        offset: int,
+        limit: int,
+    ) -> List[Track]:
+        spotify_ids = self.track_cache.get_ids_by_bpm(bpm_min, bpm_max, offset, limit)
+        tracks = self._get_stored_tracks(spotify_ids)
+
+        # a track expired from both the cache and the catalog cannot be returned
+        # without asking Spotify, so it is dropped from the index
+        self.track_cache.remove_from_bpm_index([
+            id_ for id_, track in zip(spotify_ids, tracks) if track is None
+        ])
+        return [track for track in tracks if track is not None]
+
+    def get_similar_tracks(self, track_id: str, limit: int) -> Optional[List[Track]]:
+        track = self.get_track_by_id(track_id)
+        if track is None:
+            return None
+
+        # the track may have been cached by another worker
+        self.feature_index.add_many([track])
+        spotify_ids = self.feature_index.get_similar_ids(track, limit)
+        tracks = self._get_stored_tracks(spotify_ids)
+        return [track for track in tracks if track is not None]
+
+    def get_compatible_tracks(
+        self,
+        track_id: str,
+        tolerance: float,
+        limit: int,
+    ) -> Optional[List[Track]]:
+        track = self.get_track_by_id(track_id)
+        if track is None:
+            return None
+
+        spotify_ids = self.camelot_index.get_compatible_ids(track, tolerance, limit)
+        tracks = self._get_stored_tracks(spotify_ids)
+        return [track for track in tracks if track is not None]
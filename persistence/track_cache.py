@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from dataclasses import asdict
+import json
+from logging import Logger
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from injector import inject, singleton
+from redis import Redis
+from redis.exceptions import RedisError
+
+from domain.model.track import Track
+from envs import Envs
+
+
+class LocalCache:
+    """Bounded in-process cache with per entry ttl.
+
+    When the cache is full, the least recently used entry is evicted if eviction is
+    "lru" and the oldest inserted entry is evicted if eviction is "fifo".
+    """
+
+    def __init__(self, max_size: int, ttl: float, eviction: str = "lru") -> None:
+        if eviction not in ("lru", "fifo"):
+            raise ValueError(f"unknown eviction policy: {eviction}")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.eviction = eviction
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expire_at, value = entry
+            if expire_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            if self.eviction == "lru":
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: object) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@singleton
+class TrackCache:
+    """Two tier cache of Track objects.
+
+    The first tier is a LocalCache in each gunicorn worker and the second tier is
+    redis shared by all workers. Redis errors are treated as cache misses.
+    Every stored track is also indexed by bpm in a redis sorted set, which never
+    expires so that it covers all tracks the service has seen.
+    """
+
+    BPM_INDEX_KEY = "track:bpm"
+
+    @inject
+    def __init__(self, envs: Envs, logger: Logger, redis: Redis) -> None:
+        self.logger = logger
+        self.redis = redis
+        self.redis_ttl = envs.TRACK_CACHE_REDIS_TTL
+        self.local_cache = LocalCache(
+            max_size=envs.TRACK_CACHE_MAX_SIZE,
+            ttl=envs.TRACK_CACHE_LOCAL_TTL,
+            eviction=envs.TRACK_CACHE_EVICTION,
+        )
+
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _key(self, spotify_id: str) -> str:
+        return f"track:{spotify_id}"
+
+    def get(self, spotify_id: str) -> Optional[Track]:
+        return self.get_many([spotify_id])[0]
+
+    def get_many(self, spotify_ids: List[str]) -> List[Optional[Track]]:
+        """Get Track objects from the local cache and then from redis in one round
+        trip for the ids missing in the local cache.
+
+        Args:
+            spotify_ids (List[str]): list of spotify ids
+
+        Returns:
+            List[Optional[Track]]: Track objects in the same order as spotify_ids.
+                None is set for an id which is not cached.
+        """
+        tracks = [self.local_cache.get(id_) for id_ in spotify_ids]
+        num_local_hits = sum(track is not None for track in tracks)
+
+        missing_idxs = [idx for idx, track in enumerate(tracks) if track is None]
+        num_redis_hits = 0
+        if len(missing_idxs) > 0:
+            keys = [self._key(spotify_ids[idx]) for idx in missing_idxs]
+            try:
+                values = self.redis.mget(keys)
+            except RedisError as e:
+                self.logger.warning(f"failed to get tracks from cache: {e}")
+                values = [None] * len(keys)
+
+            for idx, value in zip(missing_idxs, values):
+                if value is None:
+                    continue
+
+                track = Track(**json.loads(value))
+                self.local_cache.set(track.spotify_id, track)
+                tracks[idx] = track
+                num_redis_hits += 1
+
+        with self._lock:
+            self._stats["local_hits"] += num_local_hits
+            self._stats["redis_hits"] += num_redis_hits
+            self._stats["misses"] += len(missing_idxs) - num_redis_hits
+
+        return tracks
+
+    def set_many(self, tracks: List[Optional[Track]]) -> None:
+        """Store Track objects to both tiers. None in tracks is ignored.
+
+        Args:
+            tracks (List[Optional[Track]]): Track objects to store
+        """
+        tracks = [track for track in tracks if track is not None]
+        if len(tracks) == 0:
+            return
+
+        for track in tracks:
+            self.local_cache.set(track.spotify_id, track)
+
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            for track in tracks:
+                pipeline.setex(
+                    self._key(track.spotify_id),
+                    self.redis_ttl,
+                    json.dumps(asdict(track)),
+                )
+            self._add_to_bpm_index(pipeline, tracks)
+            pipeline.execute()
+
+        except RedisError as e:
+            self.logger.warning(f"failed to save tracks to cache: {e}")
+
+    def add_to_bpm_index(self, tracks: List[Track]) -> None:
+        """Index Track objects by bpm without caching them
+
+        Args:
+            tracks (List[Track]): Track objects to index
+        """
+        if len(tracks) == 0:
+            return
+
+        try:
+            self._add_to_bpm_index(self.redis, tracks)
+        except RedisError as e:
+            self.logger.warning(f"failed to add tracks to bpm index: {e}")
+
+    def _add_to_bpm_index(self, redis: Redis, tracks: List[Track]) -> None:
+        redis.zadd(
+            self.BPM_INDEX_KEY,
+            {track.spotify_id: track.bpm for track in tracks},
+        )
+
+    def get_ids_by_bpm(
+        self,
+        bpm_min: float,
+        bpm_max: float,
+        offset: int,
+        limit: int,
+    ) -> List[str]:
+        """Get spotify ids of the indexed tracks whose bpm is in the range
+
+        Args:
+            bpm_min (float): minimum bpm, inclusive
+            bpm_max (float): maximum bpm, inclusive
+            offset (int): number of ids to skip
+            limit (int): maximum number of ids
+
+        Returns:
+            List[str]: spotify ids in ascending order of bpm
+        """
+        try:
+            return self.redis.zrangebyscore(
+                self.BPM_INDEX_KEY,
+                bpm_min,
+                bpm_max,
+                start=offset,
+                num=limit,
+            )
+        except RedisError as e:
+            self.logger.warning(f"failed to get tracks from bpm index: {e}")
+            return []
+
+    def remove_from_bpm_index(self, spotify_ids: List[str]) -> None:
+        if len(spotify_ids) == 0:
+            return
+
+        try:
+            self.redis.zrem(self.BPM_INDEX_KEY, *spotify_ids)
+        except RedisError as e:
+            self.logger.warning(f"failed to remove tracks from bpm index: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+
+        num_total = sum(stats.values())
+        num_hits = stats["local_hits"] + stats["redis_hits"]
+        stats["hit_rate"] = num_hits / num_total if num_total > 0 else 0.0
+        stats["local_size"] = len(self.local_cache)
+        return stats
@@ -0,0 +1,183 @@
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from logging import Logger
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from injector import inject, singleton
+from sqlalchemy.exc import SQLAlchemyError
+
+from domain.model.track import Track
+from envs import Envs
+from persistence.model.track import TrackDataModel
+from persistence.upsert import upsert
+
+
+@singleton
+class TrackCatalog:
+    """Durable store of Track objects in the track table.
+
+    It is the tier behind TrackCache, so a track fetched from Spotify once is not
+    fetched again until its row gets older than TRACK_CATALOG_MAX_AGE. Each call
+    runs in its own app context so that it can be used from background threads
+    and never commits the session of the request. Database errors are treated as
+    misses so that requests still succeed by asking Spotify.
+    """
+
+    @inject
+    def __init__(
+        self,
+        envs: Envs,
+        logger: Logger,
+        app: Flask,
+        db: SQLAlchemy,
+    ) -> None:
+        self.logger = logger
+        self.app = app
+        self.db = db
+        self.enabled = envs.TRACK_CATALOG
+        self.max_age = timedelta(seconds=envs.TRACK_CATALOG_MAX_AGE)
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "upserted": 0}
+
+    def get_many(
+        self,
+        spotify_ids: List[str],
+    ) -> Tuple[List[Optional[Track]], List[str]]:
+        """Get Track objects of the specified ids in one query
+
+        Args:
+            spotify_ids (List[str]): list of spotify ids
+
+        Returns:
+            Tuple[List[Optional[Track]], List[str]]: Track objects in the same order
+                as spotify_ids with None for an id which is not stored, and ids of
+                the stored tracks older than the max age
+        """
+        if not self.enabled or len(spotify_ids) == 0:
+            return [None] * len(spotify_ids), []
+
+        try:
+            with self.app.app_context():
+                track_datas = self.db.session.query(TrackDataModel) \
+                    .filter(TrackDataModel.spotify_id.in_(set(spotify_ids))) \
+                    .all()
+                stored = {
+                    track_data.spotify_id: (
+                        self._to_track(track_data),
+                        track_data.fetched_at,
+                    )
+                    for track_data in track_datas
+                }
+        except SQLAlchemyError as e:
+            self.logger.warning(f"failed to get tracks from catalog: {e}")
+            return [None] * len(spotify_ids), []
+
+        expired_at = datetime.utcnow() - self.max_age
+        stale_ids = [
+            id_ for id_, (_, fetched_at) in stored.items() if fetched_at < expired_at
+        ]
+        tracks = [
+            stored[id_][0] if id_ in stored else None
+            for id_ in spotify_ids
+        ]
+
+        num_hits = sum(track is not None for track in tracks)
+        with self._lock:
+            self._stats["hits"] += num_hits
+            self._stats["stale"] += len(stale_ids)
+            self._stats["misses"] += len(spotify_ids) - num_hits
+
+        return tracks, stale_ids
+
+    def iter_tracks(
+        self,
+        batch_size: int = 1000,
+        fetched_since: Optional[datetime] = None,
+    ) -> Iterator[List[Track]]:
+        """Iterate over the stored tracks in batches in the order of spotify id
+
+        Args:
+            batch_size (int): number of tracks in a batch
+            fetched_since (Optional[datetime]): only tracks stored at or after this
+                time in UTC are read if specified
+
+        Yields:
+            List[Track]: batch of Track objects
+        """
+        if not self.enabled:
+            return
+
+        last_id = ""
+        while True:
+            with self.app.app_context():
+                query = self.db.session.query(TrackDataModel) \
+                    .filter(TrackDataModel.spotify_id > last_id)
+                if fetched_since is not None:
+                    query = query.filter(TrackDataModel.fetched_at >= fetched_since)
+                track_datas = query \
+                    .order_by(TrackDataModel.spotify_id) \
+                    .limit(batch_size) \
+                    .all()
+                tracks = [self._to_track(track_data) for track_data in track_datas]
+
+            if len(tracks) == 0:
+                return
+            yield tracks
+            last_id = tracks[-1].spotify_id
+
+    def upsert_many(self, tracks: List[Optional[Track]]) -> None:
+        """Insert or update Track objects in bulk. None in tracks is ignored.
+
+        Args:
+            tracks (List[Optional[Track]]): Track objects fetched from Spotify
+        """
+        fetched_at = datetime.utcnow()
+        # an id must appear once in a statement
+        rows = list({
+            track.spotify_id: dict(asdict(track), fetched_at=fetched_at)
+            for track in tracks
+            if track is not None
+        }.values())
+        if not self.enabled or len(rows) == 0:
+            return
+
+        try:
+            with self.app.app_context():
+                upsert(self.db.session, TrackDataModel, rows, [
+                    column.name
+                    for column in TrackDataModel.__table__.columns
+                    if column.name != "spotify_id"
+                ])
+                self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.logger.warning(f"failed to save tracks to catalog: {e}")
+            return
+
+        with self._lock:
+            self._stats["upserted"] += len(rows)
+
+    def _to_track(self, track_data: TrackDataModel) -> Track:
+        return Track(
+            spotify_id=track_data.spotify_id,
+            song_name=track_data.song_name,
+            artist=track_data.artist,
+            album_name=track_data.album_name,
+            bpm=track_data.bpm,
+            danceability=track_data.danceability,
+            energy=track_data.energy,
+            image_url=track_data.image_url,
+            key=track_data.key,
+            mode=track_data.mode,
+            preview_url=track_data.preview_url,
+        )
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats["enabled"] = self.enabled
+        return stats
@@ -0,0 +1,54 @@
+from typing import List
+
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+# rows inserted by one statement
+UPSERT_CHUNK_SIZE = 500
+
+
+def upsert(
+    session: Session,
+    model,
+    rows: List[dict],
+    update_columns: List[str],
+) -> None:
+    """Insert rows or update the existing rows with the same primary key in bulk.
+    The statements run in the transaction of the session, which is not committed.
+
+    Args:
+        session (Session): session to execute the statements
+        model: data model class of the table
+        rows (List[dict]): values of all columns of each row. A primary key must
+            appear once.
+        update_columns (List[str]): columns updated when the row exists
+    """
+    for idx in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        _upsert(session, model, rows[idx:idx + UPSERT_CHUNK_SIZE], update_columns)
+
+
+def _upsert(
+    session: Session,
+    model,
+    rows: List[dict],
+    update_columns: List[str],
+) -> None:
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(model).values(rows)
+        statement = statement.on_duplicate_key_update({
+            column: statement.inserted[column] for column in update_columns
+        })
+    elif dialect == "sqlite":
+        statement = sqlite.insert(model).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[column.name for column in model.__table__.primary_key],
+            set_={column: statement.excluded[column] for column in update_columns},
+        )
+    else:
+        # no upsert statement, so the rows are merged one by one
+        for row in rows:
+            session.merge(model(**row))
+        return
+
+    session.execute(statement)
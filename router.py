@@ -1,10 +1,12 @@
 from injector import inject, singleton
-from flask import Flask
+from flask import Flask, make_response
 
 from controller.index_controller import IndexController
+from controller.metrics_controller import MetricsController
 from controller.playlist_controller import PlaylistController
 from controller.ranking_controller import RankingController
 from controller.track_controller import TrackController
+from domain.model.rate_limit import SpotifyRateLimitError
 
 
 @singleton
@@ -17,6 +19,7 @@ class Router:
         track_controller: TrackController,
         ranking_controller: RankingController,
         playlist_controller: PlaylistController,
+        metrics_controller: MetricsController,
     ) -> None:
         self.app = app
         self.version = "v1"
@@ -26,6 +29,7 @@ class Router:
         self.track_controller = track_controller
         self.ranking_controller = ranking_controller
         self.playlist_controller = playlist_controller
+        self.metrics_controller = metrics_controller
 
     def add_router(self):
         self.app.add_url_rule(
@@ -38,6 +42,16 @@ class Router:
             view_func=self.track_controller.get_tracks,
             methods=["GET"],
         )
+        self.app.add_url_rule(
+            rule=f"{self.url_prefix}/track/<spotify_id>/similar",
+            view_func=self.track_controller.get_similar_tracks,
+            methods=["GET"],
+        )
+        self.app.add_url_rule(
+            rule=f"{self.url_prefix}/track/<spotify_id>/compatible",
+            view_func=self.track_controller.get_compatible_tracks,
+            methods=["GET"],
+        )
         self.app.add_url_rule(
             rule=f"{self.url_prefix}/ranking",
             view_func=self.ranking_controller.get_ranking,
@@ -88,6 +102,24 @@ class Router:
             view_func=self.playlist_controller.patch_track_order,
             methods=["PATCH"],
         )
+        self.app.add_url_rule(
+            rule=(
+                f"{self.url_prefix}/user/<uid>/playlist/<playlist_id>/sequence"
+            ),
+            view_func=self.playlist_controller.auto_sequence,
+            methods=["POST"],
+        )
+        self.app.add_url_rule(
+            rule=f"{self.url_prefix}/metrics",
+            view_func=self.metrics_controller.get_metrics,
+            methods=["GET"],
+        )
+
+        @self.app.errorhandler(SpotifyRateLimitError)
+        def rate_limited(e: SpotifyRateLimitError):
+            response = make_response("spotify is busy, try again later", 503)
+            response.headers["Retry-After"] = str(int(e.retry_after))
+            return response
 
         @self.app.errorhandler(404)
         def catch_all(path):
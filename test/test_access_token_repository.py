@@ -1,3 +1,5 @@
+import json
+import threading
 import time
 import unittest
 from unittest import mock
@@ -6,97 +8,246 @@ import fakeredis
 
 from envs import Envs
 from persistence.access_token import AccessTokenRepositoryImpl
+from persistence.rate_limiter import RateLimiter
+from persistence.spotify_client import SpotifyClient
 
 
 class TestAccessTokenRepository(unittest.TestCase):
     def setUp(self) -> None:
         self.logger = mock.MagicMock()
         self.redis = fakeredis.FakeRedis(decode_responses=True)
-        self.access_token_persistence = AccessTokenRepositoryImpl(
-            envs=Envs(),
+        self.envs = Envs()
+        self.envs.ACCESS_TOKEN_RENEWER = False
+        self.access_token_persistence = self._create_repository()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.access_token_persistence.stop_renewer()
+        return super().tearDown()
+
+    def _create_repository(self) -> AccessTokenRepositoryImpl:
+        return AccessTokenRepositoryImpl(
+            envs=self.envs,
             logger=self.logger,
             redis=self.redis,
+            spotify_client=SpotifyClient(
+                self.envs,
+                self.logger,
+                self.redis,
+                RateLimiter(self.envs, self.logger, self.redis),
+            ),
+        )
+
+    def _mock_spotify(
+        self,
+        access_token: str = "new_token",
+        repository: AccessTokenRepositoryImpl = None,
+        latency: float = 0,
+    ) -> mock.MagicMock:
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = {
+            "access_token": access_token,
+            "token_type": "Bearer",
+            "expires_in": 3600,
+        }
+
+        def post_accounts(*args, **kwargs) -> mock.MagicMock:
+            time.sleep(latency)
+            return response
+
+        post_accounts_mock = mock.MagicMock(side_effect=post_accounts)
+        repository = repository or self.access_token_persistence
+        repository.spotify_client.post_accounts = post_accounts_mock
+        return post_accounts_mock
+
+    def _store(self, access_token: str, expires_at: float) -> None:
+        self.redis.set(
+            AccessTokenRepositoryImpl.KEY,
+            json.dumps({"access_token": access_token, "expires_at": expires_at}),
+            ex=max(int(expires_at - time.time()), 1),
         )
-        return super().setUp()
 
     def test_get_access_token1(self) -> None:
         """Testcase where no access token is stored in redis
         """
+        post_accounts = self._mock_spotify()
         access_token = self.access_token_persistence.get_access_token()
-        access_token_redis = self.redis.hget("access_token", "access_token")
-        self.assertEqual(access_token, access_token_redis)
+
+        self.assertEqual(access_token, "new_token")
+        post_accounts.assert_called_once()
+        value = json.loads(self.redis.get(AccessTokenRepositoryImpl.KEY))
+        self.assertEqual(value["access_token"], "new_token")
+        # expires_in minus the margin
+        ttl = self.redis.ttl(AccessTokenRepositoryImpl.KEY)
+        self.assertAlmostEqual(ttl, 3600 - 300, delta=2)
 
     def test_get_access_token2(self) -> None:
-        """Testcase where access token is stored in redis and ttl is not expired
+        """Testcase where access token is stored in redis by another worker
         """
-        expected_access_token = "access_token_test"
-        expected_ttl = time.time() + 60 * 50
-        self.redis.hset("access_token", "access_token", expected_access_token)
-        self.redis.hset("access_token", "ttl", expected_ttl)
+        post_accounts = self._mock_spotify()
+        self._store("access_token_test", time.time() + 60 * 50)
 
-        actual_access_token = self.access_token_persistence.get_access_token()
-        actual_ttl = float(self.redis.hget("access_token", "ttl"))
-        self.assertEqual(actual_access_token, expected_access_token)
-        self.assertEqual(actual_ttl, expected_ttl)
+        access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "access_token_test")
+        post_accounts.assert_not_called()
 
     def test_get_access_token3(self) -> None:
-        """Testcase where access token is stored in redis and ttl is expired
+        """Testcase where access token is kept in memory after the first call
         """
-        access_token = "access_token_test"
-        ttl = time.time()
-        self.redis.hset("access_token", "access_token", access_token)
-        self.redis.hset("access_token", "ttl", ttl)
-
-        actual_access_token = self.access_token_persistence.get_access_token()
-        actual_ttl = float(self.redis.hget("access_token", "ttl"))
-        self.assertNotEqual(actual_access_token, access_token)
-        self.assertNotEqual(actual_ttl, ttl)
-
-    def test_get_access_token_from_cache(self) -> None:
-        expected_access_token = "access_token_test"
-        ttl = time.time()
-        self.redis.hset("access_token", "access_token", expected_access_token)
-        self.redis.hset("access_token", "ttl", ttl)
-        actual_access_token = (
-            self.access_token_persistence._get_access_token_from_cache()
-        )
-        self.assertEqual(actual_access_token, expected_access_token)
+        self._store("access_token_test", time.time() + 60 * 50)
+        self.access_token_persistence.get_access_token()
+
+        with mock.patch.object(self.redis, "get") as get_mock:
+            access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "access_token_test")
+        get_mock.assert_not_called()
+
+    def test_get_access_token4(self) -> None:
+        """Testcase where access token in memory has expired
+        """
+        self._mock_spotify()
+        self._store("access_token_test", time.time() + 60 * 50)
+        self.access_token_persistence.get_access_token()
+        self.redis.delete(AccessTokenRepositoryImpl.KEY)
+        self.access_token_persistence._expires_at = time.time()
+
+        access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "new_token")
 
     def test_get_access_token_from_spotify(self) -> None:
-        access_token = self.access_token_persistence._get_access_token_from_spotify()
+        access_token, expires_in = (
+            self.access_token_persistence._get_access_token_from_spotify()
+        )
         self.assertIsInstance(access_token, str)
+        self.assertIsInstance(expires_in, int)
+
+    def test_invalidate_access_token1(self) -> None:
+        """Testcase where the token in use is rejected and a new one is fetched
+        """
+        self._mock_spotify()
+        self._store("access_token_test", time.time() + 60 * 50)
+        self.access_token_persistence.get_access_token()
+
+        self.access_token_persistence.invalidate_access_token("access_token_test")
+        access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "new_token")
+
+    def test_invalidate_access_token2(self) -> None:
+        """Testcase where a token already replaced by another thread is rejected
+        """
+        post_accounts = self._mock_spotify()
+        self._store("access_token_test", time.time() + 60 * 50)
+        self.access_token_persistence.get_access_token()
+
+        self.access_token_persistence.invalidate_access_token("old_token")
+        access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "access_token_test")
+        self.assertIsNotNone(self.redis.get(AccessTokenRepositoryImpl.KEY))
+        post_accounts.assert_not_called()
 
     def test_save_cache(self) -> None:
-        expected_access_token = "access_token_test"
-        self.access_token_persistence._save_cache(expected_access_token)
+        expires_at = time.time() + 60
+        self.access_token_persistence._save_cache("access_token_test", expires_at)
+
+        value = json.loads(self.redis.get(AccessTokenRepositoryImpl.KEY))
+        self.assertEqual(value["access_token"], "access_token_test")
+        self.assertEqual(value["expires_at"], expires_at)
+        self.assertLessEqual(self.redis.ttl(AccessTokenRepositoryImpl.KEY), 60)
+
+    def test_get_access_token5(self) -> None:
+        """Testcase where the token is requested at once in two workers
+        """
+        repositories = [self.access_token_persistence, self._create_repository()]
+        post_accounts_mocks = [
+            self._mock_spotify(repository=repository, latency=0.2)
+            for repository in repositories
+        ]
+        results = []
+
+        def get_access_token(repository: AccessTokenRepositoryImpl) -> None:
+            results.append(repository.get_access_token())
+
+        threads = [
+            threading.Thread(target=get_access_token, args=(repository,))
+            for repository in repositories * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(results, ["new_token"] * 8)
+        self.assertEqual(sum(m.call_count for m in post_accounts_mocks), 1)
+        self.assertIsNone(self.redis.get(AccessTokenRepositoryImpl.LOCK_KEY))
+
+    def test_get_access_token6(self) -> None:
+        """Testcase where another worker holds the lock and the token is waited for
+        """
+        post_accounts = self._mock_spotify()
+        self.redis.set(AccessTokenRepositoryImpl.LOCK_KEY, "other_worker")
+        threading.Timer(
+            0.1,
+            self._store,
+            args=("access_token_test", time.time() + 60 * 50),
+        ).start()
 
-        actual_access_token = self.redis.hget("access_token", "access_token")
-        self.assertEqual(actual_access_token, expected_access_token)
+        access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "access_token_test")
+        post_accounts.assert_not_called()
+
+    def test_get_access_token7(self) -> None:
+        """Testcase where the worker holding the lock never stores the token
+        """
+        post_accounts = self._mock_spotify()
+        self.access_token_persistence.lock_timeout = 0.2
+        self.redis.set(AccessTokenRepositoryImpl.LOCK_KEY, "other_worker")
+
+        access_token = self.access_token_persistence.get_access_token()
+        self.assertEqual(access_token, "new_token")
+        post_accounts.assert_called_once()
 
-    def test_valid_cache1(self) -> None:
-        """Testcase where access token is not stored in redis
+    def test_renew1(self) -> None:
+        """Testcase where the token expires soon and is renewed
         """
-        valid = self.access_token_persistence._valid_cache()
-        self.assertIs(valid, False)
+        post_accounts = self._mock_spotify()
+        self._store("access_token_test", time.time() + 60)
+
+        self.access_token_persistence._renew()
+        post_accounts.assert_called_once()
+        self.assertEqual(self.access_token_persistence._access_token, "new_token")
+        cache = self.access_token_persistence._get_cache()
+        self.assertEqual(cache[0], "new_token")
+
+    def test_renew2(self) -> None:
+        """Testcase where another worker has already renewed the token
+        """
+        post_accounts = self._mock_spotify()
+        self._store("access_token_test", time.time() + 60 * 50)
+
+        self.access_token_persistence._renew()
+        post_accounts.assert_not_called()
+        self.assertEqual(
+            self.access_token_persistence._access_token,
+            "access_token_test",
+        )
 
-    def test_valid_cache2(self) -> None:
-        """Testcase where access token is stored in redis and ttl is not expired
+    def test_renew3(self) -> None:
+        """Testcase where another worker is renewing the token
         """
-        expected_access_token = "access_token_test"
-        expected_ttl = time.time() + 60 * 50
-        self.redis.hset("access_token", "access_token", expected_access_token)
-        self.redis.hset("access_token", "ttl", expected_ttl)
+        post_accounts = self._mock_spotify()
+        self._store("access_token_test", time.time() + 60)
+        self.redis.set(AccessTokenRepositoryImpl.LOCK_KEY, "other_worker")
 
-        valid = self.access_token_persistence._valid_cache()
-        self.assertIs(valid, True)
+        self.access_token_persistence._renew()
+        post_accounts.assert_not_called()
 
-    def test_valid_cache3(self) -> None:
-        """Testcase where access token is stored in redis and ttl is expired
+    def test_start_renewer(self) -> None:
+        """Testcase where the renewer starts after the first token is got
         """
-        access_token = "access_token_test"
-        ttl = time.time()
-        self.redis.hset("access_token", "access_token", access_token)
-        self.redis.hset("access_token", "ttl", ttl)
+        self.access_token_persistence.renewer_enabled = True
+        self._mock_spotify()
+        self.access_token_persistence.get_access_token()
 
-        valid = self.access_token_persistence._valid_cache()
-        self.assertIs(valid, False)
+        self.assertTrue(self.access_token_persistence._renewer.is_alive())
+        self.access_token_persistence.stop_renewer()
+        self.assertFalse(self.access_token_persistence._renewer.is_alive())
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+import fakeredis
+
+from benchmark.spotify_stub import SpotifyStub
+from envs import Envs
+from persistence.async_spotify_client import AsyncSpotifyClient
+from persistence.async_track import AsyncTrackRepositoryImpl
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.rate_limiter import RateLimiter
+from persistence.track import TrackRepositoryImpl
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
+
+
+class TestAsyncTrackRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stub = SpotifyStub(latency=0).start()
+        self.logger = mock.MagicMock()
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.envs = Envs()
+        self.envs.SPOTIFY_API_URL = self.stub.api_url
+
+        self.access_token_repository = mock.MagicMock()
+        self.access_token_repository.get_access_token.return_value = "stub_token"
+        self.spotify_client = AsyncSpotifyClient(
+            self.envs,
+            self.logger,
+            RateLimiter(self.envs, self.logger, self.redis),
+        )
+        self.track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        self.track_catalog.get_many.side_effect = lambda ids: ([None] * len(ids), [])
+        self.feature_index = mock.create_autospec(FeatureIndex, instance=True)
+        self.camelot_index = mock.create_autospec(CamelotIndex, instance=True)
+        self.track_repository = AsyncTrackRepositoryImpl(
+            self.logger,
+            self.access_token_repository,
+            self.spotify_client,
+            FeatureCache(self.envs, self.logger, self.redis),
+            TrackCache(self.envs, self.logger, self.redis),
+            self.track_catalog,
+            self.feature_index,
+            self.camelot_index,
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.spotify_client.close()
+        self.stub.stop()
+        return super().tearDown()
+
+    def test_get_track_by_id(self) -> None:
+        track = self.track_repository.get_track_by_id("id0")
+        self.assertEqual(track.spotify_id, "id0")
+        self.assertEqual(track.song_name, "song id0")
+
+    def test_get_tracks_by_ids1(self) -> None:
+        """Testcase where the ids are split into chunks of track metadata and
+        audio features
+        """
+        ids = [f"id{idx}" for idx in range(120)]
+        tracks = self.track_repository.get_tracks_by_ids(ids)
+
+        self.assertListEqual([track.spotify_id for track in tracks], ids)
+        self.assertEqual(self.stub.num_requests, 5)
+
+    def test_get_tracks_by_ids2(self) -> None:
+        """Testcase where all tracks are cached after the first call
+        """
+        ids = [f"id{idx}" for idx in range(10)]
+        self.track_repository.get_tracks_by_ids(ids)
+        num_requests = self.stub.num_requests
+
+        tracks = self.track_repository.get_tracks_by_ids(ids)
+        self.assertListEqual([track.spotify_id for track in tracks], ids)
+        self.assertEqual(self.stub.num_requests, num_requests)
+
+    def test_get_tracks_by_ids3(self) -> None:
+        """Testcase where the chunks are fetched concurrently on one event loop
+        """
+        self.stub.latency = 0.2
+        ids = [f"id{idx}" for idx in range(120)]
+        start = time.perf_counter()
+        self.track_repository.get_tracks_by_ids(ids)
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+    def test_get_tracks_by_ids4(self) -> None:
+        """Testcase where the catalog is read and written outside the event loop
+        """
+        thread_names = []
+
+        def get_many(ids):
+            thread_names.append(threading.current_thread().name)
+            return [None] * len(ids), []
+
+        self.track_catalog.get_many.side_effect = get_many
+        self.track_catalog.upsert_many.side_effect = (
+            lambda tracks: thread_names.append(threading.current_thread().name)
+        )
+        self.track_repository.get_tracks_by_ids(["id0"])
+
+        self.assertEqual(len(thread_names), 2)
+        self.assertNotIn("spotify-loop", thread_names)
+
+    def test_spotify_client(self) -> None:
+        """Testcase where the async repository cannot fall back to the sync client
+        """
+        self.assertNotIsInstance(self.track_repository, TrackRepositoryImpl)
+        self.assertFalse(hasattr(self.track_repository, "_get"))
+
+    def test_get_tracks_by_query(self) -> None:
+        tracks = self.track_repository.get_tracks_by_query("test")
+        self.assertEqual(len(tracks), 20)
+        self.assertEqual(self.stub.num_requests, 2)
+
+    def test_get_tracks_by_playlist_id(self) -> None:
+        tracks = self.track_repository.get_tracks_by_playlist_id("playlist")
+        self.assertEqual(len(tracks), 50)
+        self.assertEqual(tracks[0].spotify_id, "playlist0")
+
+    def test_get(self) -> None:
+        """Testcase where identical requests in flight are coalesced into one
+        """
+        async def get_twice():
+            return await asyncio.gather(
+                self.spotify_client.get("/tracks/id0"),
+                self.spotify_client.get("/tracks/id0"),
+            )
+
+        results = self.spotify_client.run(get_twice())
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(self.stub.num_requests, 1)
+        self.assertEqual(self.spotify_client.get_stats()["coalesced"], 1)
+
+    def test_get_rate_limited(self) -> None:
+        """Testcase where a 429 response blocks the rate limiter outside the event
+        loop and the request is retried
+        """
+        self.stub.num_rate_limited = 1
+        thread_names = []
+        rate_limiter = self.spotify_client.rate_limiter
+        block = rate_limiter.block
+
+        def record(retry_after):
+            thread_names.append(threading.current_thread().name)
+            block(retry_after)
+
+        with mock.patch.object(rate_limiter, "block", side_effect=record):
+            status_code, body = self.spotify_client.run(
+                self.spotify_client.get("/tracks/id0")
+            )
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body["id"], "id0")
+        self.assertEqual(len(thread_names), 1)
+        self.assertNotEqual(thread_names[0], "spotify-loop")
+        self.assertEqual(self.stub.num_requests, 2)
+
+    def test_get_async(self) -> None:
+        """Testcase where the access token is rejected and the request is retried
+        """
+        get_mock = mock.AsyncMock(side_effect=[(401, {}), (200, {"id": "id0"})])
+        with mock.patch.object(self.spotify_client, "get", get_mock):
+            result = self.spotify_client.run(
+                self.track_repository._get_async("/tracks/id0", "old_token")
+            )
+
+        self.assertEqual(result, (200, {"id": "id0"}))
+        self.access_token_repository.invalidate_access_token.assert_called_once_with(
+            "old_token"
+        )
+        self.assertEqual(get_mock.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+
+from envs import Envs
+from persistence.camelot_index import CamelotIndex
+from persistence.track_catalog import TrackCatalog
+from track_factory import create_track
+
+
+class TestCamelotIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        self.track_catalog.iter_tracks.return_value = iter([])
+        self.camelot_index = CamelotIndex(
+            Envs(),
+            mock.MagicMock(),
+            self.track_catalog,
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.camelot_index.executor.shutdown(wait=True)
+        return super().tearDown()
+
+    def test_get_compatible_ids1(self) -> None:
+        """Testcase where tracks in compatible keys within the tolerance of tempo
+        are returned from the closest tempo
+        """
+        # C major is 8B
+        seed = create_track("seed", bpm=120, key=0, mode=1)
+        self.camelot_index.add_many([
+            seed,
+            create_track("same_key", bpm=123, key=0, mode=1),  # 8B
+            create_track("relative_minor", bpm=119, key=9, mode=0),  # 8A
+            create_track("fifth_above", bpm=126, key=7, mode=1),  # 9B
+            create_track("fifth_below", bpm=116, key=5, mode=1),  # 7B
+            create_track("half_time", bpm=61, key=0, mode=1),
+            create_track("double_time", bpm=237, key=0, mode=1),
+            create_track("too_fast", bpm=130, key=0, mode=1),
+            create_track("clash", bpm=120, key=1, mode=1),  # 3B
+            create_track("no_key", bpm=120, key=-1, mode=1),
+            None,
+        ])
+
+        self.assertListEqual(
+            self.camelot_index.get_compatible_ids(seed, 0.06, 10),
+            [
+                "relative_minor", "double_time", "half_time", "same_key",
+                "fifth_below", "fifth_above",
+            ],
+        )
+        self.assertListEqual(
+            self.camelot_index.get_compatible_ids(seed, 0.06, 2),
+            ["relative_minor", "double_time"],
+        )
+
+    def test_get_compatible_ids2(self) -> None:
+        """Testcase where the key and tempo of an indexed track are updated
+        """
+        seed = create_track("seed", bpm=120, key=0, mode=1)
+        self.camelot_index.add_many([create_track("track", bpm=120, key=1, mode=1)])
+        self.assertListEqual(
+            self.camelot_index.get_compatible_ids(seed, 0.06, 10),
+            [],
+        )
+
+        self.camelot_index.add_many([create_track("track", bpm=118, key=0, mode=1)])
+        self.assertListEqual(
+            self.camelot_index.get_compatible_ids(seed, 0.06, 10),
+            ["track"],
+        )
+        self.assertEqual(self.camelot_index.get_stats()["size"], 1)
+
+    def test_get_compatible_ids3(self) -> None:
+        """Testcase where the tempo range spans several tempo bands
+        """
+        seed = create_track("seed", bpm=180, key=0, mode=1)
+        self.camelot_index.add_many([
+            create_track(f"id{bpm}", bpm=bpm, key=0, mode=1)
+            for bpm in range(160, 201, 2)
+        ])
+
+        self.assertListEqual(
+            self.camelot_index.get_compatible_ids(seed, 0.1, 100),
+            [
+                "id180", "id178", "id182", "id176", "id184", "id174", "id186",
+                "id172", "id188", "id170", "id190", "id168", "id192", "id166",
+                "id194", "id164", "id196", "id162", "id198",
+            ],
+        )
+
+    def test_get_compatible_ids4(self) -> None:
+        """Testcase where the key of the track is unknown
+        """
+        self.camelot_index.add_many([create_track("track", key=0)])
+        self.assertListEqual(
+            self.camelot_index.get_compatible_ids(create_track("seed", key=-1), 1, 10),
+            [],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
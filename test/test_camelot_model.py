@@ -0,0 +1,36 @@
+import unittest
+
+from domain.model.camelot import Camelot
+
+
+class TestCamelot(unittest.TestCase):
+
+    def test_from_key1(self) -> None:
+        """Testcase where keys are mapped to the Camelot wheel
+        """
+        self.assertEqual(str(Camelot.from_key(0, 1)), "8B")  # C major
+        self.assertEqual(str(Camelot.from_key(9, 0)), "8A")  # A minor
+        self.assertEqual(str(Camelot.from_key(11, 1)), "1B")  # B major
+        self.assertEqual(str(Camelot.from_key(8, 0)), "1A")  # G# minor
+        self.assertEqual(str(Camelot.from_key(4, 1)), "12B")  # E major
+
+    def test_from_key2(self) -> None:
+        """Testcase where Spotify could not detect the key
+        """
+        self.assertIsNone(Camelot.from_key(-1, 1))
+
+    def test_compatible(self) -> None:
+        """Testcase where the adjacent numbers wrap around the wheel
+        """
+        self.assertListEqual(
+            [str(camelot) for camelot in Camelot(number=12, letter="B").compatible()],
+            ["12B", "1B", "11B", "12A"],
+        )
+        self.assertListEqual(
+            [str(camelot) for camelot in Camelot(number=1, letter="A").compatible()],
+            ["1A", "2A", "12A", "1B"],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+
+import fakeredis
+
+from envs import Envs
+from persistence.feature_cache import FeatureCache
+
+
+class TestFeatureCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.feature_cache = FeatureCache(
+            envs=Envs(),
+            logger=mock.MagicMock(),
+            redis=self.redis,
+        )
+        return super().setUp()
+
+    def test_get_many1(self) -> None:
+        """Testcase where only a part of the ids is cached
+        """
+        feature = {"id": "spotify_id1", "tempo": 128.0, "key": 1, "mode": 0}
+        self.feature_cache.set_many({"spotify_id1": feature})
+
+        features = self.feature_cache.get_many(["spotify_id1", "spotify_id2"])
+        self.assertListEqual(features, [feature, None])
+
+        stats = self.feature_cache.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_get_many2(self) -> None:
+        """Testcase where no id is specified
+        """
+        self.assertListEqual(self.feature_cache.get_many([]), [])
+
+    def test_set_many(self) -> None:
+        self.feature_cache.set_many({"spotify_id1": {"tempo": 128.0}})
+        ttl = self.redis.ttl("audio_feature:spotify_id1")
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, Envs.FEATURE_CACHE_TTL)
+
+
+if __name__ == '__main__':
+    unittest.main()
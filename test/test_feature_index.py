@@ -0,0 +1,120 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from envs import Envs
+from persistence.feature_index import FeatureIndex, INITIAL_CAPACITY, vectorize
+from persistence.track_catalog import TrackCatalog
+from track_factory import create_track
+
+
+class TestFeatureIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        self.track_catalog.iter_tracks.return_value = iter([])
+        self.feature_index = FeatureIndex(
+            Envs(),
+            mock.MagicMock(),
+            self.track_catalog,
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.feature_index.executor.shutdown(wait=True)
+        return super().tearDown()
+
+    def test_vectorize(self) -> None:
+        """Testcase where keys close on the circle of fifths are close
+        """
+        c_major, g_major, a_minor, f_sharp_major, unknown = vectorize([
+            create_track("c_major", key=0, mode=1),
+            create_track("g_major", key=7, mode=1),
+            create_track("a_minor", key=9, mode=0),
+            create_track("f_sharp_major", key=6, mode=1),
+            create_track("unknown", key=-1, mode=1),
+        ])
+
+        def distance(a: np.ndarray, b: np.ndarray) -> float:
+            return float(np.linalg.norm(a - b))
+
+        self.assertAlmostEqual(distance(c_major[3:5], a_minor[3:5]), 0, places=5)
+        self.assertLess(distance(c_major, g_major), distance(c_major, f_sharp_major))
+        self.assertListEqual(unknown[3:5].tolist(), [0, 0])
+
+    def test_get_similar_ids1(self) -> None:
+        """Testcase where the nearest tracks are returned from the nearest
+        """
+        seed = create_track("seed", bpm=128, energy=0.8)
+        self.feature_index.add_many([
+            seed,
+            create_track("far", bpm=80, energy=0.2),
+            create_track("near", bpm=127, energy=0.8),
+            create_track("middle", bpm=135, energy=0.7),
+            None,
+        ])
+
+        self.assertListEqual(
+            self.feature_index.get_similar_ids(seed, 2),
+            ["near", "middle"],
+        )
+        self.assertListEqual(
+            self.feature_index.get_similar_ids(seed, 10),
+            ["near", "middle", "far"],
+        )
+
+    def test_get_similar_ids2(self) -> None:
+        """Testcase where the features of an indexed track are updated
+        """
+        seed = create_track("seed", bpm=128)
+        self.feature_index.add_many([
+            create_track("track1", bpm=100),
+            create_track("track2", bpm=130),
+        ])
+        self.feature_index.add_many([create_track("track1", bpm=128)])
+
+        self.assertListEqual(
+            self.feature_index.get_similar_ids(seed, 2),
+            ["track1", "track2"],
+        )
+        self.assertEqual(self.feature_index.get_stats()["size"], 2)
+
+    def test_add_many(self) -> None:
+        """Testcase where the matrix grows
+        """
+        num_tracks = INITIAL_CAPACITY * 2 + 1
+        self.feature_index.add_many([
+            create_track(f"id{idx}", bpm=idx) for idx in range(num_tracks)
+        ])
+
+        stats = self.feature_index.get_stats()
+        self.assertEqual(stats["size"], num_tracks)
+        self.assertEqual(stats["capacity"], INITIAL_CAPACITY * 4)
+        self.assertListEqual(
+            self.feature_index.get_similar_ids(create_track("seed", bpm=1000), 1),
+            ["id1000"],
+        )
+
+    def test_sync(self) -> None:
+        """Testcase where tracks stored by other workers are loaded from the
+        catalog
+        """
+        self.track_catalog.iter_tracks.return_value = iter([
+            [create_track("other1", bpm=121)],
+            [create_track("other2", bpm=140)],
+        ])
+
+        # the first query starts loading the tracks in background
+        self.feature_index.get_similar_ids(create_track("seed"), 10)
+        self.feature_index.executor.shutdown(wait=True)
+        self.track_catalog.iter_tracks.assert_called_once_with(fetched_since=None)
+        self.assertListEqual(
+            self.feature_index.get_similar_ids(create_track("seed"), 10),
+            ["other1", "other2"],
+        )
+        # not synced again within the interval
+        self.assertEqual(self.track_catalog.iter_tracks.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
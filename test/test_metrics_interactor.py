@@ -0,0 +1,21 @@
+import unittest
+from unittest import mock
+
+from interactor.metrics_interactor import MetricsInteractor
+from persistence.metrics import MetricsRepositoryImpl
+
+
+class TestMetricsInteractor(unittest.TestCase):
+    def test_get_metrics(self) -> None:
+        metrics_repository = mock.create_autospec(MetricsRepositoryImpl, instance=True)
+        metrics_repository.get_stats.return_value = {"track_cache": {"hits": 1}}
+        metrics_interactor = MetricsInteractor(metrics_repository)
+
+        self.assertEqual(
+            metrics_interactor.get_metrics(),
+            {"track_cache": {"hits": 1}},
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+from datetime import datetime
+import unittest
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from controller.playlist_controller import PlaylistController
+from domain.model.playlist import Playlist, PlaylistInfo, PlaylistInfoPage
+from domain.model.sequence import MAX_SEQUENCE_TRACKS, TooManyTracksError
+from domain.model.track import PlaylistTrack
+from track_factory import create_track
+
+
+class TestPlaylistController(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = Flask(__name__)
+        self.playlist_interactor = MagicMock()
+        auth_interactor = MagicMock()
+        auth_interactor.verify_user.return_value = {"uid": "uid"}
+        playlist_controller = PlaylistController(
+            playlist_usecase=self.playlist_interactor,
+            auth_usecase=auth_interactor,
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/user/<uid>/playlist",
+            view_func=playlist_controller.get_playlist_infos,
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/user/<uid>/playlist/<playlist_id>",
+            view_func=playlist_controller.update_playlist,
+            methods=["PUT"],
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/user/<uid>/playlist/<playlist_id>/sequence",
+            view_func=playlist_controller.auto_sequence,
+            methods=["POST"],
+        )
+        self.headers = {"Authorization": "Bearer token"}
+        return super().setUp()
+
+    def test_get_playlist_infos1(self):
+        """Testcase where the page is not the last one and the cursor of the next
+        page is returned in the header
+        """
+        self.playlist_interactor.get_playlist_infos.return_value = PlaylistInfoPage(
+            playlist_infos=[
+                PlaylistInfo(
+                    id="playlist_id",
+                    uid="uid",
+                    name="name",
+                    desc="desc",
+                    num_tracks=0,
+                    image_url=None,
+                    created_at=datetime(2021, 1, 1),
+                    updated_at=datetime(2021, 1, 1),
+                ),
+            ],
+            next_cursor="next_cursor",
+        )
+        with self.app.test_client() as c:
+            rv = c.get(
+                "/api/v1/user/uid/playlist?sort=name&order=asc&limit=1&cursor=cursor",
+                headers=self.headers,
+            )
+            self.assertEqual(rv.status_code, 200)
+            self.assertEqual(rv.get_json()[0]["id"], "playlist_id")
+            self.assertEqual(rv.headers["X-Next-Cursor"], "next_cursor")
+        self.playlist_interactor.get_playlist_infos.assert_called_once_with(
+            "uid",
+            "name",
+            False,
+            1,
+            "cursor",
+        )
+
+    def test_get_playlist_infos2(self):
+        """Testcase where no page is asked for and all playlists are returned with
+        the default sort
+        """
+        self.playlist_interactor.get_playlist_infos.return_value = PlaylistInfoPage(
+            playlist_infos=[],
+            next_cursor=None,
+        )
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/user/uid/playlist", headers=self.headers)
+            self.assertEqual(rv.status_code, 200)
+            self.assertEqual(rv.get_json(), [])
+            self.assertNotIn("X-Next-Cursor", rv.headers)
+        self.playlist_interactor.get_playlist_infos.assert_called_once_with(
+            "uid",
+            "updated_at",
+            True,
+            None,
+            None,
+        )
+
+    def test_get_playlist_infos5(self):
+        """Testcase where the cursor is given without limit and the default limit
+        is used
+        """
+        self.playlist_interactor.get_playlist_infos.return_value = PlaylistInfoPage(
+            playlist_infos=[],
+            next_cursor=None,
+        )
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/user/uid/playlist?cursor=cursor", headers=self.headers)
+            self.assertEqual(rv.status_code, 200)
+        self.playlist_interactor.get_playlist_infos.assert_called_once_with(
+            "uid",
+            "updated_at",
+            True,
+            50,
+            "cursor",
+        )
+
+    def test_get_playlist_infos3(self):
+        """Testcase where the parameters are invalid
+        """
+        with self.app.test_client() as c:
+            for query in [
+                "sort=desc",
+                "order=random",
+                "limit=0",
+                "limit=101",
+                "limit=ten",
+            ]:
+                rv = c.get(f"/api/v1/user/uid/playlist?{query}", headers=self.headers)
+                self.assertEqual(rv.status_code, 400)
+        self.playlist_interactor.get_playlist_infos.assert_not_called()
+
+    def test_get_playlist_infos4(self):
+        """Testcase where the cursor is invalid
+        """
+        self.playlist_interactor.get_playlist_infos.return_value = None
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/user/uid/playlist?cursor=broken", headers=self.headers)
+            self.assertEqual(rv.status_code, 400)
+            self.assertEqual(rv.data, b"invalid cursor")
+
+    def test_update_playlist(self):
+        """Testcase where a track is added and the whole playlist is returned
+        without the ranks of the tracks
+        """
+        self.playlist_interactor.update_playlist.return_value = Playlist(
+            playlist_info=PlaylistInfo(
+                id="playlist_id",
+                uid="uid",
+                name="name",
+                desc="desc",
+                num_tracks=1,
+                image_url=None,
+                created_at=datetime(2021, 1, 1),
+                updated_at=datetime(2021, 1, 1),
+            ),
+            playlist_tracks=[
+                PlaylistTrack(
+                    id="playlist_track_id",
+                    order=1,
+                    track=create_track("spotify_id"),
+                    created_at=datetime(2021, 1, 1),
+                    updated_at=datetime(2021, 1, 1),
+                    rank="1",
+                ),
+            ],
+        )
+        with self.app.test_client() as c:
+            rv = c.put(
+                "/api/v1/user/uid/playlist/playlist_id",
+                headers=self.headers,
+                json={"spotify_id": "spotify_id"},
+            )
+            self.assertEqual(rv.status_code, 200)
+            body = rv.get_json()
+            self.assertEqual(body["playlist_info"]["num_tracks"], 1)
+            self.assertEqual(len(body["playlist_tracks"]), 1)
+            self.assertEqual(body["playlist_tracks"][0]["order"], 1)
+            self.assertEqual(
+                body["playlist_tracks"][0]["track"]["spotify_id"],
+                "spotify_id",
+            )
+            self.assertNotIn("rank", body["playlist_tracks"][0])
+
+    def test_auto_sequence1(self):
+        """Testcase where the playlist has too many tracks to sequence
+        """
+        self.playlist_interactor.auto_sequence.side_effect = TooManyTracksError(
+            MAX_SEQUENCE_TRACKS + 1
+        )
+        with self.app.test_client() as c:
+            rv = c.post(
+                "/api/v1/user/uid/playlist/playlist_id/sequence",
+                headers=self.headers,
+            )
+            self.assertEqual(rv.status_code, 400)
+
+    def test_auto_sequence2(self):
+        """Testcase where another ValueError is not reported as too many tracks
+        """
+        self.playlist_interactor.auto_sequence.side_effect = ValueError
+        with self.app.test_client() as c:
+            rv = c.post(
+                "/api/v1/user/uid/playlist/playlist_id/sequence",
+                headers=self.headers,
+            )
+            self.assertEqual(rv.status_code, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ import unittest
 from unittest import mock
 
 from interactor.playlist_interactor import PlaylistInteractor
-from domain.model.playlist import Playlist, PlaylistInfo
+from domain.model.playlist import Playlist, PlaylistInfo, PlaylistInfoPage
+from domain.model.sequence import MAX_SEQUENCE_TRACKS, TooManyTracksError
 from domain.model.track import PlaylistTrack, Track
 from persistence.playlist import PlaylistRepositoryImpl
 
@@ -73,11 +74,22 @@ class TestPlaylistInteractor(unittest.TestCase):
         uid = "user id"
         playlist_info = mock.create_autospec(PlaylistInfo, instance=True)
         self.playlist_interactor.playlist_repository.get_playlist_infos \
-            .return_value = [playlist_info]
+            .return_value = PlaylistInfoPage(
+                playlist_infos=[playlist_info],
+                next_cursor="cursor",
+            )
 
-        playlist_infos = self.playlist_interactor.get_playlist_infos(uid)
-        self.assertIsInstance(playlist_infos, list)
-        self.assertIsInstance(playlist_infos[0], PlaylistInfo)
+        playlist_info_page = self.playlist_interactor.get_playlist_infos(
+            uid,
+            "updated_at",
+            True,
+            50,
+        )
+        self.assertIsInstance(playlist_info_page.playlist_infos, list)
+        self.assertIsInstance(playlist_info_page.playlist_infos[0], PlaylistInfo)
+        self.assertEqual(playlist_info_page.next_cursor, "cursor")
+        self.playlist_interactor.playlist_repository.get_playlist_infos \
+            .assert_called_once_with(uid, "updated_at", True, 50, None)
 
     def test_delete_playlist1(self) -> None:
         playlist_id = "playlist_id"
@@ -117,70 +129,28 @@ class TestPlaylistInteractor(unittest.TestCase):
         playlist_id = "playlist_id1"
         playlist_track_id1 = "playlist_track_id1"
         uid = "uid"
-        playlist_track1 = PlaylistTrack(
-            id=playlist_track_id1,
-            order=1,
-            track=Track(
-                spotify_id="spotify_id1",
-                song_name="song_name1",
-                artist="artist1",
-                album_name="album_name1",
-                bpm=111.1,
-                danceability=111.1,
-                energy=111.1,
-                image_url="image_url1",
-                key=1,
-                mode=1,
-                preview_url="preview_url1",
-            ),
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
-        playlist_track2 = PlaylistTrack(
-            id="playlist_track_id2",
-            order=2,
-            track=Track(
-                spotify_id="spotify_id2",
-                song_name="song_name2",
-                artist="artist2",
-                album_name="album_name2",
-                bpm=222.2,
-                danceability=222.2,
-                energy=222.2,
-                image_url="image_url2",
-                key=2,
-                mode=2,
-                preview_url="preview_url2",
-            ),
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
-        self.playlist_interactor.playlist_repository.get_playlist \
-            .return_value = Playlist(
-                playlist_info=PlaylistInfo(
-                    id=playlist_id,
-                    uid=uid,
-                    name="name",
-                    desc="desc",
-                    num_tracks=2,
-                    image_url="image_url",
-                    created_at=datetime.now(),
-                    updated_at=datetime.now(),
-                ),
-                playlist_tracks=[
-                    playlist_track1,
-                    playlist_track2,
-                ],
-            )
-        self.playlist_interactor.playlist_repository.get_playlist_track \
-            .return_value = playlist_track1
+        playlist_repository = self.playlist_interactor.playlist_repository
+        playlist_info_mock = mock.create_autospec(PlaylistInfo, instance=True)
+        playlist_info_mock.uid = uid
+        playlist_repository.get_playlist_info.return_value = playlist_info_mock
+        updated_playlist_info = mock.create_autospec(PlaylistInfo, instance=True)
+        playlist_repository.delete_playlist_track.return_value = updated_playlist_info
 
-        actual_playlist = self.playlist_interactor.delete_track(
+        actual_playlist_info = self.playlist_interactor.delete_track(
             playlist_id,
             playlist_track_id1,
             uid,
         )
-        self.assertIsInstance(actual_playlist, Playlist)
+        self.assertIs(actual_playlist_info, updated_playlist_info)
+        playlist_repository.delete_playlist_track.assert_called_once_with(
+            playlist_id,
+            playlist_track_id1,
+        )
+        # the playlist is not hydrated to delete a track
+        playlist_repository.get_playlist.assert_not_called()
+        playlist_repository.get_playlist_track.assert_not_called()
+        playlist_repository.save_playlist.assert_not_called()
+        self.playlist_interactor.track_repository.get_track_by_id.assert_not_called()
 
     def test_delete_track2(self) -> None:
         """Testcase where specified playlist exists but playlist track does not
@@ -188,38 +158,50 @@ class TestPlaylistInteractor(unittest.TestCase):
         playlist_id = "playlist_id1"
         playlist_track_id1 = "playlist_track_id1"
         uid = "uid"
-        playlist_mock = mock.create_autospec(Playlist, instance=True)
-        playlist_mock.playlist_info = \
-            mock.create_autospec(PlaylistInfo, instance=True)
-        playlist_mock.playlist_info.uid = uid
-        self.playlist_interactor.playlist_repository.get_playlist \
-            .return_value = playlist_mock
-        self.playlist_interactor.playlist_repository.get_playlist_track \
-            .return_value = None
+        playlist_repository = self.playlist_interactor.playlist_repository
+        playlist_info_mock = mock.create_autospec(PlaylistInfo, instance=True)
+        playlist_info_mock.uid = uid
+        playlist_repository.get_playlist_info.return_value = playlist_info_mock
+        playlist_repository.delete_playlist_track.return_value = None
 
-        actual_playlist = self.playlist_interactor.delete_track(
+        actual_playlist_info = self.playlist_interactor.delete_track(
             playlist_id,
             playlist_track_id1,
             uid,
         )
-        self.assertEqual(actual_playlist, None)
+        self.assertEqual(actual_playlist_info, None)
 
     def test_delete_track3(self) -> None:
         """Testcase where specified playlist does not exist but track exists
         """
         playlist_id = "playlist_id1"
         playlist_track_id1 = "playlist_track_id1"
-        self.playlist_interactor.playlist_repository.get_playlist \
-            .return_value = None
-        self.playlist_interactor.playlist_repository.get_playlist_track \
-            .return_value = mock.create_autospec(PlaylistTrack, instance=True)
+        playlist_repository = self.playlist_interactor.playlist_repository
+        playlist_repository.get_playlist_info.return_value = None
 
-        actual_playlist = self.playlist_interactor.delete_track(
+        actual_playlist_info = self.playlist_interactor.delete_track(
             playlist_id,
             playlist_track_id1,
             "uid",
         )
-        self.assertEqual(actual_playlist, None)
+        self.assertEqual(actual_playlist_info, None)
+        playlist_repository.delete_playlist_track.assert_not_called()
+
+    def test_delete_track4(self) -> None:
+        """Testcase where specified playlist is created by another user
+        """
+        playlist_repository = self.playlist_interactor.playlist_repository
+        playlist_info_mock = mock.create_autospec(PlaylistInfo, instance=True)
+        playlist_info_mock.uid = "another_uid"
+        playlist_repository.get_playlist_info.return_value = playlist_info_mock
+
+        actual_playlist_info = self.playlist_interactor.delete_track(
+            "playlist_id1",
+            "playlist_track_id1",
+            "uid",
+        )
+        self.assertEqual(actual_playlist_info, None)
+        playlist_repository.delete_playlist_track.assert_not_called()
 
     def test_patch_playlist_info1(self) -> None:
         """Testcase where specified playlist exists
@@ -256,46 +238,61 @@ class TestPlaylistInteractor(unittest.TestCase):
         """Testcase where specified playlist exists
         """
         uid = "uid"
-        self.playlist_interactor.playlist_repository.get_playlist \
-            .return_value = Playlist(
-                playlist_info=PlaylistInfo(
-                    id="playlist_id",
-                    uid=uid,
-                    name="name",
-                    desc="desc",
-                    num_tracks=0,
-                    image_url="image_url",
-                    created_at=datetime.now(),
-                    updated_at=datetime.now(),
-                ),
-                playlist_tracks=[],
-            )
+        playlist_repository = self.playlist_interactor.playlist_repository
+        playlist_repository.get_playlist_info.return_value = PlaylistInfo(
+            id="playlist_id",
+            uid=uid,
+            name="name",
+            desc="desc",
+            num_tracks=0,
+            image_url="image_url",
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        )
+        track = Track(
+            spotify_id="spotify_id1",
+            song_name="song_name1",
+            artist="artist1",
+            album_name="album_name1",
+            bpm=111.1,
+            danceability=111.1,
+            energy=111.1,
+            image_url="image_url1",
+            key=1,
+            mode=1,
+            preview_url="preview_url1",
+        )
         self.playlist_interactor.track_repository.get_track_by_id \
-            .return_value = Track(
-                spotify_id="spotify_id1",
-                song_name="song_name1",
-                artist="artist1",
-                album_name="album_name1",
-                bpm=111.1,
-                danceability=111.1,
-                energy=111.1,
-                image_url="image_url1",
-                key=1,
-                mode=1,
-                preview_url="preview_url1",
-            )
+            .return_value = track
+        playlist_repository.add_playlist_track.return_value = \
+            mock.create_autospec(PlaylistTrack, instance=True)
+        playlist_repository.get_playlist.return_value = \
+            mock.create_autospec(Playlist, instance=True)
 
         playlist = self.playlist_interactor.update_playlist(
             playlist_id="playlist_id",
             uid=uid,
-            spotify_id="spotify_id",
+            spotify_id="spotify_id1",
         )
         self.assertIsInstance(playlist, Playlist)
+        self.playlist_interactor.track_repository.get_track_by_id \
+            .assert_called_once_with("spotify_id1")
+        playlist_repository.add_playlist_track.assert_called_once_with(
+            "playlist_id",
+            track,
+        )
+        # the playlist is read once from the stored tracks after the track is added
+        # and not saved again
+        playlist_repository.get_playlist.assert_called_once_with(
+            "playlist_id",
+            stored_only=True,
+        )
+        playlist_repository.save_playlist.assert_not_called()
 
     def test_update_playlist2(self) -> None:
         """Testcase where specified playlist does not exist
         """
-        self.playlist_interactor.playlist_repository.get_playlist \
+        self.playlist_interactor.playlist_repository.get_playlist_info \
             .return_value = None
         self.playlist_interactor.track_repository.get_track_by_id \
             .return_value = mock.create_autospec(Track, instance=True)
@@ -306,25 +303,16 @@ class TestPlaylistInteractor(unittest.TestCase):
             uid="uid",
         )
         self.assertEqual(playlist, None)
+        self.playlist_interactor.track_repository.get_track_by_id.assert_not_called()
 
     def test_update_playlist3(self) -> None:
-        """Testcase where specified playlist_track does not exist
+        """Testcase where specified track does not exist
         """
         uid = "uid"
-        self.playlist_interactor.playlist_repository.get_playlist \
-            .return_value = Playlist(
-                playlist_info=PlaylistInfo(
-                    id="playlist_id",
-                    uid=uid,
-                    name="name",
-                    desc="desc",
-                    num_tracks=0,
-                    image_url="image_url",
-                    created_at=datetime.now(),
-                    updated_at=datetime.now(),
-                ),
-                playlist_tracks=[],
-            )
+        playlist_info_mock = mock.create_autospec(PlaylistInfo, instance=True)
+        playlist_info_mock.uid = uid
+        self.playlist_interactor.playlist_repository.get_playlist_info \
+            .return_value = playlist_info_mock
         self.playlist_interactor.track_repository.get_track_by_id \
             .return_value = None
 
@@ -334,6 +322,76 @@ class TestPlaylistInteractor(unittest.TestCase):
             uid=uid,
         )
         self.assertEqual(playlist, None)
+        self.playlist_interactor.playlist_repository.add_playlist_track \
+            .assert_not_called()
+
+    def test_auto_sequence1(self) -> None:
+        """Testcase where specified playlist exists
+        """
+        uid = "uid"
+        playlist = Playlist(
+            playlist_info=PlaylistInfo(
+                id="playlist_id",
+                uid=uid,
+                name="name",
+                desc="desc",
+                num_tracks=0,
+                image_url=None,
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+            ),
+            playlist_tracks=[],
+        )
+        self.playlist_interactor.playlist_repository.get_playlist_info \
+            .return_value = playlist.playlist_info
+        self.playlist_interactor.playlist_repository.get_playlist_tracks \
+            .return_value = playlist.playlist_tracks
+
+        playlist_tracks = self.playlist_interactor.auto_sequence(
+            playlist_id="playlist_id",
+            uid=uid,
+        )
+        self.assertEqual(playlist_tracks, [])
+        self.playlist_interactor.playlist_repository.save_track_orders \
+            .assert_called_once()
+        self.playlist_interactor.playlist_repository.save_playlist \
+            .assert_not_called()
+
+    def test_auto_sequence2(self) -> None:
+        """Testcase where specified playlist is created by another user
+        """
+        playlist_info = mock.MagicMock()
+        playlist_info.uid = "another_uid"
+        self.playlist_interactor.playlist_repository.get_playlist_info \
+            .return_value = playlist_info
+
+        playlist_tracks = self.playlist_interactor.auto_sequence(
+            playlist_id="playlist_id",
+            uid="uid",
+        )
+        self.assertEqual(playlist_tracks, None)
+        self.playlist_interactor.playlist_repository.save_track_orders \
+            .assert_not_called()
+
+    def test_auto_sequence3(self) -> None:
+        """Testcase where the playlist has too many tracks to sequence, and the tracks
+        are not fetched
+        """
+        playlist_info = mock.MagicMock()
+        playlist_info.uid = "uid"
+        playlist_info.num_tracks = MAX_SEQUENCE_TRACKS + 1
+        self.playlist_interactor.playlist_repository.get_playlist_info \
+            .return_value = playlist_info
+
+        with self.assertRaises(TooManyTracksError):
+            self.playlist_interactor.auto_sequence(
+                playlist_id="playlist_id",
+                uid="uid",
+            )
+        self.playlist_interactor.playlist_repository.get_playlist_tracks \
+            .assert_not_called()
+        self.playlist_interactor.playlist_repository.save_track_orders \
+            .assert_not_called()
 
 
 if __name__ == '__main__':
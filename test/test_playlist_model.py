@@ -294,6 +294,198 @@ class TestPlaylistInteractor(unittest.TestCase):
         self.assertEqual(len(new_playlist.playlist_tracks), 1)
         self.assertEqual(new_playlist.playlist_tracks[0].order, 1)
 
+    def test_auto_sequence1(self) -> None:
+        """Testcase where the tracks are reordered by tempo from the first track
+        """
+        date_time = datetime.now()
+        playlist_tracks = [
+            PlaylistTrack(
+                id=f"playlist_track_id{order}",
+                order=order,
+                track=Track(
+                    spotify_id=f"spotify_id{order}",
+                    song_name="song_name",
+                    artist="artist",
+                    album_name="album_name",
+                    bpm=bpm,
+                    danceability=0.5,
+                    energy=0.5,
+                    image_url=f"image_url{order}",
+                    key=0,
+                    mode=1,
+                    preview_url="preview_url",
+                ),
+                created_at=date_time,
+                updated_at=date_time,
+            )
+            for order, bpm in enumerate([100.0, 130.0, 110.0, 120.0], 1)
+        ]
+        playlist = Playlist(
+            playlist_info=PlaylistInfo(
+                id="playlist_id",
+                uid="userid",
+                name="name",
+                desc="desc",
+                num_tracks=4,
+                image_url="image_url1",
+                created_at=date_time,
+                updated_at=date_time,
+            ),
+            playlist_tracks=playlist_tracks,
+        )
+
+        new_playlist = playlist.auto_sequence()
+        self.assertEqual(new_playlist.playlist_info.num_tracks, 4)
+        self.assertEqual(new_playlist.playlist_info.image_url, "image_url1")
+        self.assertEqual(
+            [playlist_track.id for playlist_track in new_playlist.playlist_tracks],
+            [
+                "playlist_track_id1",
+                "playlist_track_id3",
+                "playlist_track_id4",
+                "playlist_track_id2",
+            ],
+        )
+        self.assertEqual(
+            [playlist_track.order for playlist_track in new_playlist.playlist_tracks],
+            [1, 2, 3, 4],
+        )
+        # every track is ranked again and the first track is not moved
+        ranks = [playlist_track.rank for playlist_track in new_playlist.playlist_tracks]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(new_playlist.playlist_tracks[0].updated_at, date_time)
+
+    def test_auto_sequence2(self) -> None:
+        """Testcase where tracks which cannot be fetched follow the sequenced ones
+        in the current order
+        """
+        date_time = datetime.now()
+        playlist_tracks = [
+            PlaylistTrack(
+                id=f"playlist_track_id{order}",
+                order=order,
+                track=None if bpm is None else Track(
+                    spotify_id=f"spotify_id{order}",
+                    song_name="song_name",
+                    artist="artist",
+                    album_name="album_name",
+                    bpm=bpm,
+                    danceability=0.5,
+                    energy=0.5,
+                    image_url=f"image_url{order}",
+                    key=0,
+                    mode=1,
+                    preview_url="preview_url",
+                ),
+                created_at=date_time,
+                updated_at=date_time,
+            )
+            for order, bpm in enumerate([None, 100.0, None, 130.0, 110.0], 1)
+        ]
+        playlist = Playlist(
+            playlist_info=PlaylistInfo(
+                id="playlist_id",
+                uid="userid",
+                name="name",
+                desc="desc",
+                num_tracks=5,
+                image_url="image_url1",
+                created_at=date_time,
+                updated_at=date_time,
+            ),
+            playlist_tracks=playlist_tracks,
+        )
+
+        new_playlist = playlist.auto_sequence()
+        self.assertEqual(
+            [playlist_track.id for playlist_track in new_playlist.playlist_tracks],
+            [
+                "playlist_track_id2",
+                "playlist_track_id5",
+                "playlist_track_id4",
+                "playlist_track_id1",
+                "playlist_track_id3",
+            ],
+        )
+        self.assertEqual(new_playlist.playlist_info.image_url, "image_url2")
+
+    def test_patch_track_order(self) -> None:
+        """Testcase where a track is moved and only its rank is changed
+        """
+        date_time = datetime.now()
+        playlist_tracks = [
+            PlaylistTrack(
+                id=f"playlist_track_id{order}",
+                order=order,
+                track=Track(
+                    spotify_id=f"spotify_id{order}",
+                    song_name="song_name",
+                    artist="artist",
+                    album_name="album_name",
+                    bpm=120.0,
+                    danceability=0.5,
+                    energy=0.5,
+                    image_url=f"image_url{order}",
+                    key=0,
+                    mode=1,
+                    preview_url="preview_url",
+                ),
+                created_at=date_time,
+                updated_at=date_time,
+                rank=rank,
+            )
+            for order, rank in enumerate(["1", "2", "3", "4"], 1)
+        ]
+        playlist = Playlist(
+            playlist_info=PlaylistInfo(
+                id="playlist_id",
+                uid="userid",
+                name="name",
+                desc="desc",
+                num_tracks=4,
+                image_url="image_url1",
+                created_at=date_time,
+                updated_at=date_time,
+            ),
+            playlist_tracks=playlist_tracks,
+        )
+
+        for order_from, order_to, expected in [
+            (1, 3, [2, 3, 1, 4]),
+            (4, 1, [4, 1, 2, 3]),
+            (2, 4, [1, 3, 4, 2]),
+        ]:
+            new_playlist = playlist.patch_track_order(order_from, order_to)
+            self.assertEqual(
+                [
+                    playlist_track.id
+                    for playlist_track in new_playlist.playlist_tracks
+                ],
+                [f"playlist_track_id{idx}" for idx in expected],
+            )
+            self.assertEqual(
+                [
+                    playlist_track.order
+                    for playlist_track in new_playlist.playlist_tracks
+                ],
+                [1, 2, 3, 4],
+            )
+            ranks = [
+                playlist_track.rank for playlist_track in new_playlist.playlist_tracks
+            ]
+            self.assertEqual(ranks, sorted(ranks))
+            changed = [
+                playlist_track.id
+                for playlist_track in new_playlist.playlist_tracks
+                if playlist_track.rank != str(int(playlist_track.id[-1]))
+            ]
+            self.assertEqual(changed, [f"playlist_track_id{order_from}"])
+
+        self.assertEqual(
+            playlist.patch_track_order(4, 1).playlist_info.image_url,
+            "image_url4",
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
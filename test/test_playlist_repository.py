@@ -1,15 +1,32 @@
+from dataclasses import replace
 from datetime import datetime
+from typing import List
 import unittest
 from unittest import mock
 
+import fakeredis
+from sqlalchemy import event, text
+
+from domain.model.playlist import Playlist, PlaylistInfo
+from domain.model.rank import MAX_RANK_LENGTH, spread_ranks
 from domain.model.track import PlaylistTrack, Track
 from persistence.model import db
 from persistence.model.user_playlist import UserPlaylistDataModel
 from persistence.model.playlist import PlaylistInfoDataModel
 from persistence.model.playlist_track import PlaylistTrackDataModel
+from persistence.model.track import TrackDataModel
 from persistence.playlist import PlaylistRepositoryImpl
 from persistence.track import TrackRepositoryImpl
 from db.flask_sqlalchemy_testcase import MyTest
+from envs import Envs
+from persistence.access_token import AccessTokenRepositoryImpl
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.spotify_client import SpotifyClient
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
+from track_factory import create_track
 
 
 class TestTrackRepositoryImpl(MyTest):
@@ -33,6 +50,7 @@ class TestTrackRepositoryImpl(MyTest):
         playlist_id = "playlist_id"
         playlist_info_data = PlaylistInfoDataModel(
             id=playlist_id,
+            uid="uid",
             name="name",
             desc="desc",
             image_url="image_url",
@@ -48,7 +66,7 @@ class TestTrackRepositoryImpl(MyTest):
             id="playlist_track_id",
             playlist_id=playlist_id,
             spotify_id="spotify_id1",
-            order=1,
+            rank="1",
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
         )
@@ -69,6 +87,7 @@ class TestTrackRepositoryImpl(MyTest):
         playlist_id = "playlist_id"
         playlist_info_data = PlaylistInfoDataModel(
             id=playlist_id,
+            uid="uid",
             name="name",
             desc="desc",
             image_url="image_url",
@@ -95,12 +114,37 @@ class TestTrackRepositoryImpl(MyTest):
         playlist = self.playlist_repository.get_playlist("playlist_id")
         self.assertEqual(playlist, None)
 
+    def test_get_playlist4(self) -> None:
+        """Testcase where the tracks are read only from the caches and the track
+        table, and a track stored in neither is None
+        """
+        self._create_playlist("playlist_id", 2)
+        self.track_repository.get_stored_tracks_by_ids.return_value = [
+            create_track("spotify_id1"),
+            None,
+        ]
+
+        playlist = self.playlist_repository.get_playlist(
+            "playlist_id",
+            stored_only=True,
+        )
+
+        self.assertEqual(playlist.playlist_info.num_tracks, 2)
+        self.assertEqual(playlist.playlist_tracks[0].track.spotify_id, "spotify_id1")
+        self.assertIsNone(playlist.playlist_tracks[1].track)
+        self.assertEqual(playlist.playlist_tracks[1].order, 2)
+        self.track_repository.get_stored_tracks_by_ids.assert_called_once_with(
+            ["spotify_id1", "spotify_id2"]
+        )
+        self.track_repository.get_tracks_by_ids.assert_not_called()
+
     def test_get_playlist_info1(self) -> None:
         """Testcase where the specified playlist exists in a DB
         """
         playlist_id = "playlist_id"
         playlist_info_data = PlaylistInfoDataModel(
             id=playlist_id,
+            uid="uid",
             name="name",
             desc="desc",
             image_url="image_url",
@@ -131,12 +175,13 @@ class TestTrackRepositoryImpl(MyTest):
         uid = "uid"
         playlist_info_data1 = PlaylistInfoDataModel(
             id="playlist_id1",
+            uid=uid,
             name="name1",
             desc="desc2",
             image_url="image_url",
             num_tracks=0,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+            created_at=datetime(2021, 1, 1),
+            updated_at=datetime(2021, 1, 1),
         )
         user_playlist_data1 = UserPlaylistDataModel(
             playlist_id="playlist_id1",
@@ -144,12 +189,13 @@ class TestTrackRepositoryImpl(MyTest):
         )
         playlist_info_data2 = PlaylistInfoDataModel(
             id="playlist_id2",
+            uid=uid,
             name="name2",
             desc="desc2",
             image_url="image_url",
             num_tracks=1,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+            created_at=datetime(2021, 1, 2),
+            updated_at=datetime(2021, 1, 2),
         )
         user_playlist_data2 = UserPlaylistDataModel(
             playlist_id="playlist_id2",
@@ -161,17 +207,173 @@ class TestTrackRepositoryImpl(MyTest):
         self.db.session.add(user_playlist_data2)
         self.db.session.commit()
 
-        playlist_infos = self.playlist_repository.get_playlist_infos(uid)
+        playlist_info_page = self.playlist_repository.get_playlist_infos(
+            uid,
+            "updated_at",
+            True,
+            50,
+        )
+        playlist_infos = playlist_info_page.playlist_infos
         self.assertIsInstance(playlist_infos, list)
         self.assertEqual(len(playlist_infos), 2)
-        self.assertEqual(playlist_infos[0].id, "playlist_id1")
-        self.assertEqual(playlist_infos[1].id, "playlist_id2")
+        self.assertEqual(playlist_infos[0].id, "playlist_id2")
+        self.assertEqual(playlist_infos[1].id, "playlist_id1")
         self.assertEqual(playlist_infos[0].uid, uid)
         self.assertEqual(playlist_infos[1].uid, uid)
+        self.assertEqual(playlist_info_page.next_cursor, None)
 
     def test_get_playlist_infos2(self) -> None:
-        playlist_infos = self.playlist_repository.get_playlist_infos("uid")
-        self.assertEqual(len(playlist_infos), 0)
+        playlist_info_page = self.playlist_repository.get_playlist_infos(
+            "uid",
+            "updated_at",
+            True,
+            50,
+        )
+        self.assertEqual(len(playlist_info_page.playlist_infos), 0)
+        self.assertEqual(playlist_info_page.next_cursor, None)
+
+    def test_get_playlist_infos3(self) -> None:
+        """Testcase where playlists are read page by page with the cursor for each
+        sort, including ties of the sort column and a playlist of another user
+        """
+        uid = "uid"
+        for idx in range(7):
+            self.db.session.add(
+                PlaylistInfoDataModel(
+                    id=f"playlist_id{idx}",
+                    uid=uid if idx != 6 else "another_uid",
+                    name=f"name{idx % 3}",
+                    desc="desc",
+                    image_url="image_url",
+                    num_tracks=idx % 2,
+                    created_at=datetime(2021, 1, 1),
+                    updated_at=datetime(2021, 1, 1 + idx % 4),
+                )
+            )
+            self.db.session.add(
+                UserPlaylistDataModel(
+                    playlist_id=f"playlist_id{idx}",
+                    uid=uid if idx != 6 else "another_uid",
+                )
+            )
+        self.db.session.commit()
+
+        for sort in ["updated_at", "name", "num_tracks"]:
+            for descending in [True, False]:
+                playlist_ids = []
+                cursor = None
+                while True:
+                    playlist_info_page = self.playlist_repository \
+                        .get_playlist_infos(uid, sort, descending, 2, cursor)
+                    self.assertLessEqual(len(playlist_info_page.playlist_infos), 2)
+                    playlist_ids += [
+                        playlist_info.id
+                        for playlist_info in playlist_info_page.playlist_infos
+                    ]
+                    cursor = playlist_info_page.next_cursor
+                    if cursor is None:
+                        break
+
+                playlist_datas = self.db.session.query(PlaylistInfoDataModel) \
+                    .filter(PlaylistInfoDataModel.id != "playlist_id6") \
+                    .all()
+                expected = sorted(
+                    playlist_datas,
+                    key=lambda e: (getattr(e, sort), e.id),
+                    reverse=descending,
+                )
+                self.assertEqual(playlist_ids, [e.id for e in expected])
+
+                # all playlists are in one page without limit
+                playlist_info_page = self.playlist_repository \
+                    .get_playlist_infos(uid, sort, descending)
+                self.assertEqual(
+                    [
+                        playlist_info.id
+                        for playlist_info in playlist_info_page.playlist_infos
+                    ],
+                    [e.id for e in expected],
+                )
+                self.assertIsNone(playlist_info_page.next_cursor)
+
+    def test_get_playlist_infos4(self) -> None:
+        """Testcase where the cursor is broken or made for another sort
+        """
+        for idx in range(3):
+            self.db.session.add(
+                PlaylistInfoDataModel(
+                    id=f"playlist_id{idx}",
+                    uid="uid",
+                    name=f"name{idx}",
+                    desc="desc",
+                    image_url="image_url",
+                    num_tracks=idx,
+                    created_at=datetime(2021, 1, 1),
+                    updated_at=datetime(2021, 1, 1),
+                )
+            )
+            self.db.session.add(
+                UserPlaylistDataModel(playlist_id=f"playlist_id{idx}", uid="uid")
+            )
+        self.db.session.commit()
+
+        cursor = self.playlist_repository.get_playlist_infos(
+            "uid",
+            "name",
+            False,
+            1,
+        ).next_cursor
+        self.assertIsNotNone(cursor)
+
+        for sort, descending, cursor_ in [
+            ("name", True, cursor),
+            ("num_tracks", False, cursor),
+            ("name", False, "broken"),
+            ("name", False, cursor[:-4]),
+        ]:
+            playlist_info_page = self.playlist_repository.get_playlist_infos(
+                "uid",
+                sort,
+                descending,
+                1,
+                cursor_,
+            )
+            self.assertEqual(playlist_info_page, None)
+
+    def test_get_playlist_infos5(self) -> None:
+        """Testcase where a saved playlist is listed by its owner with the index
+        starting with uid
+        """
+        for uid in ["uid", "another_uid"]:
+            self.playlist_repository.save_playlist_info(
+                PlaylistInfo(
+                    id=f"playlist_id_{uid}",
+                    uid=uid,
+                    name="name",
+                    desc="desc",
+                    num_tracks=0,
+                    image_url=None,
+                    created_at=datetime(2021, 1, 1),
+                    updated_at=datetime(2021, 1, 1),
+                )
+            )
+
+        playlist_info_page = self.playlist_repository.get_playlist_infos(
+            "uid",
+            "updated_at",
+            True,
+        )
+        self.assertEqual(
+            [playlist_info.id for playlist_info in playlist_info_page.playlist_infos],
+            ["playlist_id_uid"],
+        )
+
+        plan = self.db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM playlist WHERE uid = 'uid' "
+            "ORDER BY updated_at DESC, id DESC LIMIT 3"
+        )).all()
+        self.assertIn("ix_playlist_uid_updated_at_id", str(plan))
+        self.assertNotIn("TEMP B-TREE", str(plan))
 
     def test_get_playlist_track1(self) -> None:
         playlist_track_id = "playlist_track_id"
@@ -179,7 +381,7 @@ class TestTrackRepositoryImpl(MyTest):
             id=playlist_track_id,
             playlist_id="playlist_id",
             spotify_id="spotify_id",
-            order=1,
+            rank="1",
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
         )
@@ -200,6 +402,7 @@ class TestTrackRepositoryImpl(MyTest):
         playlist_id = "playlist_id"
         playlist_info_data = PlaylistInfoDataModel(
             id=playlist_id,
+            uid="uid",
             name="name",
             desc="desc",
             image_url="image_url",
@@ -215,7 +418,7 @@ class TestTrackRepositoryImpl(MyTest):
             id="playlist_track_id1",
             playlist_id=playlist_id,
             spotify_id="spotify_id1",
-            order=1,
+            rank="1",
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
         )
@@ -223,7 +426,7 @@ class TestTrackRepositoryImpl(MyTest):
             id="playlist_track_id2",
             playlist_id=playlist_id,
             spotify_id="spotify_id2",
-            order=2,
+            rank="2",
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow(),
         )
@@ -247,6 +450,570 @@ class TestTrackRepositoryImpl(MyTest):
         self.assertEqual(playlist_track_data, None)
         self.assertEqual(user_playlist_data, None)
 
+    def test_save_track_orders(self) -> None:
+        playlist_id = "playlist_id"
+        created_at = datetime(2021, 1, 1)
+        self.db.session.add(
+            PlaylistInfoDataModel(
+                id=playlist_id,
+                uid="uid",
+                name="name",
+                desc="desc",
+                image_url="image_url1",
+                num_tracks=3,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+        )
+        self.db.session.add(UserPlaylistDataModel(playlist_id=playlist_id, uid="uid"))
+        for order in range(1, 4):
+            self.db.session.add(
+                PlaylistTrackDataModel(
+                    id=f"playlist_track_id{order}",
+                    playlist_id=playlist_id,
+                    spotify_id=f"spotify_id{order}",
+                    rank=str(order),
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+            )
+        self.db.session.commit()
+
+        updated_at = datetime(2021, 1, 2)
+        tracks = [mock.create_autospec(Track, instance=True) for _ in range(3)]
+        playlist = Playlist(
+            playlist_info=PlaylistInfo(
+                id=playlist_id,
+                uid="uid",
+                name="name",
+                desc="desc",
+                num_tracks=3,
+                image_url="image_url3",
+                created_at=created_at,
+                updated_at=updated_at,
+            ),
+            playlist_tracks=[
+                PlaylistTrack(
+                    id=f"playlist_track_id{idx}",
+                    order=order,
+                    track=tracks[idx - 1],
+                    created_at=created_at,
+                    updated_at=updated_at,
+                    rank=str(order),
+                )
+                for order, idx in enumerate([3, 1, 2], 1)
+            ],
+        )
+        self.playlist_repository.save_track_orders(playlist)
+
+        playlist_track_datas = self.db.session.query(PlaylistTrackDataModel) \
+            .filter_by(playlist_id=playlist_id) \
+            .order_by(PlaylistTrackDataModel.rank) \
+            .all()
+        self.assertEqual(
+            [playlist_track_data.id for playlist_track_data in playlist_track_datas],
+            ["playlist_track_id3", "playlist_track_id1", "playlist_track_id2"],
+        )
+        self.assertEqual(playlist_track_datas[0].updated_at, updated_at)
+        self.assertEqual(playlist_track_datas[0].spotify_id, "spotify_id3")
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id=playlist_id) \
+            .first()
+        self.assertEqual(playlist_info_data.image_url, "image_url3")
+        self.assertEqual(playlist_info_data.num_tracks, 3)
+
+    def _create_playlist(self, playlist_id: str, num_tracks: int) -> Playlist:
+        """Store a playlist with the tracks and return it as Playlist object"""
+        created_at = datetime(2021, 1, 1)
+        playlist = Playlist(
+            playlist_info=PlaylistInfo(
+                id=playlist_id,
+                uid="uid",
+                name="name",
+                desc="desc",
+                num_tracks=num_tracks,
+                image_url="image_url",
+                created_at=created_at,
+                updated_at=created_at,
+            ),
+            playlist_tracks=[
+                PlaylistTrack(
+                    id=f"playlist_track_id{order}",
+                    order=order,
+                    track=create_track(f"spotify_id{order}"),
+                    created_at=created_at,
+                    updated_at=created_at,
+                    rank=rank,
+                )
+                for order, rank in enumerate(spread_ranks(num_tracks), 1)
+            ],
+        )
+        self.db.session.add(
+            PlaylistInfoDataModel(
+                id=playlist_id,
+                uid="uid",
+                name="name",
+                desc="desc",
+                image_url="image_url",
+                num_tracks=num_tracks,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+        )
+        self.db.session.add(UserPlaylistDataModel(playlist_id=playlist_id, uid="uid"))
+        for playlist_track in playlist.playlist_tracks:
+            self.db.session.add(
+                PlaylistTrackDataModel(
+                    id=playlist_track.id,
+                    playlist_id=playlist_id,
+                    spotify_id=playlist_track.track.spotify_id,
+                    rank=playlist_track.rank,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+            )
+        self.db.session.commit()
+        return playlist
+
+    def _record_statements(self) -> List[str]:
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.db.engine, "before_cursor_execute", record)
+        self.addCleanup(
+            event.remove,
+            self.db.engine,
+            "before_cursor_execute",
+            record,
+        )
+        return statements
+
+    def _get_rows(self, playlist_id: str) -> List[tuple]:
+        return [
+            (playlist_track_data.id, playlist_track_data.spotify_id)
+            for playlist_track_data in self.db.session.query(PlaylistTrackDataModel)
+            .filter_by(playlist_id=playlist_id)
+            .order_by(PlaylistTrackDataModel.rank)
+        ]
+
+    def test_save_playlist1(self) -> None:
+        """Testcase where a track is moved and only the rows between the orders are
+        written by one statement
+        """
+        playlist = self._create_playlist("playlist_id", 10)
+        statements = self._record_statements()
+
+        self.playlist_repository.save_playlist(playlist.patch_track_order(8, 9))
+
+        writes = [
+            statement for statement in statements
+            if statement.startswith(("INSERT", "UPDATE", "DELETE"))
+            and "playlist_track" in statement
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(
+            [spotify_id for _, spotify_id in self._get_rows("playlist_id")],
+            [f"spotify_id{order}" for order in [1, 2, 3, 4, 5, 6, 7, 9, 8, 10]],
+        )
+        self.track_repository.get_tracks_by_ids.assert_not_called()
+
+    def test_save_playlist4(self) -> None:
+        """Testcase where every track of a large playlist is ranked again and the
+        rows are written by a few statements
+        """
+        playlist = self._create_playlist("playlist_id", 1200)
+        statements = self._record_statements()
+
+        reversed_tracks = playlist.playlist_tracks[::-1]
+        self.playlist_repository.save_playlist(
+            Playlist(
+                playlist_info=playlist.playlist_info,
+                playlist_tracks=[
+                    replace(playlist_track, order=order, rank=rank)
+                    for order, (playlist_track, rank) in enumerate(
+                        zip(reversed_tracks, spread_ranks(1200)),
+                        1,
+                    )
+                ],
+            )
+        )
+
+        # reading the stored rows, the playlist, user_playlist, the rows in chunks
+        self.assertLessEqual(len(statements), 6)
+        rows = self._get_rows("playlist_id")
+        self.assertEqual(len(rows), 1200)
+        self.assertEqual(rows[0][1], "spotify_id1200")
+        self.assertEqual(rows[1][1], "spotify_id1199")
+
+    def test_save_playlist5(self) -> None:
+        """Testcase where a track is moved to the top many times, and the ranks are
+        given again before a long one is written, keeping the order
+        """
+        self.track_repository.get_tracks_by_ids.side_effect = \
+            lambda ids: [create_track(id_) for id_ in ids]
+        self._create_playlist("playlist_id", 5)
+        max_length = 0
+        for _ in range(80):
+            playlist = self.playlist_repository.get_playlist("playlist_id")
+            playlist = playlist.patch_track_order(5, 1)
+            self.playlist_repository.save_playlist(playlist)
+            max_length = max(
+                max_length,
+                *(len(rank) for _, rank in self.db.session.query(
+                    PlaylistTrackDataModel.id,
+                    PlaylistTrackDataModel.rank,
+                )),
+            )
+        self.assertLessEqual(max_length, MAX_RANK_LENGTH)
+
+        playlist_track_datas = self.db.session.query(PlaylistTrackDataModel) \
+            .filter_by(playlist_id="playlist_id") \
+            .order_by(PlaylistTrackDataModel.rank) \
+            .all()
+        self.assertEqual(
+            [data.id for data in playlist_track_datas],
+            [playlist_track.id for playlist_track in playlist.playlist_tracks],
+        )
+
+    def test_add_playlist_track1(self) -> None:
+        """Testcase where a track is appended by one INSERT without reading the
+        other tracks
+        """
+        self._create_playlist("playlist_id", 3)
+
+        statements = self._record_statements()
+        playlist_track = self.playlist_repository.add_playlist_track(
+            "playlist_id",
+            create_track("spotify_id4"),
+        )
+
+        self.assertEqual(playlist_track.order, 4)
+        self.assertEqual(
+            [spotify_id for _, spotify_id in self._get_rows("playlist_id")],
+            ["spotify_id1", "spotify_id2", "spotify_id3", "spotify_id4"],
+        )
+        self.assertEqual(
+            [
+                statement.split()[0] for statement in statements
+                if statement.split()[0] in ["INSERT", "UPDATE", "DELETE"]
+            ],
+            ["INSERT", "UPDATE"],
+        )
+        self.assertFalse(any(
+            statement.startswith("UPDATE playlist_track") for statement in statements
+        ))
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.num_tracks, 4)
+        self.assertEqual(playlist_info_data.image_url, "image_url")
+        self.track_repository.get_track_by_id.assert_not_called()
+        self.track_repository.get_tracks_by_ids.assert_not_called()
+
+        playlist_tracks = self.playlist_repository.get_playlist_tracks("playlist_id")
+        self.assertEqual(playlist_tracks[-1].id, playlist_track.id)
+        self.assertEqual(playlist_tracks[-1].order, 4)
+
+    def test_add_playlist_track2(self) -> None:
+        """Testcase where a track is added to an empty playlist and its image is
+        used for the playlist
+        """
+        self._create_playlist("playlist_id", 0)
+        track = create_track("spotify_id1")
+
+        playlist_track = self.playlist_repository.add_playlist_track(
+            "playlist_id",
+            track,
+        )
+
+        self.assertEqual(playlist_track.order, 1)
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.num_tracks, 1)
+        self.assertEqual(playlist_info_data.image_url, track.image_url)
+
+    def test_add_playlist_track3(self) -> None:
+        """Testcase where the playlist does not exist
+        """
+        playlist_track = self.playlist_repository.add_playlist_track(
+            "playlist_id",
+            create_track("spotify_id1"),
+        )
+
+        self.assertIsNone(playlist_track)
+        self.assertEqual(self._get_rows("playlist_id"), [])
+
+    def test_add_playlist_track4(self) -> None:
+        """Testcase where the rank after the last track would be too long, and the
+        ranks are given again in the same transaction
+        """
+        self._create_playlist("playlist_id", 2)
+        self.db.session.query(PlaylistTrackDataModel) \
+            .filter_by(id="playlist_track_id2") \
+            .update({"rank": "zzzzzzzzzzzz"})
+        self.db.session.commit()
+
+        playlist_track = self.playlist_repository.add_playlist_track(
+            "playlist_id",
+            create_track("spotify_id3"),
+        )
+
+        self.assertEqual(
+            [spotify_id for _, spotify_id in self._get_rows("playlist_id")],
+            ["spotify_id1", "spotify_id2", "spotify_id3"],
+        )
+        ranks = [
+            rank for rank, in self.db.session.query(PlaylistTrackDataModel.rank)
+        ]
+        self.assertLessEqual(max(len(rank) for rank in ranks), MAX_RANK_LENGTH)
+        self.assertIn(playlist_track.rank, ranks)
+
+    def test_delete_playlist_track1(self) -> None:
+        """Testcase where the first track is deleted and image_url of the next one is
+        read from the track table without fetching tracks
+        """
+        self._create_playlist("playlist_id", 3)
+        self.db.session.add(TrackDataModel(
+            spotify_id="spotify_id2",
+            song_name="song_name2",
+            artist="artist2",
+            album_name="album_name2",
+            bpm=120.0,
+            key=1,
+            mode=1,
+            danceability=0.5,
+            energy=0.5,
+            image_url="image_url2",
+            preview_url=None,
+            fetched_at=datetime(2021, 1, 1),
+        ))
+        self.db.session.commit()
+
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            "playlist_id",
+            "playlist_track_id1",
+        )
+
+        self.assertEqual(playlist_info.num_tracks, 2)
+        self.assertEqual(playlist_info.image_url, "image_url2")
+        self.assertEqual(playlist_info.uid, "uid")
+        self.assertEqual(
+            [spotify_id for _, spotify_id in self._get_rows("playlist_id")],
+            ["spotify_id2", "spotify_id3"],
+        )
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.num_tracks, 2)
+        self.assertEqual(playlist_info_data.image_url, "image_url2")
+        self.assertGreater(playlist_info_data.updated_at, datetime(2021, 1, 1))
+        self.track_repository.get_track_by_id.assert_not_called()
+        self.track_repository.get_tracks_by_ids.assert_not_called()
+
+    def test_delete_playlist_track2(self) -> None:
+        """Testcase where a track in the middle is deleted, so image_url is kept
+        and the other rows are not written
+        """
+        self._create_playlist("playlist_id", 3)
+
+        statements = self._record_statements()
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            "playlist_id",
+            "playlist_track_id2",
+        )
+
+        self.assertEqual(playlist_info.num_tracks, 2)
+        self.assertEqual(playlist_info.image_url, "image_url")
+        self.assertEqual(
+            [spotify_id for _, spotify_id in self._get_rows("playlist_id")],
+            ["spotify_id1", "spotify_id3"],
+        )
+        self.assertFalse(any(
+            statement.startswith("UPDATE playlist_track") for statement in statements
+        ))
+        self.track_repository.get_track_by_id.assert_not_called()
+
+    def test_delete_playlist_track3(self) -> None:
+        """Testcase where the playlist track is not in the playlist
+        """
+        self._create_playlist("playlist_id1", 2)
+        self._create_playlist("playlist_id2", 0)
+
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            "playlist_id2",
+            "playlist_track_id1",
+        )
+
+        self.assertIsNone(playlist_info)
+        self.assertEqual(len(self._get_rows("playlist_id1")), 2)
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id2") \
+            .first()
+        self.assertEqual(playlist_info_data.num_tracks, 0)
+
+    def test_delete_playlist_track4(self) -> None:
+        """Testcase where the first track is deleted and the next one is not in the
+        track table, so it is looked up after the playlist is unlocked
+        """
+        self._create_playlist("playlist_id", 2)
+        self.track_repository.get_track_by_id.return_value = \
+            replace(create_track("spotify_id2"), image_url="image_url2")
+
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            "playlist_id",
+            "playlist_track_id1",
+        )
+
+        self.assertEqual(playlist_info.num_tracks, 1)
+        self.assertEqual(playlist_info.image_url, "image_url2")
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.image_url, "image_url2")
+        self.track_repository.get_track_by_id.assert_called_once_with("spotify_id2")
+
+    def test_delete_playlist_track5(self) -> None:
+        """Testcase where the next track is only in the cache, so its image is read
+        from the cache without asking Spotify
+        """
+        logger = mock.MagicMock()
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        spotify_client = mock.create_autospec(SpotifyClient, instance=True)
+        track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        track_catalog.get_many.side_effect = lambda ids: ([None] * len(ids), [])
+        track_cache = TrackCache(Envs(), logger, redis)
+        track_cache.set_many([
+            replace(create_track("spotify_id2"), image_url="image_url2")
+        ])
+        track_repository = TrackRepositoryImpl(
+            logger,
+            mock.create_autospec(AccessTokenRepositoryImpl, instance=True),
+            spotify_client,
+            FeatureCache(Envs(), logger, redis),
+            track_cache,
+            track_catalog,
+            mock.create_autospec(FeatureIndex, instance=True),
+            mock.create_autospec(CamelotIndex, instance=True),
+        )
+        playlist_repository = PlaylistRepositoryImpl(
+            self.db,
+            logger=logger,
+            track_repository=track_repository,
+        )
+        self._create_playlist("playlist_id", 3)
+
+        playlist_info = playlist_repository.delete_playlist_track(
+            "playlist_id",
+            "playlist_track_id1",
+        )
+
+        self.assertEqual(playlist_info.image_url, "image_url2")
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.image_url, "image_url2")
+        spotify_client.get.assert_not_called()
+
+    def test_delete_playlist_track6(self) -> None:
+        """Testcase where the next track cannot be looked up, so image_url is kept
+        instead of being None
+        """
+        self._create_playlist("playlist_id", 2)
+        self.track_repository.get_track_by_id.side_effect = RuntimeError
+
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            "playlist_id",
+            "playlist_track_id1",
+        )
+
+        self.assertEqual(playlist_info.num_tracks, 1)
+        self.assertEqual(playlist_info.image_url, "image_url")
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.num_tracks, 1)
+        self.assertEqual(playlist_info_data.image_url, "image_url")
+
+    def test_delete_playlist_track7(self) -> None:
+        """Testcase where the last track is deleted, so image_url is None
+        """
+        self._create_playlist("playlist_id", 1)
+
+        playlist_info = self.playlist_repository.delete_playlist_track(
+            "playlist_id",
+            "playlist_track_id1",
+        )
+
+        self.assertEqual(playlist_info.num_tracks, 0)
+        self.assertIsNone(playlist_info.image_url)
+        self.track_repository.get_track_by_id.assert_not_called()
+
+    def test_save_playlist2(self) -> None:
+        """Testcase where a track is added and another one is deleted
+        """
+        playlist = self._create_playlist("playlist_id", 3)
+
+        playlist = playlist.delete(playlist.playlist_tracks[0])
+        playlist = playlist.add(create_track("spotify_id4"))
+        self.playlist_repository.save_playlist(playlist)
+
+        rows = self._get_rows("playlist_id")
+        self.assertEqual(
+            [spotify_id for _, spotify_id in rows],
+            ["spotify_id2", "spotify_id3", "spotify_id4"],
+        )
+        self.assertEqual(rows[2][0], str(playlist.playlist_tracks[2].id))
+        playlist_info_data = self.db.session.query(PlaylistInfoDataModel) \
+            .filter_by(id="playlist_id") \
+            .first()
+        self.assertEqual(playlist_info_data.num_tracks, 3)
+        self.track_repository.get_tracks_by_ids.assert_not_called()
+
+    def test_save_playlist3(self) -> None:
+        """Testcase where tracks are added, moved and deleted with the repository of
+        tracks which would ask Spotify, and no request is sent to Spotify
+        """
+        logger = mock.MagicMock()
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        spotify_client = mock.create_autospec(SpotifyClient, instance=True)
+        access_token_repository = mock.create_autospec(
+            AccessTokenRepositoryImpl,
+            instance=True,
+        )
+        track_repository = TrackRepositoryImpl(
+            logger,
+            access_token_repository,
+            spotify_client,
+            FeatureCache(Envs(), logger, redis),
+            TrackCache(Envs(), logger, redis),
+            mock.create_autospec(TrackCatalog, instance=True),
+            mock.create_autospec(FeatureIndex, instance=True),
+            mock.create_autospec(CamelotIndex, instance=True),
+        )
+        playlist_repository = PlaylistRepositoryImpl(
+            self.db,
+            logger=logger,
+            track_repository=track_repository,
+        )
+        playlist = self._create_playlist("playlist_id", 5)
+
+        playlist = playlist.add(create_track("spotify_id6"))
+        playlist_repository.save_playlist(playlist)
+        playlist = playlist.patch_track_order(6, 1)
+        playlist_repository.save_playlist(playlist)
+        playlist = playlist.delete(playlist.playlist_tracks[2])
+        playlist_repository.save_playlist(playlist)
+
+        self.assertEqual(
+            [spotify_id for _, spotify_id in self._get_rows("playlist_id")],
+            ["spotify_id6", "spotify_id1", "spotify_id3", "spotify_id4", "spotify_id5"],
+        )
+        spotify_client.get.assert_not_called()
+        access_token_repository.get_access_token.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+from domain.model.rank import (
+    MAX_RANK_LENGTH,
+    needs_rebalance,
+    rank_between,
+    RANK_WIDTH,
+    spread_ranks,
+)
+
+
+class TestRank(unittest.TestCase):
+
+    def test_rank_between1(self) -> None:
+        """Testcase where a rank is taken between two ranks
+        """
+        self.assertEqual(rank_between("1", "3"), "2")
+        self.assertEqual(rank_between("1", "2"), "1i")
+        self.assertEqual(rank_between("1", "105"), "103")
+        self.assertEqual(rank_between(None, "1"), "0i")
+
+    def test_rank_between2(self) -> None:
+        """Testcase where a rank is appended and keeps the length
+        """
+        ranks = spread_ranks(1)
+        for _ in range(1000):
+            ranks.append(rank_between(ranks[-1], None))
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertLessEqual(max(len(rank) for rank in ranks), RANK_WIDTH)
+
+    def test_rank_between3(self) -> None:
+        """Testcase where ranks are inserted at random positions and keep the order
+        """
+        rand = random.Random(0)
+        ranks = spread_ranks(3)
+        for _ in range(2000):
+            idx = rand.randrange(len(ranks) + 1)
+            before = ranks[idx - 1] if idx > 0 else None
+            after = ranks[idx] if idx < len(ranks) else None
+            rank = rank_between(before, after)
+            self.assertFalse(rank.endswith("0"))
+            ranks.insert(idx, rank)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), len(ranks))
+
+    def test_spread_ranks(self) -> None:
+        ranks = spread_ranks(100)
+        self.assertEqual(len(ranks), 100)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertLessEqual(max(len(rank) for rank in ranks), RANK_WIDTH)
+        self.assertFalse(needs_rebalance(ranks))
+        self.assertTrue(needs_rebalance(ranks + ["1" * (MAX_RANK_LENGTH + 1)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,35 +1,94 @@
+import gzip
+import json
 import unittest
 from unittest.mock import MagicMock
 
 from flask import Flask
 
 from controller.ranking_controller import RankingController
+from domain.model.ranking import RankingPayload
 
 
 class TestRankingController(unittest.TestCase):
     def setUp(self) -> None:
         self.app = Flask(__name__)
-        return super().setUp()
-
-    def test_get_ranking(self):
-        expected_ranking = [
+        self.expected_ranking = [
             {"song": "song_name", "artist": "artist1"},
             {"song": "song_name2", "artist": "artist2"},
             {"song": "song_name3", "artist": "artist3"},
         ]
-        ranking_interactor = MagicMock()
-        ranking_interactor.get_ranking = lambda: expected_ranking
+        body = json.dumps(self.expected_ranking).encode()
+
+        def get_ranking_payload(compressed: bool, chart: str) -> RankingPayload:
+            if compressed:
+                return RankingPayload(
+                    gzip.compress(body), "etag-gzip", 100.0, "gzip"
+                )
+            return RankingPayload(body, "etag", 100.0)
+
+        self.ranking_interactor = MagicMock()
+        self.ranking_interactor.get_ranking_payload = get_ranking_payload
+        self.ranking_interactor.get_charts.return_value = ["global", "jp"]
         ranking_controller = RankingController(
-            ranking_usecase=ranking_interactor
+            ranking_usecase=self.ranking_interactor
         )
         self.app.add_url_rule(
             rule="/api/v1/ranking",
             view_func=ranking_controller.get_ranking
         )
+        return super().setUp()
+
+    def test_get_ranking1(self):
+        """Testcase where the client does not accept gzip
+        """
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/ranking", headers={"Accept-Encoding": "identity"})
+            self.assertListEqual(rv.get_json(), self.expected_ranking)
+            self.assertEqual(rv.headers["ETag"], '"etag"')
+            self.assertIsNone(rv.headers.get("Content-Encoding"))
+
+    def test_get_ranking2(self):
+        """Testcase where the client accepts gzip
+        """
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/ranking", headers={"Accept-Encoding": "gzip, br"})
+            self.assertEqual(rv.headers["Content-Encoding"], "gzip")
+            self.assertEqual(rv.headers["ETag"], '"etag-gzip"')
+            self.assertListEqual(
+                json.loads(gzip.decompress(rv.data)),
+                self.expected_ranking,
+            )
+
+    def test_get_ranking3(self):
+        """Testcase where the client has the same ranking
+        """
+        with self.app.test_client() as c:
+            rv = c.get(
+                "/api/v1/ranking",
+                headers={"Accept-Encoding": "identity", "If-None-Match": '"etag"'},
+            )
+            self.assertEqual(rv.status_code, 304)
+            self.assertEqual(rv.data, b"")
+            self.assertEqual(rv.headers["ETag"], '"etag"')
+
+    def test_get_ranking4(self):
+        """Testcase where the chart is specified
+        """
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/ranking?chart=jp")
+            self.assertEqual(rv.status_code, 200)
+
+            rv = c.get("/api/v1/ranking?chart=unknown")
+            self.assertEqual(rv.status_code, 404)
+            self.assertEqual(rv.data, b"unknown chart")
+
+    def test_get_ranking5(self):
+        """Testcase where the ranking cannot be created for now
+        """
+        self.ranking_interactor.get_ranking_payload = MagicMock(return_value=None)
         with self.app.test_client() as c:
             rv = c.get("/api/v1/ranking")
-            actual_ranking = rv.get_json()
-            self.assertListEqual(actual_ranking, expected_ranking)
+            self.assertEqual(rv.status_code, 503)
 
 
 if __name__ == '__main__':
@@ -1,30 +1,81 @@
+import json
 import time
+from typing import Optional
 import unittest
 from unittest import mock
 
 import fakeredis
 
+from domain.model.ranking import RankingPayload
+from domain.model.rate_limit import SpotifyRateLimitError
 from envs import Envs
 from interactor.ranking_interactor import RankingInteractor
 from persistence.access_token import AccessTokenRepositoryImpl
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.rate_limiter import RateLimiter
+from persistence.spotify_client import SpotifyClient
+from persistence.track import TrackRepositoryImpl
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
 
 
 class TestRankingInteractor(unittest.TestCase):
-    def create(self, ranking: list, ttl: float) -> None:
+    def create(self, ranking: list, ttl: float, chart: str = "global") -> None:
         self.ranking = ranking
         self.ttl = ttl
+        self.created = True
+
+    def get_payload(
+        self,
+        compressed: bool,
+        chart: str = "global",
+    ) -> Optional[RankingPayload]:
+        if not (self.ranking_repostory.exist() or self.created):
+            return None
+
+        return RankingPayload(
+            body=json.dumps(self.ranking_repostory.get()).encode(),
+            etag="etag",
+            ttl=self.ranking_repostory.get_ttl(),
+        )
 
     def setUp(self) -> None:
         self.logger = mock.MagicMock()
         self.redis = fakeredis.FakeRedis(decode_responses=True)
         self.envs = Envs()
+        self.spotify_client = SpotifyClient(
+            self.envs,
+            self.logger,
+            self.redis,
+            RateLimiter(self.envs, self.logger, self.redis),
+        )
         self.access_token_repository = AccessTokenRepositoryImpl(
             envs=self.envs,
             logger=self.logger,
             redis=self.redis,
+            spotify_client=self.spotify_client,
+        )
+        self.track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        self.track_catalog.get_many.side_effect = lambda ids: ([None] * len(ids), [])
+        self.feature_index = mock.create_autospec(FeatureIndex, instance=True)
+        self.camelot_index = mock.create_autospec(CamelotIndex, instance=True)
+        self.track_repository = TrackRepositoryImpl(
+            self.logger,
+            self.access_token_repository,
+            self.spotify_client,
+            FeatureCache(self.envs, self.logger, self.redis),
+            TrackCache(self.envs, self.logger, self.redis),
+            self.track_catalog,
+            self.feature_index,
+            self.camelot_index,
         )
         self.ranking_repostory = mock.MagicMock()
         self.ranking_repostory.create = self.create
+        self.ranking_repostory.get_payload = self.get_payload
+        self.ranking_repostory.is_rebuild_failed.return_value = False
+        self.created = False
         return super().setUp()
 
     def test_get_ranking1(self) -> None:
@@ -40,9 +91,9 @@ class TestRankingInteractor(unittest.TestCase):
 
         ranking_interactor = RankingInteractor(
             self.envs,
-            self.access_token_repository,
             self.ranking_repostory,
             self.logger,
+            self.track_repository,
         )
         ranking = ranking_interactor.get_ranking()
         self.assertIsInstance(ranking, list)
@@ -61,9 +112,9 @@ class TestRankingInteractor(unittest.TestCase):
 
         ranking_interactor = RankingInteractor(
             self.envs,
-            self.access_token_repository,
             self.ranking_repostory,
             self.logger,
+            self.track_repository,
         )
         ranking = ranking_interactor.get_ranking()
 
@@ -77,9 +128,9 @@ class TestRankingInteractor(unittest.TestCase):
 
         ranking_interactor = RankingInteractor(
             self.envs,
-            self.access_token_repository,
             self.ranking_repostory,
             self.logger,
+            self.track_repository,
         )
         new_ranking = ranking_interactor.get_ranking()
 
@@ -98,9 +149,9 @@ class TestRankingInteractor(unittest.TestCase):
 
         ranking_interactor = RankingInteractor(
             self.envs,
-            self.access_token_repository,
             self.ranking_repostory,
             self.logger,
+            self.track_repository,
         )
         ranking_interactor.get_ranking()
 
@@ -114,15 +165,206 @@ class TestRankingInteractor(unittest.TestCase):
 
         ranking_interactor = RankingInteractor(
             self.envs,
-            self.access_token_repository,
             self.ranking_repostory,
             self.logger,
+            self.track_repository,
         )
         ranking_interactor.get_ranking()
+        # wait for the ranking rebuilt in background
+        ranking_interactor.executor.shutdown(wait=True)
 
         # check if ttl is modified
         self.assertNotEqual(self.ttl, ttl)
 
+    def test_get_ranking4(self) -> None:
+        """
+        The testcase where the ttl has expired but spotify is rate limited,
+        so the expired ranking is returned.
+        """
+        self.ranking = [{"spotify_id": "expired"}]
+        self.ttl = time.time()
+        self.ranking_repostory.exist = lambda: True
+        self.ranking_repostory.get = lambda: self.ranking
+        self.ranking_repostory.get_ttl = lambda: self.ttl
+
+        track_repository = mock.MagicMock()
+        track_repository.get_tracks_by_playlist_ids.side_effect = (
+            SpotifyRateLimitError(retry_after=5)
+        )
+        ranking_interactor = RankingInteractor(
+            self.envs,
+            self.ranking_repostory,
+            self.logger,
+            track_repository,
+        )
+        ranking = ranking_interactor.get_ranking()
+
+        self.assertListEqual(ranking, [{"spotify_id": "expired"}])
+
+    def _create_offline_interactor(self) -> RankingInteractor:
+        self.ranking = [{"spotify_id": "expired"}]
+        self.ranking_repostory.exist = lambda: True
+        self.ranking_repostory.get = lambda: self.ranking
+        self.ranking_repostory.get_ttl = lambda: self.ttl
+
+        track_repository = mock.MagicMock()
+        track_repository.get_tracks_by_playlist_ids.return_value = [[]]
+        return RankingInteractor(
+            self.envs,
+            self.ranking_repostory,
+            self.logger,
+            track_repository,
+        )
+
+    def test_get_ranking5(self) -> None:
+        """
+        The testcase where the ttl has expired and the expired ranking is returned
+        while it is rebuilt in background.
+        """
+        self.ttl = time.time() - 60
+        ranking_interactor = self._create_offline_interactor()
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value="token")
+        self.ranking_repostory.release_lock = mock.MagicMock()
+
+        ranking = ranking_interactor.get_ranking()
+        self.assertListEqual(ranking, [{"spotify_id": "expired"}])
+
+        ranking_interactor.executor.shutdown(wait=True)
+        self.assertListEqual(self.ranking, [])
+        self.ranking_repostory.release_lock.assert_called_once_with("token", "global")
+
+    def test_get_ranking6(self) -> None:
+        """
+        The testcase where the ttl has expired and another worker is rebuilding
+        the ranking.
+        """
+        self.ttl = time.time() - 60
+        ranking_interactor = self._create_offline_interactor()
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value=None)
+
+        ranking = ranking_interactor.get_ranking()
+        ranking_interactor.executor.shutdown(wait=True)
+        self.assertListEqual(ranking, [{"spotify_id": "expired"}])
+        self.assertListEqual(self.ranking, [{"spotify_id": "expired"}])
+
+    def test_get_ranking7(self) -> None:
+        """
+        The testcase where the ranking is older than the max staleness and it is
+        rebuilt before returning.
+        """
+        self.ttl = time.time() - self.envs.RANKING_MAX_STALENESS - 60
+        ranking_interactor = self._create_offline_interactor()
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value="token")
+
+        ranking = ranking_interactor.get_ranking()
+        self.assertListEqual(ranking, [])
+        self.assertGreater(self.ttl, time.time())
+
+    def test_get_ranking8(self) -> None:
+        """
+        The testcase where the ranking of an unknown chart is requested.
+        """
+        ranking_interactor = self._create_offline_interactor()
+        with self.assertRaises(ValueError):
+            ranking_interactor.get_ranking_payload(False, "unknown")
+
+    def test_get_ranking9(self) -> None:
+        """
+        The testcase where the rebuild in background fails, and the expired ranking
+        is returned without rebuilding it again until the cooldown ends.
+        """
+        self.ttl = time.time() - 60
+        ranking_interactor = self._create_offline_interactor()
+        ranking_interactor.track_repository.get_tracks_by_playlist_ids.side_effect = (
+            RuntimeError("spotify is down")
+        )
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value="token")
+        self.ranking_repostory.release_lock = mock.MagicMock()
+
+        ranking = ranking_interactor.get_ranking()
+        ranking_interactor.executor.shutdown(wait=True)
+        self.assertListEqual(ranking, [{"spotify_id": "expired"}])
+        self.ranking_repostory.set_rebuild_failed.assert_called_once_with(
+            self.envs.RANKING_FAILURE_COOLDOWN,
+            "global",
+        )
+
+        self.ranking_repostory.is_rebuild_failed.return_value = True
+        self.ranking_repostory.acquire_lock.reset_mock()
+        ranking_interactor = self._create_offline_interactor()
+        self.ttl = time.time() - self.envs.RANKING_MAX_STALENESS - 60
+        ranking = ranking_interactor.get_ranking()
+        self.assertListEqual(ranking, [{"spotify_id": "expired"}])
+        self.ranking_repostory.acquire_lock.assert_not_called()
+
+    def test_get_ranking10(self) -> None:
+        """
+        The testcase where no ranking is stored and creating it failed recently, so
+        no ranking is returned without asking Spotify.
+        """
+        ranking_interactor = self._create_offline_interactor()
+        self.ranking_repostory.get_payload = mock.MagicMock(return_value=None)
+        self.ranking_repostory.is_rebuild_failed.return_value = True
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value="token")
+
+        self.assertIsNone(ranking_interactor.get_ranking_payload(False))
+        self.assertListEqual(ranking_interactor.get_ranking(), [])
+        self.ranking_repostory.acquire_lock.assert_not_called()
+        ranking_interactor.track_repository.get_tracks_by_playlist_ids \
+            .assert_not_called()
+
+    def test_get_ranking11(self) -> None:
+        """
+        The testcase where the created ranking cannot be read from the store.
+        """
+        ranking_interactor = self._create_offline_interactor()
+        self.ranking_repostory.get_payload = mock.MagicMock(return_value=None)
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value="token")
+        self.ranking_repostory.create = mock.MagicMock()
+
+        self.assertIsNone(ranking_interactor.get_ranking_payload(False))
+        self.ranking_repostory.create.assert_called_once()
+
+    def test_refresh_rankings1(self) -> None:
+        """
+        The testcase where all charts are fetched at once.
+        """
+        self.ttl = time.time() + 60
+        ranking_interactor = self._create_offline_interactor()
+        charts = list(self.envs.RANKING_CHARTS)
+        track_repository = ranking_interactor.track_repository
+        track_repository.get_tracks_by_playlist_ids.return_value = [[]] * len(charts)
+        self.ranking_repostory.acquire_lock = mock.MagicMock(return_value="token")
+        self.ranking_repostory.release_lock = mock.MagicMock()
+        self.ranking_repostory.create = mock.MagicMock()
+
+        refreshed = ranking_interactor.refresh_rankings()
+
+        self.assertListEqual(refreshed, charts)
+        track_repository.get_tracks_by_playlist_ids.assert_called_once_with(
+            list(self.envs.RANKING_CHARTS.values())
+        )
+        self.assertEqual(self.ranking_repostory.create.call_count, len(charts))
+        self.assertEqual(self.ranking_repostory.release_lock.call_count, len(charts))
+
+    def test_refresh_rankings2(self) -> None:
+        """
+        The testcase where another worker is rebuilding one of the charts.
+        """
+        ranking_interactor = self._create_offline_interactor()
+        charts = list(self.envs.RANKING_CHARTS)
+        self.ranking_repostory.acquire_lock = mock.MagicMock(
+            side_effect=lambda timeout, chart: None if chart == charts[0] else "token"
+        )
+        self.ranking_repostory.release_lock = mock.MagicMock()
+        self.ranking_repostory.create = mock.MagicMock()
+        ranking_interactor.track_repository.get_tracks_by_playlist_ids.return_value = (
+            [[]] * (len(charts) - 1)
+        )
+
+        refreshed = ranking_interactor.refresh_rankings()
+        self.assertListEqual(refreshed, charts[1:])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,4 @@
+import gzip
 import json
 import unittest
 
@@ -8,7 +9,7 @@ from persistence.ranking import RankingRepositoryImpl
 
 class TestRankingRepository(unittest.TestCase):
     def setUp(self) -> None:
-        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.redis = fakeredis.FakeRedis()
         self.ranking_persistence = RankingRepositoryImpl(
             redis=self.redis
         )
@@ -95,11 +96,14 @@ class TestRankingRepository(unittest.TestCase):
             ranking=expected_ranking,
             ttl=expected_ttl,
         )
-        ranking_str = self.redis.hget("ranking", "ranking")
-        actual_ranking = json.loads(ranking_str)
-        actual_ttl = float(self.redis.hget("ranking", "ttl"))
-        self.assertListEqual(actual_ranking, expected_ranking)
-        self.assertEqual(actual_ttl, expected_ttl)
+        ttl, etag, body = self.redis.get("ranking:global:json").split(b"\n", 2)
+        self.assertListEqual(json.loads(body), expected_ranking)
+        self.assertEqual(float(ttl), expected_ttl)
+
+        ttl, gzip_etag, body = self.redis.get("ranking:global:gzip").split(b"\n", 2)
+        self.assertListEqual(json.loads(gzip.decompress(body)), expected_ranking)
+        self.assertEqual(float(ttl), expected_ttl)
+        self.assertNotEqual(gzip_etag, etag)
 
     def test_exist1(self) -> None:
         res = self.ranking_persistence.exist()
@@ -133,6 +137,78 @@ class TestRankingRepository(unittest.TestCase):
         actual_ttl = self.ranking_persistence.get_ttl()
         self.assertEqual(actual_ttl, expected_ttl)
 
+    def test_get_payload1(self):
+        """Testcase where the ranking does not exist
+        """
+        self.assertIsNone(self.ranking_persistence.get_payload(compressed=False))
+
+    def test_get_payload2(self):
+        """Testcase where the json and gzip variants are got
+        """
+        self.ranking_persistence.create(ranking=self.ranking, ttl=100)
+
+        payload = self.ranking_persistence.get_payload(compressed=False)
+        self.assertListEqual(json.loads(payload.body), self.ranking)
+        self.assertEqual(payload.ttl, 100)
+        self.assertIsNone(payload.content_encoding)
+
+        gzip_payload = self.ranking_persistence.get_payload(compressed=True)
+        self.assertEqual(gzip.decompress(gzip_payload.body), payload.body)
+        self.assertEqual(gzip_payload.content_encoding, "gzip")
+        self.assertEqual(gzip_payload.etag, f"{payload.etag}-gzip")
+
+    def test_get_payload3(self):
+        """Testcase where the etag changes only when the ranking changes
+        """
+        self.ranking_persistence.create(ranking=self.ranking, ttl=100)
+        etag = self.ranking_persistence.get_payload(compressed=False).etag
+
+        self.ranking_persistence.create(ranking=self.ranking, ttl=200)
+        self.assertEqual(
+            self.ranking_persistence.get_payload(compressed=False).etag,
+            etag,
+        )
+
+        self.ranking_persistence.create(ranking=self.ranking[:1], ttl=300)
+        self.assertNotEqual(
+            self.ranking_persistence.get_payload(compressed=False).etag,
+            etag,
+        )
+
+    def test_get_payload4(self):
+        """Testcase where the rankings of charts are stored separately
+        """
+        self.ranking_persistence.create(ranking=self.ranking, ttl=100, chart="jp")
+        self.assertIsNone(self.ranking_persistence.get_payload(False, "global"))
+        self.assertListEqual(
+            json.loads(self.ranking_persistence.get_payload(False, "jp").body),
+            self.ranking,
+        )
+
+    def test_acquire_lock(self):
+        token = self.ranking_persistence.acquire_lock(timeout=10)
+        self.assertIsNotNone(token)
+        self.assertIsNone(self.ranking_persistence.acquire_lock(timeout=10))
+
+        self.ranking_persistence.release_lock(token)
+        self.assertIsNotNone(self.ranking_persistence.acquire_lock(timeout=10))
+
+    def test_release_lock(self):
+        """Testcase where the lock has been taken by another worker after expiry
+        """
+        self.ranking_persistence.acquire_lock(timeout=10)
+        self.ranking_persistence.release_lock("expired_token")
+        self.assertIsNone(self.ranking_persistence.acquire_lock(timeout=10))
+
+    def test_set_rebuild_failed(self):
+        """Testcase where a failed rebuild is recorded only for the cooldown
+        """
+        self.assertFalse(self.ranking_persistence.is_rebuild_failed("jp"))
+        self.ranking_persistence.set_rebuild_failed(cooldown=10, chart="jp")
+        self.assertTrue(self.ranking_persistence.is_rebuild_failed("jp"))
+        self.assertFalse(self.ranking_persistence.is_rebuild_failed("global"))
+        self.assertGreater(self.redis.pttl("ranking:jp:rebuild_failed"), 9000)
+
 
 if __name__ == '__main__':
     unittest.main()
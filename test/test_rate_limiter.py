@@ -0,0 +1,87 @@
+import time
+import unittest
+from unittest import mock
+
+import fakeredis
+from redis.exceptions import RedisError
+
+from domain.model.rate_limit import BACKGROUND, INTERACTIVE, SpotifyRateLimitError
+from envs import Envs
+from persistence.rate_limiter import RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.envs = Envs()
+        self.envs.SPOTIFY_RATE_LIMIT = True
+        self.envs.SPOTIFY_RATE_LIMIT_INTERACTIVE_MAX_WAIT = 0.5
+        self.envs.SPOTIFY_RATE_LIMIT_BACKGROUND_RESERVE = 10
+        self.rate_limiter = RateLimiter(self.envs, mock.MagicMock(), self.redis)
+        # fakeredis cannot run lua scripts, so the result of the script is mocked
+        self.rate_limiter.script = mock.MagicMock()
+        return super().setUp()
+
+    def test_acquire1(self) -> None:
+        """Testcase where a token is left in the bucket
+        """
+        self.rate_limiter.script.return_value = [1, 0, 29]
+        self.rate_limiter.acquire(INTERACTIVE)
+
+        _, kwargs = self.rate_limiter.script.call_args
+        self.assertEqual(kwargs["args"][3], 0)
+        self.assertEqual(self.rate_limiter.get_stats()["allowed"], 1)
+
+    def test_acquire2(self) -> None:
+        """Testcase where the bucket is empty for a short time
+        """
+        self.rate_limiter.script.side_effect = [[0, 50, 0], [1, 0, 0]]
+        start = time.monotonic()
+        self.rate_limiter.acquire(BACKGROUND)
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        _, kwargs = self.rate_limiter.script.call_args
+        self.assertEqual(kwargs["args"][3], 10)
+        self.assertEqual(self.rate_limiter.get_stats()["waited"], 1)
+
+    def test_acquire3(self) -> None:
+        """Testcase where an interactive request is shed
+        """
+        self.rate_limiter.script.return_value = [0, 3000, 0]
+        with self.assertRaises(SpotifyRateLimitError) as cm:
+            self.rate_limiter.acquire(INTERACTIVE)
+
+        self.assertEqual(cm.exception.retry_after, 3)
+        self.assertEqual(self.rate_limiter.get_stats()["shed"], 1)
+
+    def test_acquire4(self) -> None:
+        """Testcase where redis is unavailable and the request is not limited
+        """
+        self.rate_limiter.script.side_effect = RedisError("connection refused")
+        self.rate_limiter.acquire(INTERACTIVE)
+        self.assertEqual(self.rate_limiter.get_stats()["allowed"], 1)
+
+    def test_block(self) -> None:
+        """Testcase where Retry-After is shared through redis
+        """
+        self.rate_limiter.block(3)
+
+        self.assertGreater(self.redis.pttl(RateLimiter.BLOCK_KEY), 2000)
+        with self.assertRaises(SpotifyRateLimitError):
+            self.rate_limiter.acquire(INTERACTIVE)
+        self.rate_limiter.script.assert_not_called()
+
+    def test_get_stats(self) -> None:
+        """Testcase where the bucket is refilled since the last request
+        """
+        self.redis.hset(
+            RateLimiter.BUCKET_KEY,
+            mapping={"tokens": 5, "ts": int(time.time() * 1000) - 1000},
+        )
+        stats = self.rate_limiter.get_stats()
+        self.assertAlmostEqual(stats["tokens"], 15, delta=1)
+        self.assertEqual(stats["capacity"], self.envs.SPOTIFY_RATE_LIMIT_CAPACITY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+import fakeredis
+
+from envs import Envs
+from persistence.search_result import normalize_query, SearchResultRepositoryImpl
+
+
+class TestSearchResultRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.search_result_repository = SearchResultRepositoryImpl(
+            envs=Envs(),
+            logger=mock.MagicMock(),
+            redis=self.redis,
+        )
+        return super().setUp()
+
+    def test_normalize_query(self) -> None:
+        self.assertEqual(normalize_query("  Adele\t EASY  on me "), "adele easy on me")
+        self.assertEqual(normalize_query("ＡＤＥＬＥ"), "adele")
+        self.assertEqual(normalize_query("Straße"), "strasse")
+
+    def test_get1(self) -> None:
+        """Testcase where the result of an equivalent query is cached
+        """
+        self.search_result_repository.save("Adele Easy On Me", ["id1", "id2"])
+        spotify_ids = self.search_result_repository.get(" adele  easy on me")
+        self.assertListEqual(spotify_ids, ["id1", "id2"])
+
+    def test_get2(self) -> None:
+        """Testcase where the result is not cached
+        """
+        self.assertEqual(self.search_result_repository.get("query"), None)
+
+    def test_save(self) -> None:
+        """Testcase where the query has no result and is cached for a shorter time
+        """
+        self.search_result_repository.save("no result", [])
+        self.assertListEqual(self.search_result_repository.get("no result"), [])
+
+        key = self.search_result_repository._key("no result")
+        self.assertLessEqual(self.redis.ttl(key), Envs.SEARCH_CACHE_NEGATIVE_TTL)
+
+
+if __name__ == '__main__':
+    unittest.main()
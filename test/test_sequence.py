@@ -0,0 +1,126 @@
+import random
+import unittest
+
+from domain.model.sequence import (
+    MAX_SEQUENCE_TRACKS,
+    sequence,
+    TooManyTracksError,
+    transition_costs,
+)
+from track_factory import create_track
+
+
+class TestSequence(unittest.TestCase):
+
+    def test_transition_costs1(self) -> None:
+        """Testcase where tracks are in the compatible keys with the same tempo
+        """
+        tracks = [
+            create_track("c_major", key=0, mode=1),
+            create_track("g_major", key=7, mode=1),
+            create_track("a_minor", key=9, mode=0),
+            create_track("f_sharp_major", key=6, mode=1),
+        ]
+        costs = transition_costs(tracks)
+        self.assertAlmostEqual(costs[0, 0], 0)
+        self.assertAlmostEqual(costs[0, 1], 1)
+        self.assertAlmostEqual(costs[0, 2], 1)
+        self.assertAlmostEqual(costs[0, 3], 6)
+        self.assertTrue((costs == costs.T).all())
+
+    def test_transition_costs2(self) -> None:
+        """Testcase where tracks are in the same key with different tempos
+        """
+        tracks = [
+            create_track("id1", bpm=120.0),
+            create_track("id2", bpm=127.2),
+            create_track("id3", bpm=60.0),
+            create_track("id4", bpm=0.0),
+        ]
+        costs = transition_costs(tracks)
+        # 6% faster costs a step and half time costs a step
+        self.assertAlmostEqual(costs[0, 1], 1, places=4)
+        self.assertAlmostEqual(costs[0, 2], 1, places=4)
+        # the tempo of id4 is unknown
+        self.assertAlmostEqual(costs[0, 3], 1)
+
+    def test_transition_costs3(self) -> None:
+        """Testcase where the key of a track is unknown
+        """
+        tracks = [
+            create_track("id1", key=0),
+            create_track("id2", key=-1),
+        ]
+        costs = transition_costs(tracks)
+        self.assertAlmostEqual(costs[0, 1], 1)
+
+    def test_sequence1(self) -> None:
+        """Testcase where tracks in the same key are shuffled and get ordered by
+        tempo from the first track
+        """
+        tracks = [create_track(f"id{bpm}", bpm=bpm) for bpm in range(100, 140)]
+        shuffled = tracks[1:]
+        random.Random(0).shuffle(shuffled)
+        shuffled = [tracks[0]] + shuffled
+
+        indices = sequence(shuffled)
+        self.assertEqual([shuffled[idx] for idx in indices], tracks)
+
+    def test_sequence2(self) -> None:
+        """Testcase where tracks alternate between distant keys and tempos
+        """
+        tracks = [
+            create_track("id1", bpm=90.0, key=0),
+            create_track("id2", bpm=140.0, key=6),
+            create_track("id3", bpm=92.0, key=7),
+            create_track("id4", bpm=138.0, key=1),
+            create_track("id5", bpm=94.0, key=2),
+        ]
+        indices = sequence(tracks)
+        self.assertEqual(indices, [0, 2, 4, 1, 3])
+
+    def test_sequence3(self) -> None:
+        """Testcase where the playlist has few tracks
+        """
+        self.assertEqual(sequence([]), [])
+        self.assertEqual(sequence([create_track("id1")]), [0])
+        self.assertEqual(
+            sequence([create_track("id1"), create_track("id2", bpm=60.0)]),
+            [0, 1],
+        )
+
+    def test_sequence4(self) -> None:
+        """Testcase where many tracks are ordered and the result is a permutation
+        cheaper than the original order
+        """
+        rand = random.Random(0)
+        tracks = [
+            create_track(
+                f"id{idx}",
+                bpm=rand.uniform(70, 180),
+                key=rand.randrange(-1, 12),
+                mode=rand.randrange(2),
+            )
+            for idx in range(500)
+        ]
+        costs = transition_costs(tracks)
+
+        indices = sequence(tracks)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(sorted(indices), list(range(len(tracks))))
+        original = sum(costs[idx, idx + 1] for idx in range(len(tracks) - 1))
+        sequenced = sum(
+            costs[indices[idx], indices[idx + 1]] for idx in range(len(tracks) - 1)
+        )
+        self.assertLess(sequenced, original / 2)
+
+    def test_sequence5(self) -> None:
+        """Testcase where there are too many tracks to build the costs
+        """
+        tracks = [create_track("id")] * (MAX_SEQUENCE_TRACKS + 1)
+        with self.assertRaises(TooManyTracksError):
+            sequence(tracks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import fakeredis
+import requests
+
+from domain.model.rate_limit import (
+    BACKGROUND,
+    current_priority,
+    INTERACTIVE,
+    priority,
+    SpotifyRateLimitError,
+)
+from envs import Envs
+from persistence.rate_limiter import RateLimiter
+from persistence.spotify_client import SpotifyClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        body = json.dumps({"path": self.path}).encode()
+        if self.path.startswith("/v1/busy"):
+            self.send_response(429)
+            self.send_header("Retry-After", self.path.split("/")[-1])
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class TestSpotifyClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.envs = Envs()
+        self.envs.SPOTIFY_API_URL = f"http://127.0.0.1:{self.server.server_port}/v1"
+        self.envs.SPOTIFY_KEEP_ALIVE = True
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.spotify_client = self._create_client()
+        return super().setUp()
+
+    def _create_client(self) -> SpotifyClient:
+        logger = mock.MagicMock()
+        rate_limiter = RateLimiter(self.envs, logger, self.redis)
+        return SpotifyClient(self.envs, logger, self.redis, rate_limiter)
+
+    def tearDown(self) -> None:
+        self.spotify_client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        return super().tearDown()
+
+    def test_get(self) -> None:
+        response = self.spotify_client.get("/tracks", params={"ids": "a,b"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["path"], "/v1/tracks?ids=a%2Cb")
+
+    def test_get_stats1(self) -> None:
+        """Testcase where sequential requests reuse one kept-alive connection
+        """
+        for _ in range(3):
+            self.spotify_client.get("/tracks")
+
+        stats = self.spotify_client.get_stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+        pool_stats = next(iter(stats["pools"].values()))
+        self.assertEqual(pool_stats["idle_connections"], 1)
+
+    def test_get_stats2(self) -> None:
+        """Testcase where keep-alive is disabled and every request reconnects
+        """
+        self.envs.SPOTIFY_KEEP_ALIVE = False
+        spotify_client = self._create_client()
+        for _ in range(3):
+            spotify_client.get("/tracks")
+
+        stats = spotify_client.get_stats()
+        spotify_client.session.close()
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["hits"], 0)
+
+    def test_run_all1(self) -> None:
+        """Testcase where concurrent fetch is enabled
+        """
+        def slow(value: int) -> int:
+            time.sleep(0.2)
+            return value
+
+        self.spotify_client.concurrent_fetch = True
+        start = time.perf_counter()
+        results = self.spotify_client.run_all(lambda: slow(1), lambda: slow(2))
+        elapsed = time.perf_counter() - start
+        self.assertListEqual(results, [1, 2])
+        self.assertLess(elapsed, 0.35)
+
+    def test_run_all2(self) -> None:
+        """Testcase where concurrent fetch is disabled
+        """
+        self.spotify_client.concurrent_fetch = False
+        results = self.spotify_client.run_all(lambda: 1, lambda: 2)
+        self.assertListEqual(results, [1, 2])
+
+    def test_get_singleflight1(self) -> None:
+        """Testcase where identical requests in flight are coalesced into one
+        """
+        barrier = threading.Barrier(4)
+
+        def request(method: str, url: str, **kwargs) -> requests.Response:
+            time.sleep(0.2)
+            return requests.Response()
+
+        with mock.patch.object(self.spotify_client, "request", side_effect=request):
+            def get() -> requests.Response:
+                barrier.wait()
+                return self.spotify_client.get("/tracks/a", params={"market": "JP"})
+
+            threads = [threading.Thread(target=get) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(self.spotify_client.request.call_count, 1)
+        self.assertEqual(self.spotify_client.get_stats()["coalesced"], 3)
+
+    def test_get_singleflight2(self) -> None:
+        """Testcase where requests with different params are not coalesced
+        """
+        self.spotify_client.get("/tracks", params={"ids": "a"})
+        self.spotify_client.get("/tracks", params={"ids": "b"})
+
+        stats = self.spotify_client.get_stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["coalesced"], 0)
+
+    def test_get_singleflight3(self) -> None:
+        """Testcase where a response is shared with other workers through redis
+        """
+        self.envs.SPOTIFY_SINGLEFLIGHT_REDIS = True
+        spotify_client1 = self._create_client()
+        spotify_client2 = self._create_client()
+
+        response1 = spotify_client1.get("/tracks", params={"ids": "a"})
+        response2 = spotify_client2.get("/tracks", params={"ids": "a"})
+        spotify_client1.session.close()
+        spotify_client2.session.close()
+
+        self.assertEqual(response1.json(), response2.json())
+        self.assertEqual(spotify_client1.get_stats()["requests"], 1)
+        self.assertEqual(spotify_client2.get_stats()["requests"], 0)
+        self.assertListEqual(self.redis.keys("singleflight:lock:*"), [])
+
+    def test_get_singleflight4(self) -> None:
+        """Testcase where another worker holds the lock and then stores the response
+        """
+        self.envs.SPOTIFY_SINGLEFLIGHT_REDIS = True
+        spotify_client = self._create_client()
+        self.redis.set("singleflight:lock:dummy", 1)
+
+        def store() -> None:
+            time.sleep(0.1)
+            self.redis.setex(
+                "singleflight:result:dummy",
+                5,
+                json.dumps({
+                    "status_code": 200,
+                    "content": json.dumps({"path": "shared"}),
+                    "content_type": "application/json",
+                }),
+            )
+            self.redis.delete("singleflight:lock:dummy")
+
+        threading.Thread(target=store).start()
+        with mock.patch("persistence.spotify_client.hashlib") as hashlib:
+            hashlib.sha1.return_value.hexdigest.return_value = "dummy"
+            response = spotify_client.get("/tracks")
+
+        spotify_client.session.close()
+        self.assertEqual(response.json(), {"path": "shared"})
+        self.assertEqual(spotify_client.get_stats()["requests"], 0)
+
+    def test_get_singleflight5(self) -> None:
+        """Testcase where the lock expires during the request and is taken by another
+        worker, whose lock is kept
+        """
+        self.envs.SPOTIFY_SINGLEFLIGHT_REDIS = True
+        spotify_client = self._create_client()
+        send = spotify_client.session.send
+
+        def expire_lock(*args, **kwargs):
+            self.redis.set("singleflight:lock:dummy", "another_token")
+            return send(*args, **kwargs)
+
+        with mock.patch("persistence.spotify_client.hashlib") as hashlib, \
+                mock.patch.object(spotify_client.session, "send", expire_lock):
+            hashlib.sha1.return_value.hexdigest.return_value = "dummy"
+            spotify_client.get("/tracks")
+
+        spotify_client.session.close()
+        self.assertEqual(self.redis.get("singleflight:lock:dummy"), "another_token")
+
+    def test_request1(self) -> None:
+        """Testcase where spotify keeps answering 429 with a short Retry-After
+        """
+        with self.assertRaises(SpotifyRateLimitError):
+            self.spotify_client.get("/busy/0")
+
+        stats = self.spotify_client.get_stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["rate_limit"]["throttled"], 2)
+
+    def test_request2(self) -> None:
+        """Testcase where Retry-After is longer than an interactive request waits
+        """
+        with self.assertRaises(SpotifyRateLimitError) as cm:
+            self.spotify_client.get("/busy/5")
+
+        self.assertEqual(cm.exception.retry_after, 5)
+        stats = self.spotify_client.get_stats()
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["rate_limit"]["shed"], 1)
+
+        # the other requests also wait for Retry-After
+        with self.assertRaises(SpotifyRateLimitError):
+            self.spotify_client.get("/tracks")
+        self.assertEqual(self.spotify_client.get_stats()["requests"], 1)
+
+    def test_run_all3(self) -> None:
+        """Testcase where the priority of the caller is kept in the executor
+        """
+        self.spotify_client.concurrent_fetch = True
+        with priority(BACKGROUND):
+            results = self.spotify_client.run_all(current_priority, current_priority)
+        self.assertListEqual(results, [BACKGROUND, BACKGROUND])
+        self.assertEqual(current_priority(), INTERACTIVE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import time
+import unittest
+from unittest import mock
+
+import fakeredis
+
+from envs import Envs
+from persistence.track_cache import LocalCache, TrackCache
+from track_factory import create_track
+
+
+class TestLocalCache(unittest.TestCase):
+    def test_lru(self) -> None:
+        cache = LocalCache(max_size=2, ttl=60, eviction="lru")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_fifo(self) -> None:
+        cache = LocalCache(max_size=2, ttl=60, eviction="fifo")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_ttl(self) -> None:
+        cache = LocalCache(max_size=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertEqual(cache.get("a"), None)
+
+
+class TestTrackCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.track_cache = TrackCache(
+            envs=Envs(),
+            logger=mock.MagicMock(),
+            redis=self.redis,
+        )
+        return super().setUp()
+
+    def test_get_many1(self) -> None:
+        """Testcase where a track is in the local cache
+        """
+        track = create_track("spotify_id1")
+        self.track_cache.set_many([track, None])
+
+        tracks = self.track_cache.get_many(["spotify_id1", "spotify_id2"])
+        self.assertListEqual(tracks, [track, None])
+        self.assertEqual(self.track_cache.get_stats()["local_hits"], 1)
+        self.assertEqual(self.track_cache.get_stats()["misses"], 1)
+
+    def test_get_many2(self) -> None:
+        """Testcase where a track is stored only in redis by another worker
+        """
+        track = create_track("spotify_id1")
+        other_worker_cache = TrackCache(Envs(), mock.MagicMock(), self.redis)
+        other_worker_cache.set_many([track])
+
+        self.assertEqual(self.track_cache.get("spotify_id1"), track)
+        self.assertEqual(self.track_cache.get_stats()["redis_hits"], 1)
+
+        # the track is promoted to the local cache
+        self.assertEqual(self.track_cache.get("spotify_id1"), track)
+        self.assertEqual(self.track_cache.get_stats()["local_hits"], 1)
+
+    def test_get_ids_by_bpm(self) -> None:
+        """Testcase where stored tracks are searched by bpm range
+        """
+        self.track_cache.set_many([
+            create_track(f"spotify_id{bpm}", bpm=bpm) for bpm in [90, 121, 128, 135]
+        ])
+        other_worker_cache = TrackCache(Envs(), mock.MagicMock(), self.redis)
+        other_worker_cache.set_many([create_track("spotify_id120", bpm=120)])
+
+        self.assertListEqual(
+            self.track_cache.get_ids_by_bpm(120, 128, 0, 10),
+            ["spotify_id120", "spotify_id121", "spotify_id128"],
+        )
+        self.assertListEqual(
+            self.track_cache.get_ids_by_bpm(120, 128, 1, 1),
+            ["spotify_id121"],
+        )
+
+        self.track_cache.add_to_bpm_index([create_track("spotify_id100", bpm=100)])
+        self.assertIsNone(self.track_cache.get("spotify_id100"))
+
+        self.track_cache.remove_from_bpm_index(["spotify_id121"])
+        self.assertListEqual(
+            self.track_cache.get_ids_by_bpm(0, float("inf"), 0, 10),
+            [
+                "spotify_id90", "spotify_id100", "spotify_id120", "spotify_id128",
+                "spotify_id135",
+            ],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+import unittest
+from unittest import mock
+
+from envs import Envs
+from persistence.model import db
+from persistence.model.track import TrackDataModel
+from persistence.track_catalog import TrackCatalog
+from db.flask_sqlalchemy_testcase import MyTest
+from track_factory import create_track
+
+
+class TestTrackCatalog(MyTest):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.logger = mock.MagicMock()
+        self.envs = Envs()
+        self.envs.TRACK_CATALOG = True
+        self.envs.TRACK_CATALOG_MAX_AGE = 60
+        self.track_catalog = TrackCatalog(self.envs, self.logger, self.app, db)
+
+    def test_get_many1(self) -> None:
+        """Testcase where some of the tracks are stored
+        """
+        track = create_track("id1")
+        self.track_catalog.upsert_many([track, None])
+
+        tracks, stale_ids = self.track_catalog.get_many(["id0", "id1", "id1"])
+        self.assertListEqual(tracks, [None, track, track])
+        self.assertListEqual(stale_ids, [])
+        stats = self.track_catalog.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_get_many2(self) -> None:
+        """Testcase where the stored track is older than the max age
+        """
+        self.track_catalog.upsert_many([create_track("id0")])
+        db.session.query(TrackDataModel).update({
+            "fetched_at": datetime.utcnow() - timedelta(seconds=120),
+        })
+        db.session.commit()
+
+        tracks, stale_ids = self.track_catalog.get_many(["id0"])
+        self.assertEqual(tracks[0].spotify_id, "id0")
+        self.assertListEqual(stale_ids, ["id0"])
+
+    def test_get_many3(self) -> None:
+        """Testcase where the catalog is disabled
+        """
+        self.envs.TRACK_CATALOG = False
+        track_catalog = TrackCatalog(self.envs, self.logger, self.app, db)
+        track_catalog.upsert_many([create_track("id0")])
+
+        self.assertEqual(db.session.query(TrackDataModel).count(), 0)
+        self.assertEqual(track_catalog.get_many(["id0"]), ([None], []))
+
+    def test_upsert_many(self) -> None:
+        """Testcase where stored tracks are updated and new tracks are inserted
+        in bulk
+        """
+        self.track_catalog.upsert_many([create_track("id0")])
+        self.track_catalog.upsert_many([
+            create_track(f"id{idx}", bpm=130.0) for idx in range(600)
+        ])
+
+        self.assertEqual(db.session.query(TrackDataModel).count(), 600)
+        tracks, _ = self.track_catalog.get_many(["id0"])
+        self.assertEqual(tracks[0].bpm, 130.0)
+
+    def test_iter_tracks(self) -> None:
+        """Testcase where all stored tracks are read in batches
+        """
+        self.track_catalog.upsert_many([
+            create_track(f"id{idx}") for idx in range(5)
+        ])
+
+        batches = list(self.track_catalog.iter_tracks(batch_size=2))
+        self.assertListEqual([len(tracks) for tracks in batches], [2, 2, 1])
+        self.assertListEqual(
+            [track.spotify_id for tracks in batches for track in tracks],
+            [f"id{idx}" for idx in range(5)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
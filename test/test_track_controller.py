@@ -68,6 +68,109 @@ class TestTrackController(unittest.TestCase):
             self.assertEqual(actual_message, expected_message)
             self.assertEqual(actual_response_code, expected_status)
 
+    def test_get_tracks4(self):
+        """Testcase where tracks are searched by bpm range
+        """
+        expected_track = [{"song": "song_name", "bpm": 124.0}]
+        track_interactor = MagicMock()
+        track_interactor.get_tracks_by_bpm.return_value = expected_track
+        track_controller = TrackController(
+            track_usecase=track_interactor
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/track",
+            view_func=track_controller.get_tracks
+        )
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/track?bpm_min=120&bpm_max=128&offset=50")
+            self.assertEqual(rv.status_code, 200)
+            self.assertListEqual(rv.get_json(), expected_track)
+            track_interactor.get_tracks_by_bpm.assert_called_once_with(
+                120.0, 128.0, 50, 50
+            )
+
+            rv = c.get("/api/v1/track?bpm_min=120")
+            self.assertEqual(rv.status_code, 200)
+            track_interactor.get_tracks_by_bpm.assert_called_with(
+                120.0, float("inf"), 0, 50
+            )
+
+    def test_get_tracks5(self):
+        """Testcase where the bpm range is invalid
+        """
+        track_interactor = MagicMock()
+        track_controller = TrackController(
+            track_usecase=track_interactor
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/track",
+            view_func=track_controller.get_tracks
+        )
+        with self.app.test_client() as c:
+            for query in [
+                "bpm_min=fast",
+                "bpm_min=nan",
+                "bpm_min=130&bpm_max=120",
+                "bpm_min=120&limit=1000",
+                "bpm_min=120&offset=-1",
+            ]:
+                rv = c.get(f"/api/v1/track?{query}")
+                self.assertEqual(rv.status_code, 400, query)
+        track_interactor.get_tracks_by_bpm.assert_not_called()
+
+    def test_get_similar_tracks(self):
+        """Testcase where tracks similar to the specified one are searched
+        """
+        expected_track = [{"song": "song_name", "bpm": 124.0}]
+        track_interactor = MagicMock()
+        track_interactor.get_similar_tracks = \
+            lambda spotify_id, limit: expected_track if spotify_id == "id" else None
+        track_controller = TrackController(
+            track_usecase=track_interactor
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/track/<spotify_id>/similar",
+            view_func=track_controller.get_similar_tracks
+        )
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/track/id/similar")
+            self.assertEqual(rv.status_code, 200)
+            self.assertListEqual(rv.get_json(), expected_track)
+
+            rv = c.get("/api/v1/track/unknown/similar")
+            self.assertEqual(rv.status_code, 404)
+
+            rv = c.get("/api/v1/track/id/similar?limit=0")
+            self.assertEqual(rv.status_code, 400)
+
+    def test_get_compatible_tracks(self):
+        """Testcase where tracks compatible with the specified one are searched
+        """
+        expected_track = [{"song": "song_name", "bpm": 124.0}]
+        track_interactor = MagicMock()
+        track_interactor.get_compatible_tracks.return_value = expected_track
+        track_controller = TrackController(
+            track_usecase=track_interactor
+        )
+        self.app.add_url_rule(
+            rule="/api/v1/track/<spotify_id>/compatible",
+            view_func=track_controller.get_compatible_tracks
+        )
+        with self.app.test_client() as c:
+            rv = c.get("/api/v1/track/id/compatible?tolerance=3&limit=10")
+            self.assertEqual(rv.status_code, 200)
+            self.assertListEqual(rv.get_json(), expected_track)
+            track_interactor.get_compatible_tracks.assert_called_once_with(
+                "id", 0.03, 10
+            )
+
+            rv = c.get("/api/v1/track/id/compatible?tolerance=50")
+            self.assertEqual(rv.status_code, 400)
+
+            track_interactor.get_compatible_tracks.return_value = None
+            rv = c.get("/api/v1/track/unknown/compatible")
+            self.assertEqual(rv.status_code, 404)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -11,16 +11,55 @@ class TestTrackInteractor(unittest.TestCase):
 
     def setUp(self) -> None:
         self.track_repository = mock.MagicMock()
-        self.track_repository.get_tracks_by_query = lambda q: [q]
+        self.track_repository.get_tracks_by_query = \
+            lambda q: [mock.MagicMock(spotify_id=q)]
+        self.search_result_repository = mock.MagicMock()
+        self.search_result_repository.get.return_value = None
         self.track_interactor = TrackInteractor(
             self.track_repository,
+            self.search_result_repository,
         )
         return super().setUp()
 
     def test_get_tracks_by_query(self) -> None:
         query = "query"
         tracks = self.track_interactor.get_tracks_by_query(query)
-        self.assertListEqual(tracks, [query])
+        self.assertEqual(len(tracks), 1)
+        self.assertEqual(tracks[0].spotify_id, query)
+        self.search_result_repository.save.assert_called_once_with(query, [query])
+
+    def test_get_tracks_by_query2(self) -> None:
+        """Testcase where the search result is cached
+        """
+        track = mock.MagicMock()
+        self.search_result_repository.get.return_value = ["spotify_id1", "invalid"]
+        self.track_repository.get_tracks_by_ids.return_value = [track, None]
+
+        tracks = self.track_interactor.get_tracks_by_query("query")
+        self.assertListEqual(tracks, [track])
+        self.track_repository.get_tracks_by_ids.assert_called_once_with(
+            ["spotify_id1", "invalid"]
+        )
+
+    def test_get_tracks_by_query3(self) -> None:
+        """Testcase where the query is cached as having no result
+        """
+        self.search_result_repository.get.return_value = []
+        self.track_repository.get_tracks_by_ids.return_value = []
+
+        tracks = self.track_interactor.get_tracks_by_query("query")
+        self.assertListEqual(tracks, [])
+        self.search_result_repository.save.assert_not_called()
+
+    def test_get_tracks_by_bpm(self) -> None:
+        track = mock.MagicMock()
+        self.track_repository.get_tracks_by_bpm.return_value = [track]
+
+        tracks = self.track_interactor.get_tracks_by_bpm(120, 128, 0, 50)
+        self.assertListEqual(tracks, [track])
+        self.track_repository.get_tracks_by_bpm.assert_called_once_with(
+            120, 128, 0, 50
+        )
 
 
 if __name__ == '__main__':
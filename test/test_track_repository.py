@@ -6,21 +6,47 @@ import fakeredis
 from envs import Envs
 from domain.model.track import Track
 from persistence.access_token import AccessTokenRepositoryImpl
+from persistence.camelot_index import CamelotIndex
+from persistence.feature_cache import FeatureCache
+from persistence.feature_index import FeatureIndex
+from persistence.rate_limiter import RateLimiter
+from persistence.spotify_client import SpotifyClient
 from persistence.track import TrackRepositoryImpl
+from persistence.track_cache import TrackCache
+from persistence.track_catalog import TrackCatalog
 
 
 class TestTrackRepositoryImpl(unittest.TestCase):
     def setUp(self) -> None:
         self.logger = mock.MagicMock()
         self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.spotify_client = SpotifyClient(
+            Envs(),
+            self.logger,
+            self.redis,
+            RateLimiter(Envs(), self.logger, self.redis),
+        )
         self.access_token_persistence = AccessTokenRepositoryImpl(
             envs=Envs(),
             logger=self.logger,
             redis=self.redis,
+            spotify_client=self.spotify_client,
         )
+        self.feature_cache = FeatureCache(Envs(), self.logger, self.redis)
+        self.track_cache = TrackCache(Envs(), self.logger, self.redis)
+        self.track_catalog = mock.create_autospec(TrackCatalog, instance=True)
+        self.track_catalog.get_many.side_effect = lambda ids: ([None] * len(ids), [])
+        self.feature_index = mock.create_autospec(FeatureIndex, instance=True)
+        self.camelot_index = mock.create_autospec(CamelotIndex, instance=True)
         self.track_repository = TrackRepositoryImpl(
             self.logger,
             self.access_token_persistence,
+            self.spotify_client,
+            self.feature_cache,
+            self.track_cache,
+            self.track_catalog,
+            self.feature_index,
+            self.camelot_index,
         )
         return super().setUp()
 
@@ -103,6 +129,40 @@ class TestTrackRepositoryImpl(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             self.track_repository._get_features_by_ids(spotify_ids, access_token)
 
+    def test_get_features_by_ids5(self) -> None:
+        """Testcase where some of audio features are cached"""
+        cached_feature = {"id": "cached_id", "tempo": 120.0}
+        fetched_feature = {"id": "new_id", "tempo": 90.0}
+        self.feature_cache.set_many({"cached_id": cached_feature})
+
+        with mock.patch.object(
+            self.track_repository,
+            "_fetch_features_by_ids",
+            return_value=[fetched_feature],
+        ) as fetch:
+            features = self.track_repository._get_features_by_ids(
+                ["cached_id", "new_id"],
+                "access_token",
+            )
+            fetch.assert_called_once_with(["new_id"], "access_token")
+
+        self.assertListEqual(features, [cached_feature, fetched_feature])
+        self.assertEqual(self.feature_cache.get_many(["new_id"]), [fetched_feature])
+
+    def test_get_features_by_ids6(self) -> None:
+        """Testcase where all audio features are cached"""
+        feature = {"id": "cached_id", "tempo": 120.0}
+        self.feature_cache.set_many({"cached_id": feature})
+
+        with mock.patch.object(
+            self.track_repository,
+            "_fetch_features_by_ids",
+        ) as fetch:
+            features = self.track_repository._get_features_by_ids(["cached_id"])
+            fetch.assert_not_called()
+
+        self.assertListEqual(features, [feature])
+
     def test_get_track_by_id1(self) -> None:
         """Testcase where　spotify id is valid"""
         spotify_id = "0gplL1WMoJ6iYaPgMCL0gX"
@@ -150,6 +210,261 @@ class TestTrackRepositoryImpl(unittest.TestCase):
         self.assertEqual(actual_bpm, expected_bpm)
         self.assertEqual(tracks[0].artist, "Adele")
 
+    def test_get_tracks_by_ids3(self) -> None:
+        """Testcase where a part of tracks is cached"""
+        cached_track = mock.create_autospec(Track, instance=True)
+        fetched_track = mock.create_autospec(Track, instance=True)
+        self.track_cache.get_many = mock.MagicMock(return_value=[cached_track, None])
+        self.track_cache.set_many = mock.MagicMock()
+
+        with mock.patch.object(
+            self.track_repository,
+            "_fetch_tracks_by_ids",
+            return_value=[fetched_track],
+        ) as fetch:
+            tracks = self.track_repository.get_tracks_by_ids(["cached", "new"])
+            fetch.assert_called_once_with(["new"])
+
+        self.assertListEqual(tracks, [cached_track, fetched_track])
+        self.track_cache.set_many.assert_called_once_with([fetched_track])
+
+    def test_get_tracks_by_ids4(self) -> None:
+        """Testcase where more ids than Spotify accepts at once are specified"""
+        spotify_ids = [f"id{idx}" for idx in range(120)]
+
+        def get_items(ids, access_token):
+            # "id7" does not exist in spotify
+            return [
+                None if id_ == "id7" else {
+                    "id": id_,
+                    "name": "name",
+                    "album": {"name": "album", "images": [{"url": "url"}]},
+                    "artists": [{"name": "artist"}],
+                    "preview_url": "preview_url",
+                }
+                for id_ in ids
+            ]
+
+        def get_features(ids, access_token):
+            return [
+                {"tempo": 120.0, "key": 1, "mode": 1, "danceability": 0.5,
+                 "energy": 0.5}
+                for _ in ids
+            ]
+
+        self.access_token_persistence.get_access_token = lambda: "access_token"
+        with mock.patch.object(
+            self.track_repository, "_get_track_items_by_ids", side_effect=get_items
+        ) as get_items_mock, mock.patch.object(
+            self.track_repository, "_fetch_features_by_ids", side_effect=get_features
+        ) as get_features_mock:
+            tracks = self.track_repository.get_tracks_by_ids(spotify_ids)
+
+        self.assertEqual(get_items_mock.call_count, 3)
+        self.assertEqual(get_features_mock.call_count, 2)
+        self.assertEqual(len(tracks), 120)
+        self.assertEqual(tracks[7], None)
+        self.assertListEqual(
+            [track.spotify_id for track in tracks if track is not None],
+            [id_ for id_ in spotify_ids if id_ != "id7"],
+        )
+
+    def test_get_tracks_by_ids5(self) -> None:
+        """Testcase where tracks are found in the catalog"""
+        track = Track(
+            spotify_id="id0",
+            song_name="name",
+            artist="artist",
+            album_name="album",
+            bpm=120.0,
+            danceability=0.5,
+            energy=0.5,
+            image_url="url",
+            key=1,
+            mode=1,
+            preview_url="preview_url",
+        )
+        self.track_catalog.get_many.side_effect = None
+        self.track_catalog.get_many.return_value = ([track], [])
+
+        with mock.patch.object(
+            self.track_repository, "_fetch_tracks_by_ids"
+        ) as fetch_mock:
+            tracks = self.track_repository.get_tracks_by_ids(["id0"])
+
+        self.assertListEqual(tracks, [track])
+        fetch_mock.assert_not_called()
+        self.assertEqual(self.track_cache.get("id0"), track)
+
+    def test_get_tracks_by_ids6(self) -> None:
+        """Testcase where a track in the catalog is stale and refreshed in
+        background"""
+        stale = mock.create_autospec(Track, instance=True, spotify_id="id0")
+        fresh = mock.create_autospec(Track, instance=True, spotify_id="id0")
+        self.track_catalog.get_many.side_effect = None
+        self.track_catalog.get_many.return_value = ([stale], ["id0"])
+
+        with mock.patch.object(
+            self.track_repository, "_fetch_tracks_by_ids", return_value=[fresh]
+        ) as fetch_mock, mock.patch.object(self.track_cache, "set_many"):
+            tracks = self.track_repository.get_tracks_by_ids(["id0"])
+            self.track_repository.executor.shutdown(wait=True)
+
+        self.assertListEqual(tracks, [stale])
+        fetch_mock.assert_called_once_with(["id0"])
+        self.track_catalog.upsert_many.assert_called_once_with([fresh])
+
+    def test_get_stored_tracks_by_ids(self) -> None:
+        """Testcase where tracks are read from the cache and the catalog, and a
+        track stored in neither is None without asking Spotify"""
+        cached = mock.create_autospec(Track, instance=True, spotify_id="cached")
+        stored = mock.create_autospec(Track, instance=True, spotify_id="stored")
+        self.track_catalog.get_many.side_effect = None
+        self.track_catalog.get_many.return_value = ([stored, None], [])
+
+        with mock.patch.object(
+            self.track_cache,
+            "get_many",
+            return_value=[cached, None, None],
+        ), mock.patch.object(self.track_cache, "set_many"), \
+                mock.patch.object(self.spotify_client, "get") as get_mock:
+            tracks = self.track_repository.get_stored_tracks_by_ids(
+                ["cached", "stored", "missing"]
+            )
+
+        self.assertListEqual(tracks, [cached, stored, None])
+        self.track_catalog.get_many.assert_called_once_with(["stored", "missing"])
+        get_mock.assert_not_called()
+
+    def test_get_tracks_by_bpm(self) -> None:
+        """Testcase where tracks are searched by bpm without asking Spotify"""
+        cached = mock.create_autospec(Track, instance=True, spotify_id="cached")
+        stored = mock.create_autospec(Track, instance=True, spotify_id="stored")
+        self.track_cache.get_ids_by_bpm = mock.MagicMock(
+            return_value=["cached", "stored", "expired"]
+        )
+        self.track_cache.get_many = mock.MagicMock(return_value=[cached, None, None])
+        self.track_cache.set_many = mock.MagicMock()
+        self.track_cache.remove_from_bpm_index = mock.MagicMock()
+        self.track_catalog.get_many.side_effect = None
+        self.track_catalog.get_many.return_value = ([stored, None], [])
+
+        with mock.patch.object(self.spotify_client, "get") as get_mock:
+            tracks = self.track_repository.get_tracks_by_bpm(120, 128, 0, 50)
+
+        self.assertListEqual(tracks, [cached, stored])
+        get_mock.assert_not_called()
+        self.track_cache.get_ids_by_bpm.assert_called_once_with(120, 128, 0, 50)
+        self.track_cache.remove_from_bpm_index.assert_called_once_with(["expired"])
+
+    def test_get_similar_tracks(self) -> None:
+        """Testcase where tracks similar to the specified one are searched"""
+        seed = mock.create_autospec(Track, instance=True, spotify_id="seed")
+        similar = mock.create_autospec(Track, instance=True, spotify_id="similar")
+        self.feature_index.get_similar_ids.return_value = ["similar", "expired"]
+
+        with mock.patch.object(
+            self.track_repository, "get_track_by_id", return_value=seed
+        ), mock.patch.object(
+            self.track_repository,
+            "_get_stored_tracks",
+            return_value=[similar, None],
+        ):
+            tracks = self.track_repository.get_similar_tracks("seed", 10)
+
+        self.assertListEqual(tracks, [similar])
+        self.feature_index.add_many.assert_called_once_with([seed])
+        self.feature_index.get_similar_ids.assert_called_once_with(seed, 10)
+
+        with mock.patch.object(
+            self.track_repository, "get_track_by_id", return_value=None
+        ):
+            self.assertIsNone(self.track_repository.get_similar_tracks("none", 10))
+
+    def test_get_compatible_tracks(self) -> None:
+        """Testcase where tracks compatible with the specified one are searched"""
+        seed = mock.create_autospec(Track, instance=True, spotify_id="seed")
+        compatible = mock.create_autospec(Track, instance=True)
+        self.camelot_index.get_compatible_ids.return_value = ["compatible"]
+
+        with mock.patch.object(
+            self.track_repository, "get_track_by_id", return_value=seed
+        ), mock.patch.object(
+            self.track_repository, "_get_stored_tracks", return_value=[compatible]
+        ) as get_stored_mock:
+            tracks = self.track_repository.get_compatible_tracks("seed", 0.06, 10)
+
+        self.assertListEqual(tracks, [compatible])
+        self.camelot_index.get_compatible_ids.assert_called_once_with(seed, 0.06, 10)
+        get_stored_mock.assert_called_once_with(["compatible"])
+
+    def test_get_tracks_by_playlist_ids(self) -> None:
+        """Testcase where a track is in several playlists"""
+        playlists = {
+            "playlist1": ["id0", "id1", "id2"],
+            "playlist2": ["id2", "id1", "id3"],
+        }
+
+        def get_playlist_items(playlist_id, access_token):
+            return [
+                {
+                    "id": id_,
+                    "name": "name",
+                    "album": {"name": "album", "images": [{"url": "url"}]},
+                    "artists": [{"name": "artist"}],
+                    "preview_url": "preview_url",
+                }
+                for id_ in playlists[playlist_id]
+            ]
+
+        def get_features(ids, access_token):
+            return [
+                {"tempo": 120.0, "key": 1, "mode": 1, "danceability": 0.5,
+                 "energy": 0.5}
+                for _ in ids
+            ]
+
+        self.access_token_persistence.get_access_token = lambda: "access_token"
+        with mock.patch.object(
+            self.track_repository,
+            "_get_playlist_items",
+            side_effect=get_playlist_items,
+        ), mock.patch.object(
+            self.track_repository, "_fetch_features_by_ids", side_effect=get_features
+        ) as get_features_mock:
+            tracks_list = self.track_repository.get_tracks_by_playlist_ids(
+                ["playlist1", "playlist2"]
+            )
+
+        get_features_mock.assert_called_once_with(
+            ["id0", "id1", "id2", "id3"], "access_token"
+        )
+        self.assertListEqual(
+            [[track.spotify_id for track in tracks] for tracks in tracks_list],
+            list(playlists.values()),
+        )
+
+    def test_get(self) -> None:
+        """Testcase where the access token is rejected and the request is retried
+        """
+        unauthorized = mock.MagicMock(status_code=401)
+        ok = mock.MagicMock(status_code=200)
+        access_token_repository = mock.MagicMock()
+        access_token_repository.get_access_token.return_value = "new_token"
+        self.track_repository.access_token_repository = access_token_repository
+
+        with mock.patch.object(
+            self.spotify_client, "get", side_effect=[unauthorized, ok],
+        ) as get_mock:
+            response = self.track_repository._get("/tracks/id", "old_token")
+
+        self.assertIs(response, ok)
+        access_token_repository.invalidate_access_token.assert_called_once_with(
+            "old_token"
+        )
+        _, kwargs = get_mock.call_args
+        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer new_token")
+
     def test_get_tracks_by_query1(self) -> None:
         query = "adele easy on me"
         tracks = self.track_repository.get_tracks_by_query(query)
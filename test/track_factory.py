@@ -0,0 +1,24 @@
+from domain.model.track import Track
+
+
+def create_track(
+    spotify_id: str,
+    bpm: float = 120.0,
+    energy: float = 0.5,
+    danceability: float = 0.5,
+    key: int = 0,
+    mode: int = 1,
+) -> Track:
+    return Track(
+        spotify_id=spotify_id,
+        song_name="song_name",
+        artist="artist",
+        album_name="album_name",
+        bpm=bpm,
+        danceability=danceability,
+        energy=energy,
+        image_url="image_url",
+        key=key,
+        mode=mode,
+        preview_url="preview_url",
+    )